@@ -1,8 +1,11 @@
 """Analytics API endpoints - Dashboard and Statistics"""
-from flask import jsonify
+from flask import jsonify, request
 from flask_restx import Namespace, Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.services.analytics.service import AnalyticsService
+from src.services.analytics.encoder import DashboardEncoder, dashboard_encoder, stats_encoder
+from src.services.analytics.trends import TrendEngine
+from src.utils.analytics_cache import analytics_cache
 
 # Create namespace
 ns = Namespace('analytics', description='Analytics and dashboard operations')
@@ -10,48 +13,65 @@ ns = Namespace('analytics', description='Analytics and dashboard operations')
 # Initialize service
 analytics_service = AnalyticsService()
 
+# Longest trend window accepted, in months
+MAX_TREND_MONTHS = 120
+
+trend_params = {
+    'months': 'Number of calendar months to cover (default: 6)',
+    'granularity': 'Bucket size: day, week, month or quarter (default: month)'
+}
+
+
+def parse_trend_args():
+    """Read and validate the months/granularity query parameters"""
+    months = request.args.get('months', 6, type=int)
+    granularity = request.args.get('granularity', 'month')
+
+    if not 1 <= months <= MAX_TREND_MONTHS:
+        raise ValueError(f'months must be between 1 and {MAX_TREND_MONTHS}')
+    if granularity not in TrendEngine.GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(TrendEngine.GRANULARITIES)}")
+
+    return {'months': months, 'granularity': granularity}
+
 
 @ns.route('/dashboard')
 class Dashboard(Resource):
-    @ns.doc('get_dashboard_data', security='Bearer')
+    # Upper bound for the recent transactions list
+    MAX_RECENT_TRANSACTIONS = 100
+
+    @ns.doc('get_dashboard_data', security='Bearer',
+            params={
+                'sections': 'Comma-separated dashboard sections to include (default: all)',
+                'limit': 'Number of recent transactions to include (default: 20, max: 100)'
+            })
     @jwt_required()
     def get(self):
         """Get dashboard overview data with metrics, charts, and categories"""
         current_user_id = get_jwt_identity()
 
         try:
-            # Get dashboard data from service
-            dashboard_data = analytics_service.get_dashboard_data(current_user_id)
-
-            # Convert any SimpleNamespace objects to dicts for JSON serialization
-            from datetime import datetime, date
-
-            def convert_to_dict(obj, visited=None):
-                if visited is None:
-                    visited = set()
-
-                # Handle datetime objects
-                if isinstance(obj, (datetime, date)):
-                    return obj.isoformat()
-
-                # Check for circular references
-                obj_id = id(obj)
-                if obj_id in visited:
-                    return None
-
-                if hasattr(obj, '__dict__') and not isinstance(obj, (datetime, date)):
-                    visited.add(obj_id)
-                    result = {key: convert_to_dict(value, visited) for key, value in obj.__dict__.items() if not key.startswith('_')}
-                    visited.remove(obj_id)
-                    return result
-                elif isinstance(obj, list):
-                    return [convert_to_dict(item, visited) for item in obj]
-                elif isinstance(obj, dict):
-                    return {key: convert_to_dict(value, visited) for key, value in obj.items()}
-                else:
-                    return obj
-
-            serializable_data = convert_to_dict(dashboard_data)
+            sections = analytics_service.resolve_sections(request.args.get('sections') or DashboardEncoder.SECTIONS)
+            unsupported = [section for section in sections if section not in DashboardEncoder.SECTIONS]
+            if unsupported:
+                raise ValueError(f"Unsupported dashboard section(s): {', '.join(unsupported)}")
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }, 400
+
+        limit = request.args.get('limit', AnalyticsService.RECENT_TRANSACTIONS_LIMIT, type=int)
+        limit = max(1, min(limit, self.MAX_RECENT_TRANSACTIONS))
+
+        try:
+            serializable_data = analytics_cache.get_or_compute(
+                current_user_id, 'dashboard',
+                lambda: dashboard_encoder.encode(
+                    analytics_service.get_dashboard_data(current_user_id, sections, recent_limit=limit)
+                ),
+                params={'sections': ','.join(sections), 'limit': limit}
+            )
 
             return {
                 'success': True,
@@ -76,21 +96,10 @@ class Statistics(Resource):
         current_user_id = get_jwt_identity()
 
         try:
-            # Get stats data from service
-            stats_data = analytics_service.get_stats_data(current_user_id)
-
-            # Convert to serializable format
-            def convert_to_dict(obj):
-                if hasattr(obj, '__dict__'):
-                    return {key: convert_to_dict(value) for key, value in obj.__dict__.items()}
-                elif isinstance(obj, list):
-                    return [convert_to_dict(item) for item in obj]
-                elif isinstance(obj, dict):
-                    return {key: convert_to_dict(value) for key, value in obj.items()}
-                else:
-                    return obj
-
-            serializable_data = convert_to_dict(stats_data)
+            serializable_data = analytics_cache.get_or_compute(
+                current_user_id, 'stats',
+                lambda: stats_encoder.encode(analytics_service.get_stats_data(current_user_id))
+            )
 
             return {
                 'success': True,
@@ -106,24 +115,26 @@ class Statistics(Resource):
 
 @ns.route('/trends')
 class Trends(Resource):
-    @ns.doc('get_spending_trends', security='Bearer')
+    @ns.doc('get_spending_trends', security='Bearer', params=trend_params)
     @jwt_required()
     def get(self):
         """Get spending trends over time"""
         current_user_id = get_jwt_identity()
 
         try:
-            # Get trends from service (if method exists)
-            if hasattr(analytics_service, 'get_spending_trends'):
-                trends = analytics_service.get_spending_trends(current_user_id)
-            else:
-                # Fallback: use dashboard data for trends
-                dashboard_data = analytics_service.get_dashboard_data(current_user_id)
-                trends = {
-                    'monthly_labels': dashboard_data.get('monthly_labels', []),
-                    'monthly_expenses': dashboard_data.get('monthly_expenses', []),
-                    'monthly_income': dashboard_data.get('monthly_income', []),
-                }
+            params = parse_trend_args()
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }, 400
+
+        try:
+            trends = analytics_cache.get_or_compute(
+                current_user_id, 'trends',
+                lambda: analytics_service.get_spending_trends(current_user_id, **params),
+                params=params
+            )
 
             return {
                 'success': True,
@@ -147,8 +158,10 @@ class TopCategories(Resource):
 
         try:
             # Get dashboard data which includes top categories
-            dashboard_data = analytics_service.get_dashboard_data(current_user_id)
-            top_categories = dashboard_data.get('top_categories', [])
+            top_categories = analytics_cache.get_or_compute(
+                current_user_id, 'categories/top',
+                lambda: analytics_service.get_dashboard_data(current_user_id, ['top_categories']).get('top_categories', [])
+            )
 
             # top_categories is already a list of dicts from the service
             # Just return it directly
@@ -173,17 +186,7 @@ class Summary(Resource):
         current_user_id = get_jwt_identity()
 
         try:
-            dashboard_data = analytics_service.get_dashboard_data(current_user_id)
-
-            # Extract key metrics for dashboard cards
-            summary = {
-                'monthly_spending': dashboard_data.get('total_expenses_only', 0),
-                'net_balance': getattr(dashboard_data.get('iou_data'), 'net_balance', 0) if dashboard_data.get('iou_data') else 0,
-                'total_assets': dashboard_data.get('total_assets', 0),
-                'budget_remaining': self._calculate_budget_remaining(dashboard_data),
-                'currency_symbol': dashboard_data.get('base_currency', {}).get('symbol', '$'),
-                'currency_code': dashboard_data.get('base_currency', {}).get('code', 'USD'),
-            }
+            summary = analytics_cache.get_or_compute(current_user_id, 'summary', lambda: self._build_summary(current_user_id))
 
             return {
                 'success': True,
@@ -196,6 +199,21 @@ class Summary(Resource):
                 'error': str(e)
             }, 500
 
+    def _build_summary(self, current_user_id):
+        """Extract key metrics for dashboard cards"""
+        dashboard_data = analytics_service.get_dashboard_data(
+            current_user_id, ['totals', 'iou', 'assets', 'budget_summary', 'currency']
+        )
+
+        return {
+            'monthly_spending': dashboard_data.get('total_expenses_only', 0),
+            'net_balance': getattr(dashboard_data.get('iou_data'), 'net_balance', 0) if dashboard_data.get('iou_data') else 0,
+            'total_assets': dashboard_data.get('total_assets', 0),
+            'budget_remaining': self._calculate_budget_remaining(dashboard_data),
+            'currency_symbol': dashboard_data.get('base_currency', {}).get('symbol', '$'),
+            'currency_code': dashboard_data.get('base_currency', {}).get('code', 'USD'),
+        }
+
     def _calculate_budget_remaining(self, dashboard_data):
         """Calculate total budget remaining across all budgets"""
         budget_summary = dashboard_data.get('budget_summary')
@@ -206,14 +224,26 @@ class Summary(Resource):
 
 @ns.route('/cashflow')
 class CashFlow(Resource):
-    @ns.doc('get_cashflow_data', security='Bearer')
+    @ns.doc('get_cashflow_data', security='Bearer', params=trend_params)
     @jwt_required()
     def get(self):
         """Get cash flow data (monthly income, expenses, and savings)"""
         current_user_id = get_jwt_identity()
 
         try:
-            cashflow_data = analytics_service.get_cashflow_data(current_user_id)
+            params = parse_trend_args()
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }, 400
+
+        try:
+            cashflow_data = analytics_cache.get_or_compute(
+                current_user_id, 'cashflow',
+                lambda: analytics_service.get_cashflow_data(current_user_id, **params),
+                params=params
+            )
 
             return {
                 'success': True,
@@ -238,7 +268,10 @@ class FinancialHealth(Resource):
         current_user_id = get_jwt_identity()
 
         try:
-            health_data = analytics_service.get_financial_health(current_user_id)
+            health_data = analytics_cache.get_or_compute(
+                current_user_id, 'health',
+                lambda: analytics_service.get_financial_health(current_user_id)
+            )
 
             return {
                 'success': True,
@@ -263,7 +296,10 @@ class NetWorth(Resource):
         current_user_id = get_jwt_identity()
 
         try:
-            networth_data = analytics_service.get_networth_trend(current_user_id)
+            networth_data = analytics_cache.get_or_compute(
+                current_user_id, 'networth',
+                lambda: analytics_service.get_networth_trend(current_user_id)
+            )
 
             return {
                 'success': True,
@@ -213,23 +213,13 @@ class BudgetOverview(Resource):
 
             total_budget = 0
             total_spent = 0
-            budget_details = []
 
-            for budget in budgets:
-                spent = budget.get_spent() if hasattr(budget, 'get_spent') else 0
-                remaining = budget.get_remaining() if hasattr(budget, 'get_remaining') else budget.amount
-                percentage = budget.get_percentage() if hasattr(budget, 'get_percentage') else 0
+            # Serialize budgets with spending info, evaluated for all budgets at once
+            budget_details = budgets_schema.dump(budgets)
 
+            for budget, budget_dict in zip(budgets, budget_details):
                 total_budget += budget.amount
-                total_spent += spent
-
-                # Serialize budget with additional spending info
-                budget_dict = budget_schema.dump(budget)
-                budget_dict['spent'] = spent
-                budget_dict['remaining'] = remaining
-                budget_dict['percentage'] = percentage
-
-                budget_details.append(budget_dict)
+                total_spent += budget_dict['spent']
 
             total_remaining = total_budget - total_spent
 
@@ -261,10 +251,10 @@ class BudgetProgress(Resource):
         if not budget:
             return {'success': False, 'error': 'Budget not found'}, 404
 
-        # Calculate spending if methods exist
-        spent = budget.get_spent() if hasattr(budget, 'get_spent') else 0
-        remaining = budget.get_remaining() if hasattr(budget, 'get_remaining') else budget.amount
-        percentage = budget.get_percentage() if hasattr(budget, 'get_percentage') else 0
+        # Calculate spending once and derive the rest from it
+        spent = budget.get_spent()
+        remaining = budget.get_remaining_amount(spent)
+        percentage = budget.get_progress_percentage(spent)
 
         return {
             'success': True,
@@ -26,7 +26,7 @@ class CategoryList(Resource):
         current_user_id = get_jwt_identity()
 
         # Get all categories (including parent/subcategories)
-        categories = Category.query.filter_by(user_id=current_user_id).all()
+        categories = Category.query.filter_by(user_id=current_user_id).order_by(Category.id).all()
 
         # Serialize
         result = categories_schema.dump(categories)
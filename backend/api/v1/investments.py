@@ -4,6 +4,7 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.investment import Portfolio, Investment, InvestmentTransaction
 from src.extensions import db
+from src.utils.helpers import sync_investments_with_accounts
 from schemas import (
     portfolio_schema, portfolios_schema,
     investment_schema, investments_schema,
@@ -83,6 +84,9 @@ class PortfolioList(Resource):
             db.session.add(new_portfolio)
             db.session.commit()
 
+            # Keep the linked account balance in step with the portfolio
+            sync_investments_with_accounts(current_user_id)
+
             result = portfolio_schema.dump(new_portfolio)
 
             return {
@@ -141,6 +145,9 @@ class PortfolioDetail(Resource):
 
             db.session.commit()
 
+            # Keep the linked account balance in step with the portfolio
+            sync_investments_with_accounts(current_user_id)
+
             result = portfolio_schema.dump(portfolio)
 
             return {
@@ -215,8 +222,9 @@ class InvestmentList(Resource):
                 investment.industry = stock_data.get('industry', investment.industry)
                 investment.last_update = datetime.utcnow()
 
-        # Commit price updates
+        # Commit price updates and push new values to linked accounts
         db.session.commit()
+        sync_investments_with_accounts(current_user_id)
 
         # Serialize
         result = investments_schema.dump(investments)
@@ -284,6 +292,8 @@ class InvestmentList(Resource):
             db.session.add(buy_transaction)
             db.session.commit()
 
+            sync_investments_with_accounts(current_user_id)
+
             result = investment_schema.dump(new_investment)
 
             return {
@@ -323,6 +333,7 @@ class InvestmentDetail(Resource):
             investment.current_price = stock_data.get('price', investment.current_price)
             investment.last_update = datetime.utcnow()
             db.session.commit()
+            sync_investments_with_accounts(current_user_id)
 
         result = investment_schema.dump(investment)
 
@@ -353,6 +364,7 @@ class InvestmentDetail(Resource):
             investment.notes = data.get('notes', investment.notes)
 
             db.session.commit()
+            sync_investments_with_accounts(current_user_id)
 
             result = investment_schema.dump(investment)
 
@@ -386,6 +398,7 @@ class InvestmentDetail(Resource):
         try:
             db.session.delete(investment)
             db.session.commit()
+            sync_investments_with_accounts(current_user_id)
 
             return {
                 'success': True,
@@ -470,6 +483,7 @@ class TransactionList(Resource):
 
             db.session.add(new_transaction)
             db.session.commit()
+            sync_investments_with_accounts(current_user_id)
 
             result = investment_transaction_schema.dump(new_transaction)
 
@@ -4,8 +4,11 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.transaction_rule import TransactionRule
 from src.models.category import Category
+from src.models.rule_apply_job import RuleApplyJob
 from src.extensions import db
-from src.utils.rule_engine import bulk_apply_rules, suggest_rule_from_edit
+from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
+from src.services.transaction_rule.preview_service import RulePreviewService
+from src.utils.rule_engine import suggest_rule_from_edit
 from datetime import datetime
 
 # Create namespace
@@ -231,15 +234,15 @@ class BulkApplyRules(Resource):
     @ns.doc('bulk_apply_rules', security='Bearer')
     @jwt_required()
     def post(self):
-        """Apply rules to all existing transactions"""
+        """Apply rules to all existing transactions (runs as a background job)"""
         current_user_id = get_jwt_identity()
         data = request.get_json() or {}
 
         rule_ids = data.get('rule_ids')  # Optional: specific rules to apply
 
         try:
-            result = bulk_apply_rules(current_user_id, rule_ids)
-            return result, 200 if result['success'] else 400
+            job = BulkRuleApplyService.start_job(current_user_id, rule_ids)
+            return _job_response(job), 202
 
         except Exception as e:
             return {
@@ -248,6 +251,30 @@ class BulkApplyRules(Resource):
             }, 400
 
 
+@ns.route('/bulk-apply/<int:job_id>')
+class BulkApplyStatus(Resource):
+    @ns.doc('bulk_apply_status', security='Bearer')
+    @jwt_required()
+    def get(self, job_id):
+        """Get progress of a bulk apply job"""
+        current_user_id = get_jwt_identity()
+
+        job = RuleApplyJob.query.filter_by(id=job_id, user_id=current_user_id).first()
+        if not job:
+            return {'success': False, 'error': 'Job not found'}, 404
+
+        return _job_response(job), 200
+
+
+def _job_response(job):
+    return {
+        'success': job.status != 'failed',
+        'job': job.to_dict(),
+        'transactions_processed': job.processed,
+        'transactions_updated': job.updated
+    }
+
+
 @ns.route('/test')
 class TestRule(Resource):
     @ns.doc('test_rule', security='Bearer')
@@ -299,6 +326,51 @@ class TestRule(Resource):
             }, 400
 
 
+@ns.route('/preview')
+class PreviewRule(Resource):
+    @ns.doc('preview_rule', security='Bearer')
+    @jwt_required()
+    def post(self):
+        """Preview a rule against all existing transactions"""
+        current_user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        if not data.get('pattern'):
+            return {
+                'success': False,
+                'error': 'pattern is required'
+            }, 400
+
+        try:
+            # Create temporary rule (don't save to DB)
+            temp_rule = TransactionRule(
+                user_id=current_user_id,
+                name=data.get('name', 'Preview Rule'),
+                pattern=data['pattern'],
+                pattern_field=data.get('pattern_field', 'description'),
+                is_regex=data.get('is_regex', False),
+                case_sensitive=data.get('case_sensitive', False),
+                amount_min=data.get('amount_min'),
+                amount_max=data.get('amount_max'),
+                transaction_type_filter=data.get('transaction_type_filter'),
+                auto_category_id=data.get('auto_category_id'),
+                priority=data.get('priority', 50),
+                active=True
+            )
+
+            preview = RulePreviewService.preview(current_user_id, temp_rule, data.get('sample_size'))
+            return {
+                'success': True,
+                'preview': preview
+            }, 200
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }, 400
+
+
 @ns.route('/suggest')
 class SuggestRule(Resource):
     @ns.doc('suggest_rule_from_edit', security='Bearer')
@@ -6,7 +6,7 @@ from src.models.transaction import Expense
 from src.extensions import db
 from schemas import transaction_schema, transactions_schema
 from datetime import datetime
-from sqlalchemy import or_, and_
+from sqlalchemy import and_
 
 # Create namespace
 ns = Namespace('transactions', description='Transaction operations')
@@ -48,10 +48,7 @@ class TransactionList(Resource):
 
         # Build query
         query = Expense.query.filter(
-            or_(
-                Expense.user_id == current_user_id,
-                Expense.split_with.like(f'%{current_user_id}%')
-            )
+            Expense.involving_user(current_user_id)
         )
 
         # Apply filters
@@ -177,10 +174,7 @@ class TransactionDetail(Resource):
         transaction = Expense.query.filter(
             and_(
                 Expense.id == id,
-                or_(
-                    Expense.user_id == current_user_id,
-                    Expense.split_with.like(f'%{current_user_id}%')
-                )
+                Expense.involving_user(current_user_id)
             )
         ).first()
 
@@ -286,10 +280,7 @@ class RecentTransactions(Resource):
         limit = request.args.get('limit', 10, type=int)
 
         transactions = Expense.query.filter(
-            or_(
-                Expense.user_id == current_user_id,
-                Expense.split_with.like(f'%{current_user_id}%')
-            )
+            Expense.involving_user(current_user_id)
         ).order_by(Expense.date.desc()).limit(limit).all()
 
         result = transactions_schema.dump(transactions)
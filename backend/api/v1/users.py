@@ -364,7 +364,8 @@ class ClearCache(Resource):
         user_id = get_jwt_identity()
 
         # Clear any cached data for user
-        # This is a placeholder
+        from src.utils.analytics_cache import analytics_cache
+        analytics_cache.clear(user_id)
 
         return {'message': 'Cache cleared successfully'}, 200
 
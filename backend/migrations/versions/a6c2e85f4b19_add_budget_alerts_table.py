@@ -0,0 +1,40 @@
+"""Add budget_alerts table
+
+Revision ID: a6c2e85f4b19
+Revises: f3b96d2a8e17
+Create Date: 2026-10-18 17:12:38.440571
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c2e85f4b19'
+down_revision = 'f3b96d2a8e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('budget_alerts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('budget_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=120), nullable=False),
+        sa.Column('period_start', sa.DateTime(), nullable=False),
+        sa.Column('threshold', sa.Integer(), nullable=False),
+        sa.Column('spent', sa.Float(), nullable=False),
+        sa.Column('total_budget', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_budget_alerts_budget_period', 'budget_alerts', ['budget_id', 'period_start'], unique=False)
+    op.create_index('ix_budget_alerts_status', 'budget_alerts', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_budget_alerts_status', table_name='budget_alerts')
+    op.drop_index('ix_budget_alerts_budget_period', table_name='budget_alerts')
+    op.drop_table('budget_alerts')
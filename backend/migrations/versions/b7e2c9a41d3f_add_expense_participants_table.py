@@ -0,0 +1,140 @@
+"""add expense_participants table
+
+Revision ID: b7e2c9a41d3f
+Revises: 6987639505a7
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c9a41d3f'
+down_revision = '6987639505a7'
+branch_labels = None
+depends_on = None
+
+
+# Migrations must keep producing what they did at their revision, so they don't
+# import SplitCalculator. Revisions c41f8d2e6a90 and e7a14c9b3d52 carry the same frozen
+# copy of these helpers on purpose; tests/test_migration_splits.py checks every
+# copy against SplitCalculator.
+def _parse_split_details(split_details):
+    if isinstance(split_details, dict):
+        return split_details
+    if isinstance(split_details, str) and split_details:
+        try:
+            return json.loads(split_details)
+        except ValueError:
+            return {}
+    return {}
+
+
+def _split_amounts(expense, users):
+    """
+    Frozen copy of the split amounts SplitCalculator.compute produced at this revision
+    Returns (payer_id, payer_amount, [(participant_id, amount), ...]); payer_id is
+    None and unknown participants are left out when they are not in `users`.
+    """
+    payer_id = expense.paid_by if expense.paid_by in users else None
+    split_with_ids = expense.split_with.split(',') if expense.split_with else []
+    participants = [user_id.strip() for user_id in split_with_ids if user_id.strip() in users]
+    payer_splits = expense.paid_by in split_with_ids
+    amount = expense.amount
+    details = _parse_split_details(expense.split_details)
+
+    if expense.split_method == 'none' or not expense.split_with:
+        return payer_id, amount, []
+
+    if expense.split_method == 'equal':
+        count = len(participants) + (0 if payer_splits else 1)
+        per_person = amount / count if count > 0 else 0
+        return payer_id, 0 if payer_splits else per_person, [(user_id, per_person) for user_id in participants]
+
+    if expense.split_method in ('percentage', 'custom'):
+        detail_types = ('percentage',) if expense.split_method == 'percentage' else ('amount', 'custom')
+        if isinstance(details, dict) and details.get('type') in detail_types:
+            values = details.get('values', {})
+            if expense.split_method == 'percentage':
+                share = lambda user_id: (amount * float(values.get(user_id, 0))) / 100
+            else:
+                share = lambda user_id: float(values.get(user_id, 0))
+
+            payer_amount = 0 if payer_splits else share(expense.paid_by)
+            splits = [[user_id, share(user_id)] for user_id in participants]
+
+            assigned = payer_amount
+            for split in splits:
+                assigned += split[1]
+            if abs(assigned - amount) > 0.01:
+                difference = amount - assigned
+                if splits:
+                    splits[-1][1] += difference
+                elif payer_amount > 0:
+                    payer_amount += difference
+            return payer_id, payer_amount, [tuple(split) for split in splits]
+
+        payer_value = expense.split_value if expense.split_value is not None else 0
+        if expense.split_method == 'percentage':
+            payer_value = (amount * payer_value) / 100
+        payer_amount = 0 if payer_splits else payer_value
+        per_person = (amount - payer_amount) / len(participants) if participants else 0
+        return payer_id, payer_amount, [(user_id, per_person) for user_id in participants]
+
+    return payer_id, 0, []
+
+
+def upgrade():
+    op.create_table('expense_participants',
+        sa.Column('expense_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=120), nullable=False),
+        sa.Column('share_amount', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['expense_id'], ['expenses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('expense_id', 'user_id')
+    )
+    op.create_index('ix_expense_participants_user_id', 'expense_participants', ['user_id', 'expense_id'], unique=False)
+
+    # Backfill participants from the existing split_with / split_details columns
+    bind = op.get_bind()
+    users = {row.id: row.name for row in bind.execute(sa.text('SELECT id, name FROM users'))}
+
+    expenses = bind.execute(sa.text(
+        'SELECT id, amount, original_amount, currency_code, paid_by, split_method, '
+        'split_value, split_with, split_details FROM expenses '
+        "WHERE split_with IS NOT NULL AND split_with != ''"
+    ))
+
+    participants_table = sa.table('expense_participants',
+        sa.column('expense_id', sa.Integer),
+        sa.column('user_id', sa.String),
+        sa.column('share_amount', sa.Float)
+    )
+
+    rows = []
+    for expense in expenses:
+        shares = {}
+        for user_id in expense.split_with.split(','):
+            user_id = user_id.strip()
+            if user_id:
+                shares.setdefault(user_id, 0.0)
+        for user_id, share_amount in _split_amounts(expense, users)[2]:
+            shares[user_id] = shares.get(user_id, 0.0) + share_amount
+
+        rows.extend(
+            {'expense_id': expense.id, 'user_id': user_id, 'share_amount': share_amount}
+            for user_id, share_amount in shares.items()
+        )
+        if len(rows) >= 1000:
+            op.bulk_insert(participants_table, rows)
+            rows = []
+
+    if rows:
+        op.bulk_insert(participants_table, rows)
+
+
+def downgrade():
+    op.drop_index('ix_expense_participants_user_id', table_name='expense_participants')
+    op.drop_table('expense_participants')
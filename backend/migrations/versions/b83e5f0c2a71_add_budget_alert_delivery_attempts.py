@@ -0,0 +1,29 @@
+"""Add delivery attempt columns to budget_alerts
+
+Revision ID: b83e5f0c2a71
+Revises: d2f7b1a94e36
+Create Date: 2026-10-19 09:27:44.815302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e5f0c2a71'
+down_revision = 'd2f7b1a94e36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Failed sends stay pending and are retried; claimed_at marks rows being sent
+    with op.batch_alter_table('budget_alerts') as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('budget_alerts') as batch_op:
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('attempts')
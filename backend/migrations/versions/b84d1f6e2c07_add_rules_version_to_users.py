@@ -0,0 +1,27 @@
+"""Add rules_version column to users table
+
+Revision ID: b84d1f6e2c07
+Revises: a6c2e85f4b19
+Create Date: 2026-10-18 18:03:12.776215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b84d1f6e2c07'
+down_revision = 'a6c2e85f4b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user counter bumped whenever categorization rules change
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('rules_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('rules_version')
@@ -0,0 +1,186 @@
+"""add monthly_user_rollups table
+
+Revision ID: c41f8d2e6a90
+Revises: b7e2c9a41d3f
+Create Date: 2026-10-18 11:02:17.540931
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f8d2e6a90'
+down_revision = 'b7e2c9a41d3f'
+branch_labels = None
+depends_on = None
+
+
+# Migrations must keep producing what they did at their revision, so they don't
+# import SplitCalculator. Revisions b7e2c9a41d3f and e7a14c9b3d52 carry the same frozen
+# copy of these helpers on purpose; tests/test_migration_splits.py checks every
+# copy against SplitCalculator.
+def _parse_split_details(split_details):
+    if isinstance(split_details, dict):
+        return split_details
+    if isinstance(split_details, str) and split_details:
+        try:
+            return json.loads(split_details)
+        except ValueError:
+            return {}
+    return {}
+
+
+def _split_amounts(expense, users):
+    """
+    Frozen copy of the split amounts SplitCalculator.compute produced at this revision
+    Returns (payer_id, payer_amount, [(participant_id, amount), ...]); payer_id is
+    None and unknown participants are left out when they are not in `users`.
+    """
+    payer_id = expense.paid_by if expense.paid_by in users else None
+    split_with_ids = expense.split_with.split(',') if expense.split_with else []
+    participants = [user_id.strip() for user_id in split_with_ids if user_id.strip() in users]
+    payer_splits = expense.paid_by in split_with_ids
+    amount = expense.amount
+    details = _parse_split_details(expense.split_details)
+
+    if expense.split_method == 'none' or not expense.split_with:
+        return payer_id, amount, []
+
+    if expense.split_method == 'equal':
+        count = len(participants) + (0 if payer_splits else 1)
+        per_person = amount / count if count > 0 else 0
+        return payer_id, 0 if payer_splits else per_person, [(user_id, per_person) for user_id in participants]
+
+    if expense.split_method in ('percentage', 'custom'):
+        detail_types = ('percentage',) if expense.split_method == 'percentage' else ('amount', 'custom')
+        if isinstance(details, dict) and details.get('type') in detail_types:
+            values = details.get('values', {})
+            if expense.split_method == 'percentage':
+                share = lambda user_id: (amount * float(values.get(user_id, 0))) / 100
+            else:
+                share = lambda user_id: float(values.get(user_id, 0))
+
+            payer_amount = 0 if payer_splits else share(expense.paid_by)
+            splits = [[user_id, share(user_id)] for user_id in participants]
+
+            assigned = payer_amount
+            for split in splits:
+                assigned += split[1]
+            if abs(assigned - amount) > 0.01:
+                difference = amount - assigned
+                if splits:
+                    splits[-1][1] += difference
+                elif payer_amount > 0:
+                    payer_amount += difference
+            return payer_id, payer_amount, [tuple(split) for split in splits]
+
+        payer_value = expense.split_value if expense.split_value is not None else 0
+        if expense.split_method == 'percentage':
+            payer_value = (amount * payer_value) / 100
+        payer_amount = 0 if payer_splits else payer_value
+        per_person = (amount - payer_amount) / len(participants) if participants else 0
+        return payer_id, payer_amount, [(user_id, per_person) for user_id in participants]
+
+    return payer_id, 0, []
+
+
+def _user_share(payer_id, payer_amount, splits, user_id):
+    if payer_id == user_id:
+        return payer_amount
+    for participant_id, amount in splits:
+        if participant_id == user_id:
+            return amount
+    return 0
+
+
+def upgrade():
+    op.create_table('monthly_user_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=120), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('transaction_type', sa.String(length=20), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('share_amount', sa.Float(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('own_amount', sa.Float(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_monthly_user_rollups_user_month', 'monthly_user_rollups',
+                    ['user_id', 'month', 'transaction_type', 'category_id'], unique=False)
+
+    # Backfill rollups from the existing expenses
+    bind = op.get_bind()
+    users = {row.id: row.name for row in bind.execute(sa.text('SELECT id, name FROM users'))}
+
+    # Typed columns so dates come back as datetimes on every backend
+    expenses_table = sa.table('expenses',
+        sa.column('id', sa.Integer),
+        sa.column('date', sa.DateTime),
+        sa.column('transaction_type', sa.String),
+        sa.column('category_id', sa.Integer),
+        sa.column('user_id', sa.String),
+        sa.column('amount', sa.Float),
+        sa.column('original_amount', sa.Float),
+        sa.column('currency_code', sa.String),
+        sa.column('paid_by', sa.String),
+        sa.column('split_method', sa.String),
+        sa.column('split_value', sa.Float),
+        sa.column('split_with', sa.String),
+        sa.column('split_details', sa.Text)
+    )
+
+    totals = {}
+    for expense in bind.execute(sa.select(expenses_table)):
+        payer_id, payer_amount, splits = _split_amounts(expense, users)
+        month = expense.date.strftime('%Y-%m')
+
+        # The creator and every split_with participant
+        user_ids = {expense.user_id}
+        for user_id in (expense.split_with.split(',') if expense.split_with else []):
+            user_id = user_id.strip()
+            if user_id:
+                user_ids.add(user_id)
+
+        for user_id in user_ids:
+            key = (user_id, month, expense.transaction_type or 'expense', expense.category_id)
+            entry = totals.setdefault(key, [0.0, 0.0, 0.0, 0])
+            entry[0] += _user_share(payer_id, payer_amount, splits, user_id)
+            entry[1] += expense.amount
+            entry[2] += expense.amount if user_id == expense.user_id else 0.0
+            entry[3] += 1
+
+    rollups_table = sa.table('monthly_user_rollups',
+        sa.column('user_id', sa.String),
+        sa.column('month', sa.String),
+        sa.column('transaction_type', sa.String),
+        sa.column('category_id', sa.Integer),
+        sa.column('share_amount', sa.Float),
+        sa.column('total_amount', sa.Float),
+        sa.column('own_amount', sa.Float),
+        sa.column('transaction_count', sa.Integer)
+    )
+
+    rows = [
+        {
+            'user_id': user_id,
+            'month': month,
+            'transaction_type': transaction_type,
+            'category_id': category_id,
+            'share_amount': share,
+            'total_amount': total,
+            'own_amount': own,
+            'transaction_count': count
+        }
+        for (user_id, month, transaction_type, category_id), (share, total, own, count) in totals.items()
+    ]
+    for i in range(0, len(rows), 1000):
+        op.bulk_insert(rollups_table, rows[i:i + 1000])
+
+
+def downgrade():
+    op.drop_index('ix_monthly_user_rollups_user_month', table_name='monthly_user_rollups')
+    op.drop_table('monthly_user_rollups')
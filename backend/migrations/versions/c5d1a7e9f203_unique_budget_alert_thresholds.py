@@ -0,0 +1,32 @@
+"""Make budget alerts unique per budget, period and threshold
+
+Revision ID: c5d1a7e9f203
+Revises: b83e5f0c2a71
+Create Date: 2026-10-19 14:05:12.603914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d1a7e9f203'
+down_revision = 'b83e5f0c2a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first of any alerts concurrent writers queued twice
+    op.execute(
+        'DELETE FROM budget_alerts WHERE id NOT IN ('
+        'SELECT MIN(id) FROM budget_alerts GROUP BY budget_id, period_start, threshold)'
+    )
+    op.drop_index('ix_budget_alerts_budget_period', table_name='budget_alerts')
+    op.create_index('ix_budget_alerts_budget_period_threshold', 'budget_alerts',
+                    ['budget_id', 'period_start', 'threshold'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_budget_alerts_budget_period_threshold', table_name='budget_alerts')
+    op.create_index('ix_budget_alerts_budget_period', 'budget_alerts', ['budget_id', 'period_start'], unique=False)
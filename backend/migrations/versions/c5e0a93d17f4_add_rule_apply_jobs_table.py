@@ -0,0 +1,39 @@
+"""Add rule_apply_jobs table
+
+Revision ID: c5e0a93d17f4
+Revises: b84d1f6e2c07
+Create Date: 2026-10-18 19:26:51.103348
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e0a93d17f4'
+down_revision = 'b84d1f6e2c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rule_apply_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=120), nullable=False),
+        sa.Column('rule_ids', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('updated', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_rule_apply_jobs_user_id', 'rule_apply_jobs', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_rule_apply_jobs_user_id', table_name='rule_apply_jobs')
+    op.drop_table('rule_apply_jobs')
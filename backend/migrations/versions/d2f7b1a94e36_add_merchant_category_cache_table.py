@@ -0,0 +1,35 @@
+"""Add merchant_category_cache table
+
+Revision ID: d2f7b1a94e36
+Revises: c5e0a93d17f4
+Create Date: 2026-10-18 21:04:12.518736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7b1a94e36'
+down_revision = 'c5e0a93d17f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('merchant_category_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=120), nullable=False),
+        sa.Column('merchant', sa.String(length=200), nullable=False),
+        sa.Column('rules_version', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('mapping_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_merchant_category_cache_user_merchant', 'merchant_category_cache', ['user_id', 'merchant'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_merchant_category_cache_user_merchant', table_name='merchant_category_cache')
+    op.drop_table('merchant_category_cache')
@@ -0,0 +1,27 @@
+"""Add data_version column to users table
+
+Revision ID: d58a3b7f1c24
+Revises: c41f8d2e6a90
+Create Date: 2026-10-18 12:40:51.203117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd58a3b7f1c24'
+down_revision = 'c41f8d2e6a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user counter bumped on writes that affect analytics
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,48 @@
+"""Make monthly user rollup keys unique
+
+Revision ID: d8a3f61c9e24
+Revises: c5d1a7e9f203
+Create Date: 2026-10-19 15:41:07.218340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f61c9e24'
+down_revision = 'c5d1a7e9f203'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold rows concurrent writers duplicated into the oldest row of their key
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        'SELECT MIN(id) AS keep_id, user_id, month, transaction_type, COALESCE(category_id, 0) AS category_key, '
+        'SUM(share_amount) AS share_amount, SUM(total_amount) AS total_amount, SUM(own_amount) AS own_amount, '
+        'SUM(transaction_count) AS transaction_count '
+        'FROM monthly_user_rollups GROUP BY user_id, month, transaction_type, COALESCE(category_id, 0) '
+        'HAVING COUNT(*) > 1'
+    )).fetchall()
+    for row in duplicates:
+        bind.execute(sa.text(
+            'UPDATE monthly_user_rollups SET share_amount = :share_amount, total_amount = :total_amount, '
+            'own_amount = :own_amount, transaction_count = :transaction_count WHERE id = :keep_id'
+        ), dict(row._mapping))
+        bind.execute(sa.text(
+            'DELETE FROM monthly_user_rollups WHERE user_id = :user_id AND month = :month '
+            'AND transaction_type = :transaction_type AND COALESCE(category_id, 0) = :category_key AND id != :keep_id'
+        ), dict(row._mapping))
+
+    # NULLs never conflict in a unique index, so uncategorized rows are keyed as category 0
+    op.drop_index('ix_monthly_user_rollups_user_month', table_name='monthly_user_rollups')
+    op.create_index('ix_monthly_user_rollups_user_month', 'monthly_user_rollups',
+                    ['user_id', 'month', 'transaction_type', sa.text('COALESCE(category_id, 0)')], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_monthly_user_rollups_user_month', table_name='monthly_user_rollups')
+    op.create_index('ix_monthly_user_rollups_user_month', 'monthly_user_rollups',
+                    ['user_id', 'month', 'transaction_type', 'category_id'], unique=False)
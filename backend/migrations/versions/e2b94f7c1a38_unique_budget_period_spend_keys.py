@@ -0,0 +1,43 @@
+"""Make budget period spend keys unique
+
+Revision ID: e2b94f7c1a38
+Revises: d8a3f61c9e24
+Create Date: 2026-10-19 17:12:44.903516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b94f7c1a38'
+down_revision = 'd8a3f61c9e24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold rows concurrent writers duplicated into the oldest row of their key
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        'SELECT MIN(id) AS keep_id, budget_id, period_start, SUM(spent) AS spent '
+        'FROM budget_period_spend GROUP BY budget_id, period_start HAVING COUNT(*) > 1'
+    )).fetchall()
+    for row in duplicates:
+        bind.execute(sa.text(
+            'UPDATE budget_period_spend SET spent = :spent WHERE id = :keep_id'
+        ), dict(row._mapping))
+        bind.execute(sa.text(
+            'DELETE FROM budget_period_spend WHERE budget_id = :budget_id AND period_start = :period_start '
+            'AND id != :keep_id'
+        ), dict(row._mapping))
+
+    op.drop_index('ix_budget_period_spend_budget_period', table_name='budget_period_spend')
+    op.create_index('ix_budget_period_spend_budget_period', 'budget_period_spend',
+                    ['budget_id', 'period_start'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_budget_period_spend_budget_period', table_name='budget_period_spend')
+    op.create_index('ix_budget_period_spend_budget_period', 'budget_period_spend',
+                    ['budget_id', 'period_start'], unique=False)
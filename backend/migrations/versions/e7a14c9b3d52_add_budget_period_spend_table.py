@@ -0,0 +1,216 @@
+"""add budget_period_spend table
+
+Revision ID: e7a14c9b3d52
+Revises: d58a3b7f1c24
+Create Date: 2026-10-18 15:41:06.218734
+
+"""
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a14c9b3d52'
+down_revision = 'd58a3b7f1c24'
+branch_labels = None
+depends_on = None
+
+
+# Migrations must keep producing what they did at their revision, so they don't
+# import SplitCalculator. Revisions b7e2c9a41d3f and c41f8d2e6a90 carry the same frozen
+# copy of these helpers on purpose; tests/test_migration_splits.py checks every
+# copy against SplitCalculator.
+def _parse_split_details(split_details):
+    if isinstance(split_details, dict):
+        return split_details
+    if isinstance(split_details, str) and split_details:
+        try:
+            return json.loads(split_details)
+        except ValueError:
+            return {}
+    return {}
+
+
+def _split_amounts(expense, users):
+    """
+    Frozen copy of the split amounts SplitCalculator.compute produced at this revision
+    Returns (payer_id, payer_amount, [(participant_id, amount), ...]); payer_id is
+    None and unknown participants are left out when they are not in `users`.
+    """
+    payer_id = expense.paid_by if expense.paid_by in users else None
+    split_with_ids = expense.split_with.split(',') if expense.split_with else []
+    participants = [user_id.strip() for user_id in split_with_ids if user_id.strip() in users]
+    payer_splits = expense.paid_by in split_with_ids
+    amount = expense.amount
+    details = _parse_split_details(expense.split_details)
+
+    if expense.split_method == 'none' or not expense.split_with:
+        return payer_id, amount, []
+
+    if expense.split_method == 'equal':
+        count = len(participants) + (0 if payer_splits else 1)
+        per_person = amount / count if count > 0 else 0
+        return payer_id, 0 if payer_splits else per_person, [(user_id, per_person) for user_id in participants]
+
+    if expense.split_method in ('percentage', 'custom'):
+        detail_types = ('percentage',) if expense.split_method == 'percentage' else ('amount', 'custom')
+        if isinstance(details, dict) and details.get('type') in detail_types:
+            values = details.get('values', {})
+            if expense.split_method == 'percentage':
+                share = lambda user_id: (amount * float(values.get(user_id, 0))) / 100
+            else:
+                share = lambda user_id: float(values.get(user_id, 0))
+
+            payer_amount = 0 if payer_splits else share(expense.paid_by)
+            splits = [[user_id, share(user_id)] for user_id in participants]
+
+            assigned = payer_amount
+            for split in splits:
+                assigned += split[1]
+            if abs(assigned - amount) > 0.01:
+                difference = amount - assigned
+                if splits:
+                    splits[-1][1] += difference
+                elif payer_amount > 0:
+                    payer_amount += difference
+            return payer_id, payer_amount, [tuple(split) for split in splits]
+
+        payer_value = expense.split_value if expense.split_value is not None else 0
+        if expense.split_method == 'percentage':
+            payer_value = (amount * payer_value) / 100
+        payer_amount = 0 if payer_splits else payer_value
+        per_person = (amount - payer_amount) / len(participants) if participants else 0
+        return payer_id, payer_amount, [(user_id, per_person) for user_id in participants]
+
+    return payer_id, 0, []
+
+
+def _budget_share(expense, users):
+    """The expense creator's share, or None when they have none"""
+    _, payer_amount, splits = _split_amounts(expense, users)
+    user_id = expense.user_id
+    if expense.paid_by == user_id and (not expense.split_with or user_id not in expense.split_with.split(',')):
+        return payer_amount
+    for participant_id, amount in splits:
+        if participant_id == user_id:
+            return amount
+    return None
+
+
+def _period_bounds(period, moment):
+    """Start and inclusive end of the budget period containing moment"""
+    today = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'weekly':
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    if period == 'monthly':
+        start = today.replace(day=1)
+        if today.month == 12:
+            return start, today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1)
+        return start, today.replace(month=today.month + 1, day=1) - timedelta(seconds=1)
+    if period == 'yearly':
+        start = today.replace(month=1, day=1)
+        return start, today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1)
+    return today, today.replace(hour=23, minute=59, second=59)
+
+
+def upgrade():
+    op.create_table('budget_period_spend',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('budget_id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.DateTime(), nullable=False),
+        sa.Column('spent', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_budget_period_spend_budget_period', 'budget_period_spend',
+                    ['budget_id', 'period_start'], unique=False)
+
+    # Backfill counters from the existing budgets, expenses and category splits
+    bind = op.get_bind()
+    users = {row.id: row.name for row in bind.execute(sa.text('SELECT id, name FROM users'))}
+
+    budgets_by_user = {}
+    for row in bind.execute(sa.text(
+        'SELECT id, user_id, category_id, include_subcategories, period FROM budgets'
+    )):
+        budgets_by_user.setdefault(row.user_id, []).append(SimpleNamespace(**row._mapping))
+    if not budgets_by_user:
+        return
+
+    children = {}
+    for row in bind.execute(sa.text('SELECT id, parent_id FROM categories WHERE parent_id IS NOT NULL')):
+        children.setdefault(row.parent_id, []).append(row.id)
+
+    # Budget categories plus direct subcategories where the budget includes them
+    scopes = {
+        budget.id: {budget.category_id} | (set(children.get(budget.category_id, ())) if budget.include_subcategories else set())
+        for budgets in budgets_by_user.values() for budget in budgets
+    }
+
+    category_splits = {}
+    for row in bind.execute(sa.text('SELECT expense_id, category_id, amount FROM category_splits')):
+        category_splits.setdefault(row.expense_id, []).append((row.category_id, row.amount))
+
+    # Typed columns so dates come back as datetimes on every backend
+    expenses_table = sa.table('expenses',
+        sa.column('id', sa.Integer),
+        sa.column('date', sa.DateTime),
+        sa.column('category_id', sa.Integer),
+        sa.column('has_category_splits', sa.Boolean),
+        sa.column('user_id', sa.String),
+        sa.column('amount', sa.Float),
+        sa.column('original_amount', sa.Float),
+        sa.column('currency_code', sa.String),
+        sa.column('paid_by', sa.String),
+        sa.column('split_method', sa.String),
+        sa.column('split_value', sa.Float),
+        sa.column('split_with', sa.String),
+        sa.column('split_details', sa.Text)
+    )
+
+    totals = {}
+    query = sa.select(expenses_table).where(expenses_table.c.user_id.in_(list(budgets_by_user)))
+    for expense in bind.execute(query):
+        share = _budget_share(expense, users)
+        if share is None:
+            continue
+
+        for budget in budgets_by_user[expense.user_id]:
+            start, end = _period_bounds(budget.period, expense.date)
+            if expense.date > end:
+                continue
+
+            category_ids = scopes[budget.id]
+            amount = 0.0
+            if not expense.has_category_splits and expense.category_id in category_ids:
+                amount += share
+            if expense.amount > 0:
+                for category_id, split_amount in category_splits.get(expense.id, ()):
+                    if category_id in category_ids:
+                        amount += split_amount * (share / expense.amount)
+
+            if amount:
+                key = (budget.id, start)
+                totals[key] = totals.get(key, 0.0) + amount
+
+    spend_table = sa.table('budget_period_spend',
+        sa.column('budget_id', sa.Integer),
+        sa.column('period_start', sa.DateTime),
+        sa.column('spent', sa.Float)
+    )
+
+    rows = [
+        {'budget_id': budget_id, 'period_start': period_start, 'spent': spent}
+        for (budget_id, period_start), spent in totals.items()
+    ]
+    for i in range(0, len(rows), 1000):
+        op.bulk_insert(spend_table, rows[i:i + 1000])
+
+
+def downgrade():
+    op.drop_index('ix_budget_period_spend_budget_period', table_name='budget_period_spend')
+    op.drop_table('budget_period_spend')
@@ -0,0 +1,23 @@
+"""Add user_id/parent_id index to categories table
+
+Revision ID: f3b96d2a8e17
+Revises: e7a14c9b3d52
+Create Date: 2026-10-18 16:27:44.903152
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b96d2a8e17'
+down_revision = 'e7a14c9b3d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_categories_user_parent', 'categories', ['user_id', 'parent_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_categories_user_parent', table_name='categories')
@@ -0,0 +1,25 @@
+"""Drop stored "no match" merchant decisions
+
+Revision ID: f6c2d85a0b19
+Revises: e2b94f7c1a38
+Create Date: 2026-10-19 19:03:27.551862
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6c2d85a0b19'
+down_revision = 'e2b94f7c1a38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only matching decisions are cached now; the rows are a cache, so nothing is lost
+    op.execute(sa.text('DELETE FROM merchant_category_cache WHERE mapping_id IS NULL'))
+
+
+def downgrade():
+    pass
@@ -1,5 +1,5 @@
 """Marshmallow schemas for serialization"""
-from marshmallow import Schema, fields, validate, post_load
+from marshmallow import Schema, fields, validate, post_load, pre_dump
 
 
 class UserSchema(Schema):
@@ -35,8 +35,24 @@ class TransactionSchema(Schema):
     account = fields.Nested('AccountSchema', dump_only=True)
     splits = fields.Method('get_splits', dump_only=True)
 
+    @pre_dump(pass_many=True)
+    def prefetch_splits(self, data, many, **kwargs):
+        """Calculate splits for every transaction being dumped in one pass"""
+        from src.utils.split_calculator import SplitCalculator
+
+        objs = data if many else [data]
+        objs = [obj for obj in objs if hasattr(obj, 'calculate_splits')]
+        splits = SplitCalculator.compute_many(objs)
+        for obj in objs:
+            obj._prefetched_splits = splits[obj.id]
+        return data
+
     def get_splits(self, obj):
         """Calculate and return split information"""
+        if hasattr(obj, '_prefetched_splits'):
+            splits = obj._prefetched_splits
+            del obj._prefetched_splits
+            return splits
         return obj.calculate_splits() if hasattr(obj, 'calculate_splits') else None
 
 
@@ -51,6 +67,16 @@ class CategorySchema(Schema):
     # Nested subcategories
     subcategories = fields.Nested('self', many=True, dump_only=True)
 
+    @pre_dump(pass_many=True)
+    def prefetch_subcategories(self, data, many, **kwargs):
+        """Load every nested level of the tree in one query instead of one lazy load per node"""
+        from src.models.category import Category
+        from src.services.category.tree import preload_subcategories
+
+        objs = data if many else [data]
+        preload_subcategories([obj for obj in objs if isinstance(obj, Category)])
+        return data
+
 
 class AccountSchema(Schema):
     """Account serialization schema"""
@@ -95,17 +121,39 @@ class BudgetSchema(Schema):
     remaining = fields.Method('get_remaining', dump_only=True)
     percentage = fields.Method('get_percentage', dump_only=True)
 
+    @pre_dump(pass_many=True)
+    def prefetch_spent(self, data, many, **kwargs):
+        """Evaluate every budget being dumped in one pass per user"""
+        from src.services.budget.evaluator import BudgetEvaluator
+
+        objs = data if many else [data]
+        by_user = {}
+        for obj in objs:
+            if hasattr(obj, 'calculate_spent_amount'):
+                by_user.setdefault(obj.user_id, []).append(obj)
+
+        for user_id, budgets in by_user.items():
+            spent = BudgetEvaluator.evaluate(user_id, budgets)
+            for obj in budgets:
+                obj._prefetched_spent = spent[obj.id]
+        return data
+
+    def _spent(self, obj):
+        if hasattr(obj, '_prefetched_spent'):
+            return obj._prefetched_spent
+        return obj.get_spent()
+
     def get_spent(self, obj):
         """Calculate spent amount"""
-        return obj.get_spent() if hasattr(obj, 'get_spent') else 0
+        return self._spent(obj) if hasattr(obj, 'get_spent') else 0
 
     def get_remaining(self, obj):
         """Calculate remaining amount"""
-        return obj.get_remaining() if hasattr(obj, 'get_remaining') else obj.amount
+        return obj.get_remaining_amount(self._spent(obj)) if hasattr(obj, 'get_remaining') else obj.amount
 
     def get_percentage(self, obj):
         """Calculate percentage used"""
-        return obj.get_percentage() if hasattr(obj, 'get_percentage') else 0
+        return obj.get_progress_percentage(self._spent(obj)) if hasattr(obj, 'get_percentage') else 0
 
 
 class GroupSchema(Schema):
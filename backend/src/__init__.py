@@ -44,6 +44,10 @@ def create_app(config_name=None):
     # Initialize Flask extensions
     init_extensions(app)
 
+    # Request-scoped memos of versioned data never outlive their request
+    from src.models.data_version import drop_request_memos
+    app.teardown_request(drop_request_memos)
+
     # Configure JWT for API authentication
     app.config['JWT_SECRET_KEY'] = app.config.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 86400  # 24 hours
@@ -333,6 +337,30 @@ def setup_scheduled_tasks(app):
             except Exception as e:
                 app.logger.error(f"Budget rollover failed: {e}")
 
+    @scheduler.task('interval', id='send_budget_alerts', minutes=5)
+    def scheduled_budget_alerts():
+        """Every 5 minutes, send budget alerts still queued (e.g. after a restart)"""
+        with app.app_context():
+            try:
+                from src.services.notification.service import NotificationService
+                sent = NotificationService().send_pending_budget_alerts()
+                if sent:
+                    app.logger.info(f"Sent {sent} budget alerts")
+            except Exception as e:
+                app.logger.error(f"Sending budget alerts failed: {e}")
+
+    @scheduler.task('interval', id='run_rule_apply_jobs', seconds=app.config.get('RULE_APPLY_POLL_SECONDS', 30))
+    def scheduled_rule_apply_jobs():
+        """Periodically run bulk rule application jobs still pending (e.g. after a restart)"""
+        with app.app_context():
+            try:
+                from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
+                ran = BulkRuleApplyService.run_pending_jobs()
+                if ran:
+                    app.logger.info(f"Ran {ran} bulk rule application jobs")
+            except Exception as e:
+                app.logger.error(f"Running bulk rule application jobs failed: {e}")
+
     @scheduler.task('cron', id='monthly_reports', day=1, hour=1, minute=0)
     def scheduled_monthly_reports():
         """Run on the 1st day of each month at 1:00 AM"""
@@ -359,6 +387,17 @@ def setup_scheduled_tasks(app):
             except Exception as e:
                 app.logger.error(f"SimpleFin sync failed: {e}")
 
+    @scheduler.task('cron', id='sync_investment_accounts', minute=15)
+    def scheduled_investment_account_sync():
+        """Run every hour at :15 to push portfolio values to linked accounts"""
+        with app.app_context():
+            try:
+                from src.utils.helpers import sync_investments_with_accounts
+                updated_count = sync_investments_with_accounts()
+                app.logger.info(f"Investment account sync completed: {updated_count} accounts updated")
+            except Exception as e:
+                app.logger.error(f"Investment account sync failed: {e}")
+
     @scheduler.task('cron', id='update_exchange_rates', hour=2, minute=0)
     def scheduled_exchange_rate_update():
         """Run every day at 2:00 AM to update currency exchange rates"""
@@ -187,6 +187,174 @@ def register_commands(app):
         click.echo('\n🌐 Login at: http://localhost/')
         click.echo('   (Make sure Docker containers are running)\n')
 
+    @app.cli.command('rebuild-participants')
+    @click.option('--batch-size', default=1000, help='Expenses processed per batch')
+    @with_appcontext
+    def rebuild_participants_command(batch_size):
+        """Rebuild the expense_participants table from split_with / split_details"""
+        from src.models.transaction import Expense, ExpenseParticipant
+        from src.utils.split_calculator import SplitCalculator
+
+        ExpenseParticipant.query.delete()
+
+        query = Expense.query.filter(Expense.split_with.isnot(None), Expense.split_with != '').order_by(Expense.id)
+        last_id = 0
+        rebuilt = 0
+
+        while True:
+            expenses = query.filter(Expense.id > last_id).limit(batch_size).all()
+            if not expenses:
+                break
+
+            expense_splits = SplitCalculator.compute_many(expenses)
+            for expense in expenses:
+                shares = ExpenseParticipant.build_shares(expense, expense_splits[expense.id])
+                for user_id, share_amount in shares.items():
+                    db.session.add(ExpenseParticipant(expense_id=expense.id, user_id=user_id, share_amount=share_amount))
+
+            db.session.commit()
+            last_id = expenses[-1].id
+            rebuilt += len(expenses)
+
+        click.echo(f'✅ Rebuilt participants for {rebuilt} split transactions')
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--batch-size', default=1000, help='Expenses processed per batch')
+    @with_appcontext
+    def rebuild_rollups_command(batch_size):
+        """Rebuild the monthly_user_rollups table from all expenses"""
+        from src.models.transaction import Expense
+        from src.models.rollup import MonthlyUserRollup
+        from src.utils.split_calculator import SplitCalculator
+
+        MonthlyUserRollup.query.delete()
+
+        query = Expense.query.order_by(Expense.id)
+        users = {}
+        totals = {}
+        last_id = 0
+        processed = 0
+
+        while True:
+            expenses = query.filter(Expense.id > last_id).limit(batch_size).all()
+            if not expenses:
+                break
+
+            expense_splits = SplitCalculator.compute_many(expenses, users=users)
+            for expense in expenses:
+                MonthlyUserRollup.accumulate(totals, expense, expense_splits[expense.id])
+
+            last_id = expenses[-1].id
+            processed += len(expenses)
+            db.session.expunge_all()
+
+        MonthlyUserRollup.insert_totals(totals)
+        db.session.commit()
+
+        click.echo(f'✅ Rebuilt {len(totals)} rollup rows from {processed} transactions')
+
+    @app.cli.command('process-rollovers')
+    @click.option('--workers', default=None, type=int, help='Worker processes (defaults to BUDGET_ROLLOVER_WORKERS)')
+    @click.option('--batch-size', default=None, type=int, help='Users processed per batch')
+    @with_appcontext
+    def process_rollovers_command(workers, batch_size):
+        """Roll unused budget amounts into the next period for every due budget"""
+        from src.extensions import scheduler
+        from src.services.budget.rollover_service import BudgetRolloverService
+
+        if workers is None:
+            workers = app.config.get('BUDGET_ROLLOVER_WORKERS', 1)
+        # Workers are forked from this process, which must not run scheduled jobs
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+
+        result = BudgetRolloverService.process_all_rollovers(workers=workers, batch_size=batch_size)
+        click.echo(
+            f'✅ Rolled over {result["processed"]} of {result["total"]} budgets in {result["elapsed"]:.2f}s '
+            f'({result["budgets_per_second"]:.0f} budgets/sec), {result["errors"]} failed batches'
+        )
+
+    @app.cli.command('apply-rules')
+    @click.argument('email')
+    @click.option('--workers', default=None, type=int, help='Worker processes (defaults to RULE_APPLY_WORKERS)')
+    @with_appcontext
+    def apply_rules_command(email, workers):
+        """Apply a user's transaction rules to all of their existing transactions"""
+        from src.extensions import scheduler
+        from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
+
+        if workers is None:
+            workers = app.config.get('RULE_APPLY_WORKERS', 1)
+        # Workers are forked from this process, which must not run scheduled jobs
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+
+        result = BulkRuleApplyService.run(email, workers=workers)
+        click.echo(
+            f'✅ Updated {result["updated"]} of {result["processed"]} transactions in {result["elapsed"]:.2f}s'
+        )
+
+    @app.cli.command('reconcile-budget-spend')
+    @click.option('--fix', is_flag=True, help='Rewrite drifted counters from raw data')
+    @click.option('--tolerance', default=0.005, help='Largest difference not reported as drift')
+    @with_appcontext
+    def reconcile_budget_spend_command(fix, tolerance):
+        """Recompute budget_period_spend counters from raw data and report drift"""
+        from src.models.budget import Budget
+        from src.models.budget_spend import BudgetPeriodSpend
+
+        user_ids = [user_id for user_id, in db.session.query(Budget.user_id).distinct()]
+        drifted = 0
+        checked = 0
+
+        for user_id in user_ids:
+            expected = BudgetPeriodSpend.compute(db.session, {user_id})
+            stored = {
+                (budget_id, period_start): spent
+                for budget_id, period_start, spent in db.session.query(
+                    BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start, BudgetPeriodSpend.spent
+                ).join(
+                    Budget, Budget.id == BudgetPeriodSpend.budget_id
+                ).filter(
+                    Budget.user_id == user_id
+                )
+            }
+
+            drifted_budgets = set()
+            for key in sorted(set(expected) | set(stored)):
+                checked += 1
+                difference = stored.get(key, 0.0) - expected.get(key, 0.0)
+                if abs(difference) > tolerance:
+                    budget_id, period_start = key
+                    drifted_budgets.add(budget_id)
+                    click.echo(
+                        f'Budget {budget_id} ({user_id}) period {period_start:%Y-%m-%d}: '
+                        f'stored {stored.get(key, 0.0):.2f}, expected {expected.get(key, 0.0):.2f} '
+                        f'(drift {difference:+.2f})'
+                    )
+
+            drifted += len(drifted_budgets)
+            if fix and drifted_budgets:
+                BudgetPeriodSpend.rebuild(db.session, {user_id}, budget_ids=drifted_budgets)
+                db.session.commit()
+
+        # Counters left behind by budgets that no longer exist
+        orphans = db.session.query(BudgetPeriodSpend.budget_id).filter(
+            ~BudgetPeriodSpend.budget_id.in_(db.session.query(Budget.id))
+        ).distinct().all()
+        if orphans:
+            click.echo(f'{len(orphans)} deleted budgets still have counters')
+            if fix:
+                BudgetPeriodSpend.delete_for_budgets(db.session, [budget_id for budget_id, in orphans])
+                db.session.commit()
+
+        if not drifted and not orphans:
+            click.echo(f'✅ {checked} budget periods match raw data')
+        elif fix:
+            click.echo(f'✅ Rebuilt {drifted} drifted budgets')
+        else:
+            click.echo(f'❌ {drifted} budgets drifted; run with --fix to rebuild them')
+
 
 def create_default_currencies():
     """Create default currencies in the database"""
@@ -53,6 +53,18 @@ class Config:
     DEMO_TIMEOUT_MINUTES = int(os.getenv('DEMO_TIMEOUT_MINUTES', 10))
     MAX_CONCURRENT_DEMO_SESSIONS = int(os.getenv('MAX_CONCURRENT_DEMO_SESSIONS', 10))
     
+    # Analytics result cache (entries across all users)
+    ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', 512))
+
+    # Worker processes for the process-rollovers command (the nightly job always runs serially)
+    BUDGET_ROLLOVER_WORKERS = int(os.getenv('BUDGET_ROLLOVER_WORKERS', 1))
+
+    # Worker processes for the apply-rules command (background jobs always run serially)
+    RULE_APPLY_WORKERS = int(os.getenv('RULE_APPLY_WORKERS', 1))
+
+    # Seconds between pickups of pending bulk rule application jobs
+    RULE_APPLY_POLL_SECONDS = int(os.getenv('RULE_APPLY_POLL_SECONDS', 30))
+
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
 
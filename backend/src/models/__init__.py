@@ -8,12 +8,19 @@ from src.models.currency import Currency
 from src.models.user import User, UserApiSettings
 from src.models.category import Category, CategoryMapping, Tag
 from src.models.account import Account, SimpleFin
-from src.models.transaction import Expense, CategorySplit
+from src.models.transaction import Expense, CategorySplit, ExpenseParticipant
 from src.models.transaction_rule import TransactionRule
+from src.models.rule_apply_job import RuleApplyJob
+from src.models.merchant_cache import MerchantCategoryCache
 from src.models.group import Group, Settlement
 from src.models.recurring import RecurringExpense, IgnoredRecurringPattern
 from src.models.budget import Budget
+from src.models.budget_spend import BudgetPeriodSpend
+from src.models.budget_alert import BudgetAlert
 from src.models.investment import Portfolio, Investment, InvestmentTransaction
+from src.models.rollup import MonthlyUserRollup
+from src.models.data_version import get_data_version, bump_data_version
+from src.models.rules_version import get_rules_version, bump_rules_version
 
 __all__ = [
     'group_users',
@@ -28,13 +35,23 @@ __all__ = [
     'SimpleFin',
     'Expense',
     'CategorySplit',
+    'ExpenseParticipant',
     'TransactionRule',
+    'RuleApplyJob',
+    'MerchantCategoryCache',
     'Group',
     'Settlement',
     'RecurringExpense',
     'IgnoredRecurringPattern',
     'Budget',
+    'BudgetPeriodSpend',
+    'BudgetAlert',
     'Portfolio',
     'Investment',
     'InvestmentTransaction',
+    'MonthlyUserRollup',
+    'get_data_version',
+    'bump_data_version',
+    'get_rules_version',
+    'bump_rules_version',
 ]
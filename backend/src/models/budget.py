@@ -4,7 +4,32 @@ Budget model
 
 from datetime import datetime, timedelta
 from src.extensions import db
-from sqlalchemy import or_
+
+
+def period_bounds(period, moment):
+    """Start and inclusive end (23:59:59 of the last day) of the budget period containing moment"""
+    today = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if period == 'weekly':
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        return start_of_week, end_of_week
+
+    elif period == 'monthly':
+        start_of_month = today.replace(day=1)
+        if today.month == 12:
+            end_of_month = today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1)
+        else:
+            end_of_month = today.replace(month=today.month + 1, day=1) - timedelta(seconds=1)
+        return start_of_month, end_of_month
+
+    elif period == 'yearly':
+        start_of_year = today.replace(month=1, day=1)
+        end_of_year = today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1)
+        return start_of_year, end_of_year
+
+    return today, today.replace(hour=23, minute=59, second=59)
+
 
 class Budget(db.Model):
     __tablename__ = 'budgets'
@@ -30,112 +55,14 @@ class Budget(db.Model):
     
     def get_current_period_dates(self):
         """Get start and end dates for the current budget period"""
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        if self.period == 'weekly':
-            start_of_week = today - timedelta(days=today.weekday())
-            end_of_week = start_of_week + timedelta(days=6, hours=23, minutes=59, seconds=59)
-            return start_of_week, end_of_week
-            
-        elif self.period == 'monthly':
-            start_of_month = today.replace(day=1)
-            if today.month == 12:
-                end_of_month = today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1)
-            else:
-                end_of_month = today.replace(month=today.month + 1, day=1) - timedelta(seconds=1)
-            return start_of_month, end_of_month
-            
-        elif self.period == 'yearly':
-            start_of_year = today.replace(month=1, day=1)
-            end_of_year = today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1)
-            return start_of_year, end_of_year
-            
-        return today, today.replace(hour=23, minute=59, second=59)
+        return period_bounds(self.period, datetime.utcnow())
     
     def calculate_spent_amount(self, year=None, month=None):
         """Calculate how much has been spent in this budget's category during the specified or current period"""
-        from src.models.transaction import Expense, CategorySplit
-        from src.models.category import Category
-
-        # If year and month are provided, calculate dates for that specific month
-        if year and month:
-            from datetime import datetime
-            from calendar import monthrange
+        from src.services.budget.evaluator import BudgetEvaluator
 
-            start_date = datetime(year, month, 1)
-            last_day = monthrange(year, month)[1]
-            end_date = datetime(year, month, last_day, 23, 59, 59)
-        else:
-            start_date, end_date = self.get_current_period_dates()
-        
-        if self.include_subcategories:
-            subcategories = Category.query.filter_by(parent_id=self.category_id).all()
-            subcategory_ids = [subcat.id for subcat in subcategories]
-            
-            category_filter = or_(
-                Expense.category_id == self.category_id,
-                Expense.category_id.in_(subcategory_ids) if subcategory_ids else False
-            )
-        else:
-            category_filter = (Expense.category_id == self.category_id)
-        
-        expenses = Expense.query.filter(
-            Expense.user_id == self.user_id,
-            Expense.date >= start_date,
-            Expense.date <= end_date,
-            category_filter
-        ).all()
-        
-        total_spent = 0.0
-        
-        for expense in expenses:
-            if expense.has_category_splits:
-                continue
-                
-            splits = expense.calculate_splits()
-            
-            if expense.paid_by == self.user_id and (not expense.split_with or self.user_id not in expense.split_with.split(',')):
-                total_spent += splits['payer']['amount']
-            else:
-                for split in splits['splits']:
-                    if split['email'] == self.user_id:
-                        total_spent += split['amount']
-                        break
-        
-        if self.include_subcategories:
-            category_ids = [self.category_id] + subcategory_ids
-        else:
-            category_ids = [self.category_id]
-        
-        category_splits = CategorySplit.query.join(
-            Expense, CategorySplit.expense_id == Expense.id
-        ).filter(
-            Expense.user_id == self.user_id,
-            Expense.date >= start_date,
-            Expense.date <= end_date,
-            CategorySplit.category_id.in_(category_ids)
-        ).all()
-        
-        for cat_split in category_splits:
-            expense = Expense.query.get(cat_split.expense_id)
-            if not expense:
-                continue
-                
-            splits = expense.calculate_splits()
-            
-            if expense.paid_by == self.user_id and (not expense.split_with or self.user_id not in expense.split_with.split(',')):
-                if expense.amount > 0:
-                    user_ratio = splits['payer']['amount'] / expense.amount
-                    total_spent += cat_split.amount * user_ratio
-            else:
-                for split in splits['splits']:
-                    if split['email'] == self.user_id:
-                        if expense.amount > 0:
-                            user_ratio = split['amount'] / expense.amount
-                            total_spent += cat_split.amount * user_ratio
-                        break
-        
-        return total_spent
+        period = (year, month) if year and month else None
+        return BudgetEvaluator.evaluate(self.user_id, [self], period)[self.id]
     
     def get_spent(self):
         """Alias for calculate_spent_amount() for schema compatibility"""
@@ -149,26 +76,29 @@ class Budget(db.Model):
         """Alias for get_progress_percentage() for schema compatibility"""
         return self.get_progress_percentage()
 
-    def get_remaining_amount(self):
-        """Calculate remaining budget amount including rollover"""
+    def get_remaining_amount(self, spent=None):
+        """Calculate remaining budget amount including rollover (spent may be precomputed)"""
+        if spent is None:
+            spent = self.calculate_spent_amount()
         total_budget = self.amount + (self.rollover_amount if self.rollover else 0)
-        return total_budget - self.calculate_spent_amount()
+        return total_budget - spent
 
     def get_total_budget(self):
         """Get total budget including rollover amount"""
         return self.amount + (self.rollover_amount if self.rollover else 0)
 
-    def get_progress_percentage(self):
-        spent = self.calculate_spent_amount()
+    def get_progress_percentage(self, spent=None):
+        if spent is None:
+            spent = self.calculate_spent_amount()
         total_budget = self.get_total_budget()
         if total_budget <= 0:
             return 100
         percentage = (spent / total_budget) * 100
         return min(percentage, 100)
 
-    def get_status(self):
+    def get_status(self, spent=None):
         """Return the budget status: 'under', 'approaching', 'over'"""
-        percentage = self.get_progress_percentage()
+        percentage = self.get_progress_percentage(spent)
         if percentage >= 100:
             return 'over'
         elif percentage >= 80:
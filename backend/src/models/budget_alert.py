@@ -0,0 +1,147 @@
+"""
+Budget alert model
+Threshold crossings queued by expense writes, one row per budget, period and threshold
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.extensions import db
+from src.models.budget import Budget, period_bounds
+from src.utils.upsert import conflict_insert
+
+
+class BudgetAlert(db.Model):
+    """
+    Outbox of budget threshold alerts
+    Rows are written in the same transaction as the expense that pushed the
+    budget over a threshold, so rolled back writes never alert. A unique index
+    on (budget, period, threshold) makes the database queue each crossing once,
+    even when concurrent writes cross it together.
+    """
+    __tablename__ = 'budget_alerts'
+    id = db.Column(db.Integer, primary_key=True)
+    budget_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.String(120), nullable=False)
+    period_start = db.Column(db.DateTime, nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)  # percentage of the total budget
+    spent = db.Column(db.Float, nullable=False)
+    total_budget = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'failed', 'skipped'
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # Failed deliveries so far
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)  # When a sender took the row ('sending')
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_budget_alerts_budget_period_threshold', 'budget_id', 'period_start', 'threshold', unique=True),
+        db.Index('ix_budget_alerts_status', 'status'),
+    )
+
+    # Percentages of the total budget that trigger an alert
+    THRESHOLDS = (80, 100)
+
+    # Failed deliveries before an alert is given up on ('failed')
+    MAX_ATTEMPTS = 5
+
+    # Rows left 'sending' this long (the sender died) are sent again
+    SENDING_TIMEOUT = timedelta(minutes=15)
+
+    # Budget columns detect() reads
+    ALERT_COLUMNS = (Budget.id, Budget.user_id, Budget.period, Budget.amount,
+                     Budget.rollover, Budget.rollover_amount, Budget.active)
+
+    def __repr__(self):
+        return f'<BudgetAlert {self.budget_id} {self.period_start} {self.threshold}%>'
+
+    @classmethod
+    def queued(cls, session, budget_ids, period_starts):
+        """{(budget_id, period_start, threshold)} of the alerts already queued"""
+        return set(session.query(cls.budget_id, cls.period_start, cls.threshold).filter(
+            cls.budget_id.in_(budget_ids),
+            cls.period_start.in_(period_starts)
+        ))
+
+    @classmethod
+    def detect(cls, session, totals, now=None, budgets=()):
+        """
+        Queue alerts for current budget periods that spend deltas pushed past a threshold
+        `totals` maps (budget_id, period_start) to the spend delta just applied;
+        only keys that grew are checked. `budgets` may hold rows (see ALERT_COLUMNS)
+        the caller already loaded. Returns the number of alerts queued (rows a
+        concurrent writer inserted first are skipped by the database).
+        """
+        from src.models.budget_spend import BudgetPeriodSpend
+
+        keys = {key for key, delta in totals.items() if delta > 1e-9}
+        if not keys:
+            return 0
+
+        now = now or datetime.utcnow()
+        budget_ids = {budget_id for budget_id, _ in keys}
+        budgets = [budget for budget in budgets if budget.id in budget_ids]
+        missing = budget_ids - {budget.id for budget in budgets}
+        if missing:
+            budgets += session.query(*cls.ALERT_COLUMNS).filter(Budget.id.in_(missing)).all()
+
+        current = {}
+        for budget in budgets:
+            key = (budget.id, period_bounds(budget.period, now)[0])
+            if budget.active is not False and key in keys:
+                current[key] = budget
+        if not current:
+            return 0
+
+        budget_ids = {budget_id for budget_id, _ in current}
+        period_starts = {period_start for _, period_start in current}
+
+        spent = {
+            (budget_id, period_start): total
+            for budget_id, period_start, total in session.query(
+                BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start, BudgetPeriodSpend.spent
+            ).filter(
+                BudgetPeriodSpend.budget_id.in_(budget_ids),
+                BudgetPeriodSpend.period_start.in_(period_starts)
+            )
+        }
+
+        queued = cls.queued(session, budget_ids, period_starts)
+
+        rows = []
+        for key, budget in current.items():
+            total_budget = budget.amount + ((budget.rollover_amount or 0) if budget.rollover else 0)
+            budget_spent = spent.get(key, 0.0)
+            # Same rule as Budget.get_progress_percentage()
+            percentage = budget_spent / total_budget * 100 if total_budget > 0 else 100
+
+            for threshold in cls.THRESHOLDS:
+                if percentage >= threshold and (*key, threshold) not in queued:
+                    rows.append({
+                        'budget_id': budget.id,
+                        'user_id': budget.user_id,
+                        'period_start': key[1],
+                        'threshold': threshold,
+                        'spent': budget_spent,
+                        'total_budget': total_budget,
+                        'status': 'pending',
+                        'created_at': now
+                    })
+
+        if rows:
+            session.execute(conflict_insert(session, cls.__table__).on_conflict_do_nothing(
+                index_elements=['budget_id', 'period_start', 'threshold']
+            ), rows)
+            session.info['budget_alerts_queued'] = True
+        return len(rows)
+
+
+@event.listens_for(db.session, 'after_commit')
+def dispatch_queued_budget_alerts(session):
+    """Hand alerts queued by the committed transaction to the notification service"""
+    if session.info.pop('budget_alerts_queued', False):
+        from src.services.notification.service import schedule_budget_alert_delivery
+        schedule_budget_alert_delivery()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def forget_queued_budget_alerts(session, previous_transaction):
+    session.info.pop('budget_alerts_queued', None)
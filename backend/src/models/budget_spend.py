@@ -0,0 +1,447 @@
+"""
+Budget period spend model
+Running spend per budget and budget period, kept in step with every Expense and CategorySplit write
+"""
+
+from types import SimpleNamespace
+from sqlalchemy import event, inspect, or_
+from src.extensions import db
+from src.models.budget import Budget, period_bounds
+from src.models.budget_alert import BudgetAlert
+from src.models.category import Category
+from src.models.transaction import Expense, CategorySplit
+from src.utils.upsert import conflict_insert
+
+
+class BudgetPeriodSpend(db.Model):
+    """
+    One row per budget and budget period (keyed by the period's start)
+    Holds exactly what BudgetEvaluator attributes to the budget for that
+    period; writers add to it with an upsert on the unique key.
+    """
+    __tablename__ = 'budget_period_spend'
+    id = db.Column(db.Integer, primary_key=True)
+    budget_id = db.Column(db.Integer, nullable=False)
+    period_start = db.Column(db.DateTime, nullable=False)
+    spent = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index('ix_budget_period_spend_budget_period', 'budget_id', 'period_start', unique=True),
+    )
+
+    # Expense columns spend attribution needs (SplitCalculator inputs plus budget matching)
+    EXPENSE_COLUMNS = (
+        Expense.id, Expense.user_id, Expense.date, Expense.category_id, Expense.has_category_splits,
+        Expense.amount, Expense.original_amount, Expense.currency_code, Expense.paid_by,
+        Expense.split_method, Expense.split_value, Expense.split_with, Expense.split_details
+    )
+
+    # Budget columns spend attribution and alert detection read
+    BUDGET_COLUMNS = (Budget.id, Budget.user_id, Budget.category_id, Budget.include_subcategories,
+                      Budget.period, Budget.amount, Budget.rollover, Budget.rollover_amount, Budget.active)
+
+    def __repr__(self):
+        return f'<BudgetPeriodSpend {self.budget_id} {self.period_start}>'
+
+    @staticmethod
+    def budget_scopes(budgets, children):
+        """{budget_id: {category_id, ...}} with direct subcategories where the budget includes them"""
+        return {
+            budget.id: {budget.category_id} | (set(children.get(budget.category_id, ())) if budget.include_subcategories else set())
+            for budget in budgets
+        }
+
+    @classmethod
+    def accumulate(cls, totals, budgets, scopes, expense, splits, category_splits=(), sign=1):
+        """
+        Add (or with sign=-1 remove) an expense's spend to `totals`
+        `budgets` are the budgets of the expense's creator, `category_splits` its
+        (category_id, amount) pairs; `totals` maps (budget_id, period_start) to spent
+        """
+        from src.services.budget.evaluator import BudgetEvaluator
+
+        share = BudgetEvaluator.user_share(expense, splits, expense.user_id)
+        if share is None:
+            return totals
+
+        for budget in budgets:
+            start, end = period_bounds(budget.period, expense.date)
+            if expense.date > end:
+                continue
+
+            category_ids = scopes[budget.id]
+            amount = 0.0
+            if not expense.has_category_splits and expense.category_id in category_ids:
+                amount += share
+            if expense.amount > 0:
+                for category_id, split_amount in category_splits:
+                    if category_id in category_ids:
+                        amount += split_amount * (share / expense.amount)
+
+            if amount:
+                key = (budget.id, start)
+                totals[key] = totals.get(key, 0.0) + sign * amount
+        return totals
+
+    @classmethod
+    def load_budgets(cls, session, user_ids):
+        """
+        Budgets of user_ids with one query, returns (budgets_by_user, scopes)
+        Subcategories come from the users' cached category trees.
+        """
+        from src.models.data_version import request_data_version
+        from src.services.category.tree import get_category_tree
+
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}, {}
+
+        budgets_by_user = {}
+        for budget in session.query(*cls.BUDGET_COLUMNS).filter(Budget.user_id.in_(user_ids)):
+            budgets_by_user.setdefault(budget.user_id, []).append(budget)
+
+        children = {}
+        for user_id, budgets in budgets_by_user.items():
+            parent_ids = {budget.category_id for budget in budgets if budget.include_subcategories}
+            if parent_ids:
+                tree = get_category_tree(user_id, version=request_data_version(user_id, flush=False))
+                for category_id in parent_ids:
+                    children[category_id] = tree.children(category_id)
+
+        budgets = [budget for user_budgets in budgets_by_user.values() for budget in user_budgets]
+        return budgets_by_user, cls.budget_scopes(budgets, children)
+
+    @classmethod
+    def changes(cls, budgets_by_user, scopes, removed, added, users=None):
+        """
+        Spend deltas for expenses leaving (`removed`) and entering (`added`) budgets
+        Works from attribute values alone, so only for expenses without category
+        splits; budgets come from load_budgets(). `users` as for SplitCalculator.compute().
+        """
+        from src.utils.split_calculator import SplitCalculator
+
+        removed = [expense for expense in removed if expense.user_id in budgets_by_user]
+        added = [expense for expense in added if expense.user_id in budgets_by_user]
+        if users is None:
+            users = SplitCalculator.load_users(SplitCalculator.referenced_user_ids(removed + added))
+
+        totals = {}
+        for sign, expenses in ((-1, removed), (1, added)):
+            for expense in expenses:
+                cls.accumulate(
+                    totals, budgets_by_user[expense.user_id], scopes, expense,
+                    SplitCalculator.compute(expense, users), sign=sign
+                )
+        return totals
+
+    @classmethod
+    def compute(cls, session, user_ids, expense_ids=None, budget_ids=None):
+        """
+        Spend totals from the database for the budgets of user_ids (or only budget_ids),
+        over all of their expenses or only expense_ids
+        """
+        from src.utils.split_calculator import SplitCalculator
+
+        user_ids = set(user_ids)
+        if not user_ids or expense_ids is not None and not expense_ids:
+            return {}
+
+        budgets = session.query(
+            Budget.id, Budget.user_id, Budget.category_id, Budget.include_subcategories, Budget.period
+        ).filter(Budget.user_id.in_(user_ids))
+        if budget_ids is not None:
+            budgets = budgets.filter(Budget.id.in_(budget_ids))
+        budgets = budgets.all()
+        if not budgets:
+            return {}
+
+        children = {}
+        parent_ids = {budget.category_id for budget in budgets if budget.include_subcategories}
+        if parent_ids:
+            for category_id, parent_id in session.query(Category.id, Category.parent_id).filter(
+                Category.parent_id.in_(parent_ids)
+            ):
+                children.setdefault(parent_id, []).append(category_id)
+
+        scopes = cls.budget_scopes(budgets, children)
+        category_ids = set().union(*scopes.values())
+        budgets_by_user = {}
+        for budget in budgets:
+            budgets_by_user.setdefault(budget.user_id, []).append(budget)
+
+        # Category splits in any budgeted category, then the expenses that can contribute
+        category_splits = session.query(
+            CategorySplit.expense_id, CategorySplit.category_id, CategorySplit.amount
+        ).join(Expense, CategorySplit.expense_id == Expense.id).filter(
+            Expense.user_id.in_(budgets_by_user),
+            CategorySplit.category_id.in_(category_ids)
+        )
+        if expense_ids is not None:
+            category_splits = category_splits.filter(Expense.id.in_(expense_ids))
+
+        splits_by_expense = {}
+        for expense_id, category_id, amount in category_splits:
+            splits_by_expense.setdefault(expense_id, []).append((category_id, amount))
+
+        expenses = session.query(*cls.EXPENSE_COLUMNS).filter(Expense.user_id.in_(budgets_by_user))
+        if expense_ids is not None:
+            expenses = expenses.filter(Expense.id.in_(expense_ids))
+        else:
+            expenses = expenses.filter(or_(
+                Expense.category_id.in_(category_ids),
+                Expense.id.in_(splits_by_expense) if splits_by_expense else False
+            ))
+        expenses = expenses.all()
+
+        totals = {}
+        expense_splits = SplitCalculator.compute_many(expenses)
+        for expense in expenses:
+            cls.accumulate(
+                totals, budgets_by_user[expense.user_id], scopes, expense,
+                expense_splits[expense.id], splits_by_expense.get(expense.id, ())
+            )
+        return totals
+
+    @classmethod
+    def apply(cls, session, totals):
+        """Apply accumulated deltas with one upsert, incrementing in SQL so concurrent writers don't lose updates"""
+        rows = [
+            {'budget_id': budget_id, 'period_start': period_start, 'spent': delta}
+            for (budget_id, period_start), delta in totals.items()
+            if abs(delta) >= 1e-9
+        ]
+        if not rows:
+            return
+
+        table = cls.__table__
+        insert = conflict_insert(session, table)
+        session.execute(insert.on_conflict_do_update(
+            index_elements=['budget_id', 'period_start'],
+            set_={'spent': table.c.spent + insert.excluded.spent}
+        ), rows)
+
+    @classmethod
+    def insert_totals(cls, session, totals):
+        """Insert accumulated totals as new rows"""
+        rows = [
+            {'budget_id': budget_id, 'period_start': period_start, 'spent': spent}
+            for (budget_id, period_start), spent in totals.items()
+        ]
+        if rows:
+            session.execute(cls.__table__.insert(), rows)
+
+    @classmethod
+    def delete_for_budgets(cls, session, budget_ids):
+        budget_ids = set(budget_ids)
+        if budget_ids:
+            session.execute(cls.__table__.delete().where(cls.__table__.c.budget_id.in_(budget_ids)))
+
+    @classmethod
+    def rebuild(cls, session, user_ids, budget_ids=None):
+        """Recompute the counters of the given budgets (or every budget of user_ids) from raw data"""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+
+        budgets = session.query(Budget.id).filter(Budget.user_id.in_(user_ids))
+        if budget_ids is not None:
+            budgets = budgets.filter(Budget.id.in_(budget_ids))
+        cls.delete_for_budgets(session, [budget_id for budget_id, in budgets])
+        cls.insert_totals(session, cls.compute(session, user_ids, budget_ids=budget_ids))
+
+    @classmethod
+    def rebuild_for_users(cls, user_ids):
+        """
+        Recompute every budget counter of the given users
+        Used after bulk query updates that bypass the flush hooks
+        """
+        cls.rebuild(db.session, user_ids)
+
+    @classmethod
+    def delete_for_users(cls, user_ids):
+        """Drop the counters of every budget of the given users (before bulk budget deletes)"""
+        cls.delete_for_budgets(db.session, [
+            budget_id for budget_id, in db.session.query(Budget.id).filter(Budget.user_id.in_(set(user_ids)))
+        ])
+
+    @classmethod
+    def read(cls, budget_periods):
+        """Stored spend for (budget_id, period_start) pairs, returns {(budget_id, period_start): spent}"""
+        if not budget_periods:
+            return {}
+
+        rows = db.session.query(cls.budget_id, cls.period_start, cls.spent).filter(
+            cls.budget_id.in_({budget_id for budget_id, _ in budget_periods}),
+            cls.period_start.in_({period_start for _, period_start in budget_periods})
+        )
+        return {(budget_id, period_start): spent for budget_id, period_start, spent in rows}
+
+
+# Attributes that move an expense between budgets or periods or change its share
+SPEND_FIELDS = ('user_id', 'date', 'category_id', 'has_category_splits', 'amount', 'original_amount',
+                'currency_code', 'paid_by', 'split_method', 'split_value', 'split_with', 'split_details')
+
+# Budget attributes that change which spend a budget collects
+BUDGET_FIELDS = ('user_id', 'category_id', 'include_subcategories', 'period')
+
+
+def _changed(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _history_values(obj, field):
+    history = inspect(obj).attrs[field].history
+    return set(history.sum()) | {getattr(obj, field)}
+
+
+def _stored_values(obj):
+    """An expense's spend fields as loaded from the database, or None when a changed one was never loaded"""
+    state = inspect(obj)
+    values = {'id': obj.id}
+    for field in SPEND_FIELDS:
+        history = state.attrs[field].history
+        if history.added and not history.deleted:
+            return None
+        values[field] = history.deleted[0] if history.deleted else getattr(obj, field)
+    return SimpleNamespace(**values)
+
+
+@event.listens_for(db.session, 'before_flush')
+def collect_budget_spend_changes(session, flush_context, instances):
+    """
+    Work out which spend this flush removes; the replacement is added in after_flush
+    Plain expenses are diffed from their attribute history. Expenses with
+    category splits (or whose values were never loaded) are recomputed from
+    the database before and after the flush.
+    """
+    expense_ids = set()
+    user_ids = set()
+    new_expenses = []
+    stored = []
+    written = []
+    rebuild_budgets = []
+    rebuild_users = set()
+    deleted_budgets = set()
+
+    category_users = set()
+    for obj in session.new:
+        if isinstance(obj, CategorySplit):
+            expense = obj.expense
+            if obj.expense_id is not None:
+                expense_ids.add(obj.expense_id)
+            elif expense is not None and expense.id is not None:
+                expense_ids.add(expense.id)
+        elif isinstance(obj, Budget):
+            rebuild_budgets.append(obj)
+        elif isinstance(obj, Category):
+            category_users.add(obj.user_id)
+
+    for obj in session.dirty:
+        # Splits removed from Expense.category_splits are still dirty here; the
+        # delete-orphan cascade only deletes them during the flush
+        if isinstance(obj, CategorySplit) and _changed(obj, ('expense', 'expense_id', 'category_id', 'amount')):
+            expense_ids |= _history_values(obj, 'expense_id')
+        elif isinstance(obj, Budget) and _changed(obj, BUDGET_FIELDS):
+            rebuild_budgets.append(obj)
+            rebuild_users |= _history_values(obj, 'user_id')
+        elif isinstance(obj, Category) and _changed(obj, ('parent_id',)):
+            rebuild_users.add(obj.user_id)
+
+    for obj in session.deleted:
+        if isinstance(obj, CategorySplit):
+            expense_ids |= _history_values(obj, 'expense_id')
+        elif isinstance(obj, Budget):
+            deleted_budgets.add(obj.id)
+        elif isinstance(obj, Category):
+            rebuild_users.add(obj.user_id)
+
+    # Cached category trees don't know this flush's category writes
+    category_users |= rebuild_users
+
+    for obj in session.new:
+        if isinstance(obj, Expense):
+            if obj.has_category_splits or obj.user_id in category_users:
+                new_expenses.append(obj)
+                user_ids.add(obj.user_id)
+            else:
+                written.append(obj)
+
+    changed = [obj for obj in session.dirty if isinstance(obj, Expense) and _changed(obj, SPEND_FIELDS)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Expense)]
+    for obj in changed + deleted:
+        values = _stored_values(obj)
+        current = values if obj in session.deleted else obj
+        if values is None or obj.id in expense_ids or values.has_category_splits or current.has_category_splits \
+                or {values.user_id, current.user_id} & category_users:
+            expense_ids.add(obj.id)
+        else:
+            stored.append(values)
+            if current is obj:
+                written.append(obj)
+
+    expense_ids.discard(None)
+    if expense_ids:
+        user_ids |= {
+            user_id for user_id, in session.query(Expense.user_id).filter(Expense.id.in_(expense_ids))
+        }
+        user_ids |= {obj.user_id for obj in changed}
+    user_ids.discard(None)
+
+    budgets_by_user, scopes = BudgetPeriodSpend.load_budgets(
+        session, {expense.user_id for expense in stored + written} - {None}
+    )
+
+    session.info['budget_spend'] = {
+        'expense_ids': expense_ids,
+        'user_ids': user_ids,
+        'new_expenses': new_expenses,
+        'removed': BudgetPeriodSpend.compute(session, user_ids, expense_ids),
+        'budgets_by_user': budgets_by_user,
+        'scopes': scopes,
+        'stored': stored,
+        'written': written,
+        'rebuild_budgets': rebuild_budgets,
+        'rebuild_users': rebuild_users,
+        'deleted_budgets': deleted_budgets
+    }
+
+
+@event.listens_for(db.session, 'after_flush')
+def apply_budget_spend_changes(session, flush_context):
+    """Add the new spend of the flushed expenses, queue threshold alerts and rebuild counters of changed budgets"""
+    from src.utils.split_calculator import SplitCalculator
+
+    pending = session.info.pop('budget_spend', None)
+    if pending is None:
+        return
+
+    stored, written = pending['stored'], pending['written']
+    totals = BudgetPeriodSpend.changes(
+        pending['budgets_by_user'], pending['scopes'], stored, written,
+        users=SplitCalculator.flush_users(flush_context, SplitCalculator.referenced_user_ids(stored + written))
+    )
+
+    expense_ids = pending['expense_ids'] | {expense.id for expense in pending['new_expenses']}
+    if expense_ids:
+        for key, spent in BudgetPeriodSpend.compute(session, pending['user_ids'], expense_ids).items():
+            totals[key] = totals.get(key, 0.0) + spent
+        for key, spent in pending['removed'].items():
+            totals[key] = totals.get(key, 0.0) - spent
+
+    BudgetPeriodSpend.apply(session, totals)
+    BudgetAlert.detect(session, totals, budgets=[
+        budget for budgets in pending['budgets_by_user'].values() for budget in budgets
+    ])
+
+    BudgetPeriodSpend.delete_for_budgets(session, pending['deleted_budgets'])
+
+    rebuild_users = pending['rebuild_users']
+    if rebuild_users:
+        BudgetPeriodSpend.rebuild(session, rebuild_users)
+
+    budgets = [budget for budget in pending['rebuild_budgets'] if budget.user_id not in rebuild_users]
+    if budgets:
+        BudgetPeriodSpend.rebuild(
+            session, {budget.user_id for budget in budgets}, budget_ids={budget.id for budget in budgets}
+        )
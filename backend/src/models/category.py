@@ -20,6 +20,10 @@ class Category(db.Model):
     user = db.relationship('User', backref=db.backref('categories', lazy=True))
     parent = db.relationship('Category', remote_side=[id], backref=db.backref('subcategories', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_categories_user_parent', 'user_id', 'parent_id'),
+    )
+
     def __repr__(self):
         return f"<Category: {self.name}>"
 
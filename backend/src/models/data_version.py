@@ -0,0 +1,200 @@
+"""
+Per-user data versions
+Bumps users.data_version whenever data that feeds analytics is written
+"""
+
+from flask import g, has_request_context
+from sqlalchemy import event, inspect
+from src.extensions import db
+from src.models.user import User
+from src.models.currency import Currency
+from src.models.transaction import Expense, CategorySplit
+from src.models.budget import Budget
+from src.models.category import Category
+from src.models.account import Account
+from src.models.investment import Portfolio, Investment
+from src.models.group import Settlement
+from src.models.rollup import MonthlyUserRollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Models whose writes change analytics results
+VERSIONED_MODELS = (Expense, CategorySplit, Budget, Category, Account, Portfolio, Investment, Settlement)
+
+
+def get_data_version(user_id):
+    """Current data version for a user (0 for unknown users)"""
+    return db.session.query(User.data_version).filter(User.id == user_id).scalar() or 0
+
+
+def request_memo(name):
+    """
+    Request-scoped dict for results derived from versioned data, or None outside a request
+    Every memo is dropped when a data version is bumped or the session rolls back.
+    """
+    if not has_request_context():
+        return None
+    return g.setdefault('data_version_memos', {}).setdefault(name, {})
+
+
+def drop_request_memos(exc=None):
+    """Forget every request memo (also registered as a teardown_request handler)"""
+    if has_request_context():
+        g.pop('data_version_memos', None)
+
+
+def request_data_version(user_id, flush=True):
+    """
+    get_data_version() read at most once per request until the next bump
+    Pass flush=False from flush events, which must not flush again.
+    """
+    if not has_request_context():
+        return get_data_version(user_id)
+
+    # Flush pending writes first so their version bumps (and memo drops) are seen
+    session = db.session
+    if flush and (session.new or session.deleted or session.dirty):
+        session.flush()
+
+    versions = request_memo('data_versions')
+    if user_id not in versions:
+        versions[user_id] = get_data_version(user_id)
+    return versions[user_id]
+
+
+def note_version_bump(session, kind, user_ids):
+    """Remember the users whose `kind` version the open transaction bumped (None: every user)"""
+    bumped = session.info.setdefault('version_bumps', {}).setdefault(kind, set())
+    if user_ids is None:
+        bumped.add(None)
+    else:
+        bumped.update(user_ids)
+
+
+def has_uncommitted_bump(user_id, kind='data', session=None):
+    """
+    Whether the open transaction bumped the user's `kind` version
+    Results read under such a version may rest on writes that can still roll
+    back, after which the same version number is reached again by other writes.
+    """
+    bumped = (session or db.session).info.get('version_bumps', {}).get(kind, ())
+    return None in bumped or user_id in bumped
+
+
+def bump_data_version(user_ids=None, session=None):
+    """Bump the data version of the given users, or of every user when user_ids is None"""
+    session = session or db.session
+    drop_request_memos()
+    statement = db.update(User).values(data_version=User.data_version + 1)
+    if user_ids is not None:
+        user_ids = {user_id for user_id in user_ids if user_id}
+        if not user_ids:
+            return
+        statement = statement.where(User.id.in_(user_ids))
+    session.execute(statement, execution_options={'synchronize_session': False})
+    note_version_bump(session, 'data', user_ids)
+
+
+def _attribute_values(obj, field):
+    """Current and previously loaded values of an attribute"""
+    history = inspect(obj).attrs[field].history
+    return set(history.sum()) | {getattr(obj, field)}
+
+
+def _affected_users(session, objects):
+    """Users whose analytics change when the given objects are written"""
+    user_ids = set()
+    expense_ids = set()
+    portfolio_ids = set()
+
+    for obj in objects:
+        if isinstance(obj, Expense):
+            user_ids |= MonthlyUserRollup.involved_users(obj)
+            if obj.id is not None:
+                expense_ids.add(obj.id)
+        elif isinstance(obj, CategorySplit):
+            expense_ids |= _attribute_values(obj, 'expense_id')
+        elif isinstance(obj, Settlement):
+            user_ids |= _attribute_values(obj, 'payer_id') | _attribute_values(obj, 'receiver_id')
+        elif isinstance(obj, Investment):
+            portfolio_ids |= _attribute_values(obj, 'portfolio_id')
+        else:
+            user_ids |= _attribute_values(obj, 'user_id')
+
+    # Creators and participants as stored before this flush, so users removed
+    # from an expense are invalidated too
+    expense_ids.discard(None)
+    if expense_ids:
+        user_ids |= MonthlyUserRollup.users_of(session.query(Expense).filter(Expense.id.in_(expense_ids)))
+
+    portfolio_ids.discard(None)
+    if portfolio_ids:
+        user_ids |= {
+            user_id for user_id, in session.query(Portfolio.user_id).filter(Portfolio.id.in_(portfolio_ids))
+        }
+
+    return user_ids
+
+
+@event.listens_for(db.session, 'before_flush')
+def bump_versions_on_flush(session, flush_context, instances):
+    """Bump data versions for every user touched by this flush"""
+    written = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if obj not in session.dirty or session.is_modified(obj)
+    ]
+
+    # Currency symbols and rates are part of every user's results
+    if any(isinstance(obj, Currency) for obj in written):
+        bump_data_version(None, session)
+        return
+
+    objects = [obj for obj in written if isinstance(obj, VERSIONED_MODELS)]
+    user_ids = _affected_users(session, objects) if objects else set()
+
+    # So is the user's own display currency
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs['default_currency_code'].history.has_changes():
+            user_ids.add(obj.id)
+
+    if user_ids:
+        bump_data_version(user_ids, session)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def drop_memos_on_rollback(session, previous_transaction):
+    """Results memoized inside a rolled back transaction may describe discarded writes"""
+    drop_request_memos()
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def forget_version_bumps(session, transaction):
+    """Bumps are committed or discarded with the outermost transaction"""
+    if transaction.parent is None:
+        session.info.pop('version_bumps', None)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def bump_versions_on_bulk_write(orm_execute_state):
+    """
+    Bulk updates and deletes bypass flush events
+    Statements on versioned models must be executed with
+    execution_options(data_version_users={...}) naming the users they affect
+    (Query.update/delete drop execution options, so use session.execute).
+    Unscoped statements are logged and bump nobody.
+    """
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    mapper = orm_execute_state.bind_arguments.get('mapper')
+    if mapper is None or not issubclass(mapper.class_, VERSIONED_MODELS):
+        return
+
+    user_ids = orm_execute_state.execution_options.get('data_version_users')
+    if user_ids is None:
+        logger.warning(f"Bulk write to {mapper.class_.__name__} without data_version_users; "
+                       f"no data versions bumped")
+        return
+
+    bump_data_version(user_ids, orm_execute_state.session)
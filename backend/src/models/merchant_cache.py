@@ -0,0 +1,34 @@
+"""
+Merchant category cache model
+Stored categorization decisions per user and normalized merchant (see src.utils.merchant)
+"""
+
+from datetime import datetime
+from src.extensions import db
+
+
+class MerchantCategoryCache(db.Model):
+    """
+    The category (and deciding category mapping) chosen for a normalized merchant
+    Rows are only valid for the rules version they were written under, and
+    only matches are stored (see MerchantDecisionCache.write).
+    Concurrent writers may store the same merchant twice; readers take the
+    newest row, so duplicates are harmless.
+    """
+    __tablename__ = 'merchant_category_cache'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(120), nullable=False)
+    merchant = db.Column(db.String(200), nullable=False)
+    rules_version = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, nullable=True)
+    mapping_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_merchant_category_cache_user_merchant', 'user_id', 'merchant'),
+    )
+
+    MERCHANT_LENGTH = 200
+
+    def __repr__(self):
+        return f'<MerchantCategoryCache {self.user_id} {self.merchant!r}>'
@@ -0,0 +1,258 @@
+"""
+Monthly user rollup model
+Per-user monthly totals kept in step with every Expense write
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import event, func, inspect, literal_column
+from src.extensions import db
+from src.models.transaction import Expense
+from src.utils.upsert import conflict_insert
+
+
+class MonthlyUserRollup(db.Model):
+    """
+    One row per user, month, transaction type and category
+    Users are the transaction creator plus everyone it is split with, matching
+    Expense.involving_user(). The key is unique (uncategorized rows included),
+    so writers increment rows with an upsert.
+    """
+    __tablename__ = 'monthly_user_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(120), nullable=False)
+    month = db.Column(db.String(7), nullable=False)  # 'YYYY-MM'
+    transaction_type = db.Column(db.String(20), nullable=False)
+    category_id = db.Column(db.Integer, nullable=True)
+    share_amount = db.Column(db.Float, nullable=False, default=0.0)  # User's share of the transactions
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)  # Full amount of the transactions
+    own_amount = db.Column(db.Float, nullable=False, default=0.0)  # Full amount of transactions the user created
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # NULLs never conflict in a unique index, so uncategorized rows are keyed as category 0
+    __table_args__ = (
+        db.Index('ix_monthly_user_rollups_user_month', user_id, month, transaction_type,
+                 func.coalesce(category_id, literal_column('0')), unique=True),
+    )
+
+    def __repr__(self):
+        return f'<MonthlyUserRollup {self.user_id} {self.month} {self.transaction_type}>'
+
+    @staticmethod
+    def involved_users(expense):
+        """The creator and every split_with participant of an expense"""
+        from src.utils.split_calculator import SplitCalculator
+
+        user_ids = {expense.user_id}
+        for user_id in SplitCalculator.parse_split_with(expense.split_with):
+            user_id = user_id.strip()
+            if user_id:
+                user_ids.add(user_id)
+        return user_ids
+
+    @classmethod
+    def accumulate(cls, totals, expense, splits, sign=1):
+        """
+        Add (or with sign=-1 remove) an expense's contribution to `totals`
+        `totals` maps (user_id, month, type, category_id) to [share, total, own, count]
+        """
+        from src.utils.split_calculator import SplitCalculator
+
+        month = expense.date.strftime('%Y-%m')
+        for user_id in cls.involved_users(expense):
+            key = (user_id, month, expense.transaction_type, expense.category_id)
+            entry = totals.setdefault(key, [0.0, 0.0, 0.0, 0])
+            entry[0] += sign * SplitCalculator.user_share(splits, user_id)
+            entry[1] += sign * expense.amount
+            entry[2] += sign * (expense.amount if user_id == expense.user_id else 0.0)
+            entry[3] += sign
+        return totals
+
+    @classmethod
+    def apply(cls, session, totals):
+        """Apply accumulated deltas with one upsert, incrementing in SQL so concurrent writers don't lose updates"""
+        rows = [
+            {
+                'user_id': user_id,
+                'month': month,
+                'transaction_type': transaction_type,
+                'category_id': category_id,
+                'share_amount': share,
+                'total_amount': total,
+                'own_amount': own,
+                'transaction_count': count
+            }
+            for (user_id, month, transaction_type, category_id), (share, total, own, count) in totals.items()
+            if any((share, total, own, count))
+        ]
+        if not rows:
+            return
+
+        table = cls.__table__
+        insert = conflict_insert(session, table)
+        session.execute(insert.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.month, table.c.transaction_type,
+                            func.coalesce(table.c.category_id, literal_column('0'))],
+            set_={
+                'share_amount': table.c.share_amount + insert.excluded.share_amount,
+                'total_amount': table.c.total_amount + insert.excluded.total_amount,
+                'own_amount': table.c.own_amount + insert.excluded.own_amount,
+                'transaction_count': table.c.transaction_count + insert.excluded.transaction_count
+            }
+        ), rows)
+
+    @classmethod
+    def move_category(cls, session, category_id, new_category_id):
+        """Merge the rows of a category into new_category_id (None: uncategorized), e.g. before deleting it"""
+        table = cls.__table__
+        rows = session.execute(table.select().where(table.c.category_id == category_id)).fetchall()
+        if not rows:
+            return
+
+        session.execute(table.delete().where(table.c.category_id == category_id))
+        totals = {}
+        for row in rows:
+            entry = totals.setdefault((row.user_id, row.month, row.transaction_type, new_category_id), [0.0, 0.0, 0.0, 0])
+            entry[0] += row.share_amount
+            entry[1] += row.total_amount
+            entry[2] += row.own_amount
+            entry[3] += row.transaction_count
+        cls.apply(session, totals)
+
+    @classmethod
+    def build(cls, expenses, user_ids=None):
+        """Accumulate rollup totals for expenses, optionally keeping only some users"""
+        from src.utils.split_calculator import SplitCalculator
+
+        totals = {}
+        expenses = list(expenses)
+        expense_splits = SplitCalculator.compute_many(expenses)
+        for expense in expenses:
+            cls.accumulate(totals, expense, expense_splits[expense.id])
+
+        if user_ids is not None:
+            totals = {key: entry for key, entry in totals.items() if key[0] in user_ids}
+        return totals
+
+    @classmethod
+    def insert_totals(cls, totals):
+        """Bulk insert accumulated totals as new rows"""
+        db.session.bulk_insert_mappings(cls, [
+            {
+                'user_id': user_id,
+                'month': month,
+                'transaction_type': transaction_type,
+                'category_id': category_id,
+                'share_amount': share,
+                'total_amount': total,
+                'own_amount': own,
+                'transaction_count': count
+            }
+            for (user_id, month, transaction_type, category_id), (share, total, own, count) in totals.items()
+        ])
+
+    @classmethod
+    def rebuild_for_users(cls, user_ids):
+        """
+        Recompute the rollups of the given users from their expenses
+        Used after bulk query deletes/updates that bypass the flush hook
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+
+        cls.query.filter(cls.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+        expenses = Expense.query.filter(
+            db.or_(*[Expense.involving_user(user_id) for user_id in user_ids])
+        ).all()
+        cls.insert_totals(cls.build(expenses, user_ids))
+
+    @classmethod
+    def category_changes(cls, session, changes):
+        """
+        Rollup deltas for moving expenses to other categories
+        `changes` maps the new category_id to expense ids. Call before the bulk
+        UPDATE that moves them, which bypasses the flush hook.
+        """
+        from src.utils.split_calculator import SplitCalculator
+
+        new_category = {expense_id: category_id for category_id, ids in changes.items() for expense_id in ids}
+        expenses = [SimpleNamespace(**row._asdict()) for row in _committed_rows(session, list(new_category))]
+        expense_splits = SplitCalculator.compute_many(expenses)
+
+        totals = {}
+        for expense in expenses:
+            cls.accumulate(totals, expense, expense_splits[expense.id], sign=-1)
+            expense.category_id = new_category[expense.id]
+            cls.accumulate(totals, expense, expense_splits[expense.id])
+        return totals
+
+    @classmethod
+    def users_of(cls, query):
+        """Creators and participants of the expenses matched by an Expense query"""
+        user_ids = set()
+        for expense in query.with_entities(Expense.user_id, Expense.split_with):
+            user_ids |= cls.involved_users(expense)
+        return user_ids
+
+
+# Attributes that move an expense between rollup rows or change its amounts
+ROLLUP_FIELDS = ('date', 'transaction_type', 'category_id', 'user_id', 'split_with',
+                 'split_details', 'split_method', 'split_value', 'paid_by', 'amount',
+                 'original_amount', 'currency_code')
+
+
+def _committed_rows(session, expense_ids, chunk_size=500):
+    """Rollup fields of the given expenses as currently stored in the database"""
+    columns = [Expense.id] + [getattr(Expense, field) for field in ROLLUP_FIELDS]
+    rows = []
+    for i in range(0, len(expense_ids), chunk_size):
+        chunk = expense_ids[i:i + chunk_size]
+        rows.extend(session.query(*columns).filter(Expense.id.in_(chunk)).all())
+    return rows
+
+
+@event.listens_for(db.session, 'before_flush')
+def sync_monthly_user_rollups(session, flush_context, instances):
+    """Apply every Expense insert, update and delete to monthly_user_rollups in the same flush"""
+    from src.utils.split_calculator import SplitCalculator
+
+    added = []
+    removed_ids = []
+
+    for obj in session.new:
+        if isinstance(obj, Expense):
+            # Column defaults only apply at INSERT, so resolve them now
+            if obj.date is None:
+                obj.date = datetime.utcnow()
+            if obj.transaction_type is None:
+                obj.transaction_type = 'expense'
+            added.append(obj)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Expense):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in ROLLUP_FIELDS):
+            removed_ids.append(obj.id)
+            added.append(obj)
+
+    for obj in session.deleted:
+        if isinstance(obj, Expense):
+            removed_ids.append(obj.id)
+
+    if not added and not removed_ids:
+        return
+
+    # Subtract what the database holds now, not what the objects were loaded with
+    removed = _committed_rows(session, removed_ids)
+
+    users = SplitCalculator.flush_users(flush_context, SplitCalculator.referenced_user_ids(added + removed))
+    totals = {}
+    for expense in added:
+        MonthlyUserRollup.accumulate(totals, expense, SplitCalculator.compute(expense, users))
+    for expense in removed:
+        MonthlyUserRollup.accumulate(totals, expense, SplitCalculator.compute(expense, users), sign=-1)
+
+    MonthlyUserRollup.apply(session, totals)
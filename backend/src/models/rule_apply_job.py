@@ -0,0 +1,48 @@
+"""
+Rule apply job model
+Progress of background runs of bulk transaction rule application
+"""
+
+from datetime import datetime, timedelta
+from src.extensions import db
+
+
+class RuleApplyJob(db.Model):
+    """
+    One bulk rule application run for a user
+    Progress is written after every chunk, so any worker process can
+    report it while the job runs.
+    """
+    __tablename__ = 'rule_apply_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(120), nullable=False, index=True)
+    rule_ids = db.Column(db.Text, nullable=True)  # JSON array, null for every active rule
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'running', 'completed', 'failed'
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Jobs left 'running' this long (the worker died) are marked failed
+    RUNNING_TIMEOUT = timedelta(hours=1)
+
+    def __repr__(self):
+        return f'<RuleApplyJob {self.id} {self.status}>'
+
+    def to_dict(self):
+        end = self.finished_at or datetime.utcnow()
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'updated': self.updated,
+            'elapsed': (end - self.started_at).total_seconds() if self.started_at else 0.0,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
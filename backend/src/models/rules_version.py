@@ -0,0 +1,91 @@
+"""
+Per-user rule versions
+Bumps users.rules_version whenever a transaction rule or category mapping definition is written
+"""
+
+from sqlalchemy import event, inspect
+from src.extensions import db
+from src.models.data_version import note_version_bump, request_memo
+from src.models.user import User
+from src.models.category import CategoryMapping
+from src.models.merchant_cache import MerchantCategoryCache
+from src.models.transaction_rule import TransactionRule
+
+# Rule attributes that change which transactions match or what a match does;
+# match accounting (match_count, last_matched) is deliberately left out
+RULE_FIELDS = (
+    'user_id', 'pattern', 'pattern_field', 'is_regex', 'case_sensitive', 'amount_min', 'amount_max',
+    'transaction_type_filter', 'auto_category_id', 'auto_account_id', 'auto_transaction_type',
+    'auto_tags', 'auto_notes', 'priority', 'active'
+)
+
+# Likewise for category mappings
+MAPPING_FIELDS = ('user_id', 'keyword', 'category_id', 'is_regex', 'priority', 'active')
+
+RULE_MODELS = {TransactionRule: RULE_FIELDS, CategoryMapping: MAPPING_FIELDS}
+
+
+def get_rules_version(user_id):
+    """Current rules version for a user (0 for unknown users)"""
+    return db.session.query(User.rules_version).filter(User.id == user_id).scalar() or 0
+
+
+def request_rules_version(user_id):
+    """get_rules_version() read at most once per request until the next bump"""
+    versions = request_memo('rules_versions')
+    if versions is None:
+        return get_rules_version(user_id)
+
+    # Flush pending writes first so their version bumps are seen
+    session = db.session
+    if session.new or session.deleted or session.dirty:
+        session.flush()
+
+    if user_id not in versions:
+        versions[user_id] = get_rules_version(user_id)
+    return versions[user_id]
+
+
+def bump_rules_version(user_ids, session=None):
+    """Bump the rules version of the given users"""
+    session = session or db.session
+    versions = request_memo('rules_versions')
+    if versions:
+        versions.clear()
+
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+    session.execute(
+        db.update(User).where(User.id.in_(user_ids)).values(rules_version=User.rules_version + 1),
+        execution_options={'synchronize_session': False}
+    )
+    note_version_bump(session, 'rules', user_ids)
+
+    # Decisions cached under the old version can never be read again
+    table = MerchantCategoryCache.__table__
+    session.execute(table.delete().where(table.c.user_id.in_(user_ids)))
+
+
+def _rule_users(obj):
+    history = inspect(obj).attrs['user_id'].history
+    return set(history.sum()) | {obj.user_id}
+
+
+@event.listens_for(db.session, 'before_flush')
+def bump_rules_versions_on_flush(session, flush_context, instances):
+    """Bump rules versions for every user whose rules or mappings this flush creates, edits or deletes"""
+    user_ids = set()
+    for obj in list(session.new) + list(session.deleted):
+        if type(obj) in RULE_MODELS:
+            user_ids |= _rule_users(obj)
+
+    for obj in session.dirty:
+        fields = RULE_MODELS.get(type(obj))
+        if fields:
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in fields):
+                user_ids |= _rule_users(obj)
+
+    if user_ids:
+        bump_rules_version(user_ids, session)
@@ -3,7 +3,7 @@ Transaction models (Expense and CategorySplit)
 """
 
 from datetime import datetime
-import json
+from sqlalchemy import and_, event, inspect, or_
 from src.extensions import db
 from src.models.associations import expense_tags
 
@@ -55,192 +55,35 @@ class Expense(db.Model):
         return self.transaction_type == 'expense' or self.transaction_type is None
 
     def calculate_splits(self):
-        from src.models.user import User
-        
-        # Get the user who paid
-        payer = User.query.filter_by(id=self.paid_by).first()
-        payer_name = payer.name if payer else "Unknown"
-        payer_email = payer.id
-        
-        # Get all people this expense is split with
-        split_with_ids = self.split_with.split(',') if self.split_with else []
-        split_users = []
-        
-        for user_id in split_with_ids:
-            user = User.query.filter_by(id=user_id.strip()).first()
-            if user:
-                split_users.append({
-                    'id': user.id,
-                    'name': user.name,
-                    'email': user.id
-                })
-        
-        # Handle case where original_amount is None by using amount
-        original_amount = self.original_amount if self.original_amount is not None else self.amount
-        
-        # Set up result structure with both base and original currency
-        result = {
-            'payer': {
-                'id': payer_email,  # Add id field
-                'name': payer_name,
-                'email': payer_email,
-                'amount': 0,  # Base currency amount
-                'original_amount': original_amount,  # Original amount
-                'currency_code': self.currency_code  # Original currency code
-            },
-            'splits': []
-        }
-        
-        # Parse split details if available
-        split_details = {}
-        if self.split_details:
-            try:
-                if isinstance(self.split_details, str):
-                    split_details = json.loads(self.split_details)
-                elif isinstance(self.split_details, dict):
-                    split_details = self.split_details
-            except Exception as e:
-                print(f"Error parsing split_details for expense {self.id}: {str(e)}")
-                split_details = {}
-        
-        if self.split_method == 'none' or not self.split_with:
-            # No splitting - full amount to payer
-            result['payer']['amount'] = self.amount
+        """Calculate how this expense is split between payer and participants"""
+        from src.utils.split_calculator import SplitCalculator
+        return SplitCalculator.compute_one(self)
 
-        elif self.split_method == 'equal':
-            total_participants = len(split_users) + (1 if self.paid_by not in split_with_ids else 0)
-            per_person = self.amount / total_participants if total_participants > 0 else 0
-            per_person_original = original_amount / total_participants if total_participants > 0 else 0
+    @classmethod
+    def split_with_user(cls, user_id):
+        """Filter for transactions split with the user (indexed lookup on expense_participants)"""
+        return cls.id.in_(
+            db.session.query(ExpenseParticipant.expense_id).filter(ExpenseParticipant.user_id == user_id)
+        )
 
-            if self.paid_by not in split_with_ids:
-                result['payer']['amount'] = per_person
-            else:
-                result['payer']['amount'] = 0
+    @classmethod
+    def involving_user(cls, user_id):
+        """Filter for transactions the user created or is a split participant in"""
+        return or_(cls.user_id == user_id, cls.split_with_user(user_id))
 
-            for user in split_users:
-                result['splits'].append({
-                    'id': user['email'],  # Add id field
-                    'name': user['name'],
-                    'email': user['email'],
-                    'amount': per_person,
-                    'original_amount': per_person_original,
-                    'currency_code': self.currency_code
-                })
-                    
-        elif self.split_method == 'percentage':
-            if split_details and isinstance(split_details, dict) and split_details.get('type') == 'percentage':
-                percentages = split_details.get('values', {})
-                total_assigned = 0
-                total_original_assigned = 0
-                
-                payer_percent = float(percentages.get(self.paid_by, 0))
-                payer_amount = (self.amount * payer_percent) / 100
-                payer_original_amount = (original_amount * payer_percent) / 100
-                
-                result['payer']['amount'] = payer_amount if self.paid_by not in split_with_ids else 0
-                total_assigned += payer_amount if self.paid_by not in split_with_ids else 0
-                total_original_assigned += payer_original_amount if self.paid_by not in split_with_ids else 0
-                
-                for user in split_users:
-                    user_percent = float(percentages.get(user['id'], 0))
-                    user_amount = (self.amount * user_percent) / 100
-                    user_original_amount = (original_amount * user_percent) / 100
+    @classmethod
+    def has_splits(cls):
+        """Filter for transactions divided between participants"""
+        return and_(
+            cls.split_with.isnot(None),
+            cls.split_with != '',
+            cls.split_method != 'none'
+        )
 
-                    result['splits'].append({
-                        'id': user['email'],  # Add id field
-                        'name': user['name'],
-                        'email': user['email'],
-                        'amount': user_amount,
-                        'original_amount': user_original_amount,
-                        'currency_code': self.currency_code
-                    })
-                    total_assigned += user_amount
-                    total_original_assigned += user_original_amount
-                
-                if abs(total_assigned - self.amount) > 0.01:
-                    difference = self.amount - total_assigned
-                    if result['splits']:
-                        result['splits'][-1]['amount'] += difference
-                    elif result['payer']['amount'] > 0:
-                        result['payer']['amount'] += difference
-            else:
-                payer_percentage = self.split_value if self.split_value is not None else 0
-                payer_amount = (self.amount * payer_percentage) / 100
-                payer_original_amount = (original_amount * payer_percentage) / 100
-                
-                result['payer']['amount'] = payer_amount if self.paid_by not in split_with_ids else 0
-                
-                remaining = self.amount - result['payer']['amount']
-                remaining_original = original_amount - payer_original_amount
-                per_person = remaining / len(split_users) if split_users else 0
-                per_person_original = remaining_original / len(split_users) if split_users else 0
-                
-                for user in split_users:
-                    result['splits'].append({
-                        'id': user['email'],  # Add id field
-                        'name': user['name'],
-                        'email': user['email'],
-                        'amount': per_person,
-                        'original_amount': per_person_original,
-                        'currency_code': self.currency_code
-                    })
-        
-        elif self.split_method == 'custom':
-            if split_details and isinstance(split_details, dict) and split_details.get('type') in ['amount', 'custom']:
-                amounts = split_details.get('values', {})
-                total_assigned = 0
-                
-                payer_amount = float(amounts.get(self.paid_by, 0))
-                payer_ratio = payer_amount / self.amount if self.amount else 0
-                payer_original_amount = original_amount * payer_ratio
-                
-                result['payer']['amount'] = payer_amount if self.paid_by not in split_with_ids else 0
-                total_assigned += payer_amount if self.paid_by not in split_with_ids else 0
-                
-                for user in split_users:
-                    user_amount = float(amounts.get(user['id'], 0))
-                    user_ratio = user_amount / self.amount if self.amount else 0
-                    user_original_amount = original_amount * user_ratio
-
-                    result['splits'].append({
-                        'id': user['email'],  # Add id field
-                        'name': user['name'],
-                        'email': user['email'],
-                        'amount': user_amount,
-                        'original_amount': user_original_amount,
-                        'currency_code': self.currency_code
-                    })
-                    total_assigned += user_amount
-                
-                if abs(total_assigned - self.amount) > 0.01:
-                    difference = self.amount - total_assigned
-                    if result['splits']:
-                        result['splits'][-1]['amount'] += difference
-                    elif result['payer']['amount'] > 0:
-                        result['payer']['amount'] += difference
-            else:
-                payer_amount = self.split_value if self.split_value is not None else 0
-                payer_ratio = payer_amount / self.amount if self.amount else 0
-                payer_original_amount = original_amount * payer_ratio
-                
-                result['payer']['amount'] = payer_amount if self.paid_by not in split_with_ids else 0
-                
-                remaining = self.amount - result['payer']['amount']
-                remaining_original = original_amount - payer_original_amount
-                per_person = remaining / len(split_users) if split_users else 0
-                per_person_original = remaining_original / len(split_users) if split_users else 0
-                
-                for user in split_users:
-                    result['splits'].append({
-                        'id': user['email'],  # Add id field
-                        'name': user['name'],
-                        'email': user['email'],
-                        'amount': per_person,
-                        'original_amount': per_person_original,
-                        'currency_code': self.currency_code
-                    })
-
-        return result
+    @classmethod
+    def has_no_splits(cls):
+        """Filter for transactions where the payer carries the full amount"""
+        return or_(cls.split_with.is_(None), cls.split_with == '', cls.split_method == 'none')
 
 
 class CategorySplit(db.Model):
@@ -254,3 +97,74 @@ class CategorySplit(db.Model):
     # Relationships
     expense = db.relationship('Expense', backref=db.backref('category_splits', cascade='all, delete-orphan'))
     category = db.relationship('Category', backref=db.backref('splits', lazy=True))
+
+
+class ExpenseParticipant(db.Model):
+    """Normalized copy of Expense.split_with, one row per participant"""
+    __tablename__ = 'expense_participants'
+    expense_id = db.Column(db.Integer, db.ForeignKey('expenses.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.String(120), primary_key=True)
+    share_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    # Relationships
+    expense = db.relationship('Expense', backref=db.backref('participants', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_expense_participants_user_id', 'user_id', 'expense_id'),
+    )
+
+    @staticmethod
+    def build_shares(expense, splits):
+        """Map each split_with participant to their share of the expense"""
+        from src.utils.split_calculator import SplitCalculator
+
+        shares = {}
+        for user_id in SplitCalculator.parse_split_with(expense.split_with):
+            user_id = user_id.strip()
+            if user_id:
+                shares.setdefault(user_id, 0.0)
+
+        for split in splits['splits']:
+            shares[split['id']] = shares.get(split['id'], 0.0) + split['amount']
+
+        return shares
+
+    @classmethod
+    def sync_expenses(cls, expenses, users=None):
+        """Rebuild participant rows for the given expenses, optionally with preloaded user names"""
+        from src.utils.split_calculator import SplitCalculator
+
+        # New expenses have no ID yet, so compute splits per object
+        if users is None:
+            users = SplitCalculator.load_users(SplitCalculator.referenced_user_ids(expenses))
+        for expense in expenses:
+            shares = cls.build_shares(expense, SplitCalculator.compute(expense, users))
+            expense.participants = [
+                cls(user_id=user_id, share_amount=share_amount)
+                for user_id, share_amount in shares.items()
+            ]
+
+
+# Attributes that affect who participates in an expense and their shares
+PARTICIPANT_FIELDS = ('split_with', 'split_details', 'split_method', 'split_value',
+                      'paid_by', 'amount', 'original_amount')
+
+
+@event.listens_for(db.session, 'before_flush')
+def sync_expense_participants(session, flush_context, instances):
+    """Keep expense_participants in step with every Expense insert and update"""
+    expenses = [obj for obj in session.new if isinstance(obj, Expense)]
+
+    for obj in session.dirty:
+        if not isinstance(obj, Expense):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in PARTICIPANT_FIELDS):
+            expenses.append(obj)
+
+    if expenses:
+        from src.utils.split_calculator import SplitCalculator
+
+        ExpenseParticipant.sync_expenses(expenses, SplitCalculator.flush_users(
+            flush_context, SplitCalculator.referenced_user_ids(expenses)
+        ))
@@ -110,6 +110,7 @@ class TransactionRule(db.Model):
     def apply(self, transaction_data):
         """
         Apply this rule's actions to transaction data
+        Match accounting is left to the caller (see utils.rule_matches)
 
         Args:
             transaction_data: Dict with transaction fields
@@ -117,10 +118,6 @@ class TransactionRule(db.Model):
         Returns:
             dict: Updated transaction data with rule actions applied
         """
-        # Update match counter
-        self.match_count += 1
-        self.last_matched = datetime.utcnow()
-
         # Apply category
         if self.auto_category_id:
             transaction_data['category_id'] = self.auto_category_id
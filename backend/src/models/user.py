@@ -40,6 +40,11 @@ class User(UserMixin, db.Model):
     # Demo mode
     is_demo_user = db.Column(db.Boolean, default=False)
 
+    # Bumped on every write that affects analytics (see src/models/data_version.py)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped whenever categorization rules change (see src/models/rules_version.py)
+    rules_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
 
@@ -11,6 +11,7 @@ from flask import current_app
 from src.extensions import db
 from src.models.account import Account, SimpleFin
 from src.models.transaction import Expense
+from src.models.rollup import MonthlyUserRollup
 from src.models.currency import Currency
 from src.models.user import User
 from src.utils.currency_converter import convert_currency, get_base_currency
@@ -139,7 +140,12 @@ class AccountService:
 
         try:
             # Update all transactions to remove account reference
-            Expense.query.filter_by(account_id=account_id).update({'account_id': None})
+            db.session.execute(
+                db.update(Expense).where(Expense.account_id == account_id).values(account_id=None),
+                execution_options={
+                    'data_version_users': MonthlyUserRollup.users_of(Expense.query.filter_by(account_id=account_id))
+                }
+            )
 
             # Delete the account
             db.session.delete(account)
@@ -0,0 +1,232 @@
+"""
+Dashboard aggregation
+Builds the dashboard metrics from rollups, SQL GROUP BY totals and one pass over split expenses
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from src.services.analytics.sql_aggregates import AnalyticsAggregates
+
+
+class DashboardAggregator:
+    """
+    Dashboard metrics computed on demand
+    Each part (totals, monthly, categories, ious) runs its queries at most once,
+    so callers only pay for the metrics they read.
+    """
+
+    def __init__(self, user_id, now):
+        self.user_id = user_id
+        self.now = now
+        self.aggregates = AnalyticsAggregates(user_id)
+        self._done = set()
+
+        self.monthly_totals = {}
+        self.total_income = 0
+        self.total_transfers = 0
+
+        # User's share for the current year
+        self.total_expenses = 0
+        self.total_expenses_only = 0
+        self.current_month_total = 0
+        self.current_month_expenses_only = 0
+        self.unique_cards = set()
+
+        # IOU balances
+        self.owes_me = {}  # People who owe current user
+        self.i_owe = {}    # People current user owes
+
+        # Current month category spending
+        self.category_totals = {}
+
+        # Shared between parts
+        self._month_type_totals = None
+        self._split_contributors = {}  # Split expense contributors per month
+
+    def run(self):
+        """Compute every part"""
+        return self.totals().monthly().categories().ious()
+
+    def _once(self, part, compute):
+        if part not in self._done:
+            compute()
+            self._done.add(part)
+        return self
+
+    def totals(self):
+        """Income/transfer totals, the user's current-year share and cards used"""
+        return self._once('totals', self._compute_totals)
+
+    def monthly(self):
+        """Monthly totals with card, account and contributor breakdowns"""
+        return self._once('monthly', self._compute_monthly)
+
+    def categories(self):
+        """Current month spending per category"""
+        return self._once('categories', self._compute_categories)
+
+    def ious(self):
+        """IOU balances between the current user and everyone else"""
+        return self._once('split_pass', self._split_pass)
+
+    def _year_bounds(self):
+        return datetime(self.now.year, 1, 1), datetime(self.now.year + 1, 1, 1)
+
+    def _month_bounds(self):
+        month_start = datetime(self.now.year, self.now.month, 1)
+        if self.now.month < 12:
+            month_end = datetime(self.now.year, self.now.month + 1, 1)
+        else:
+            month_end = datetime(self.now.year + 1, 1, 1)
+        return month_start, month_end
+
+    def _type_totals(self):
+        if self._month_type_totals is None:
+            self._month_type_totals = self.aggregates.monthly_type_totals()
+        return self._month_type_totals
+
+    def _compute_totals(self):
+        for (month_key, transaction_type), amount in self._type_totals().items():
+            if transaction_type == 'income':
+                self.total_income += amount
+            elif transaction_type == 'transfer':
+                self.total_transfers += amount
+
+        year_start, year_end = self._year_bounds()
+        self._add_user_share(year_start, year_end)
+        self.unique_cards = set(self.aggregates.unique_cards(year_start, year_end))
+
+    def _compute_categories(self):
+        self.category_totals = self.aggregates.category_totals(*self._month_bounds())
+
+    def _split_pass(self):
+        """
+        Contributors and IOUs depend on each expense's split rules, so split
+        expenses are the only rows folded in Python
+        """
+        for expense, splits in self.aggregates.split_expenses():
+            if expense.transaction_type == 'expense':
+                self._add_contributors(expense.date.strftime('%Y-%m'), splits)
+            self._add_iou(splits)
+
+    def _month(self, month_key):
+        if month_key not in self.monthly_totals:
+            self.monthly_totals[month_key] = {
+                'total': 0.0,
+                'by_card': {},
+                'contributors': {},
+                'by_account': {}
+            }
+        return self.monthly_totals[month_key]
+
+    def _compute_monthly(self):
+        for (month_key, transaction_type), amount in self._type_totals().items():
+            month = self._month(month_key)
+
+            # Only expenses count towards the monthly total
+            if transaction_type == 'expense':
+                month['total'] += amount
+
+        for month_key, card, amount in self.aggregates.monthly_card_totals():
+            self._month(month_key)['by_card'][card] = amount
+
+        for month_key, account_name, amount in self.aggregates.monthly_account_totals():
+            by_account = self._month(month_key)['by_account']
+            by_account[account_name] = by_account.get(account_name, 0) + amount
+
+        # Payers of unsplit expenses carry the full amount
+        for month_key, payer_email, amount in self.aggregates.monthly_payer_totals():
+            contributors = self._month(month_key)['contributors']
+            contributors[payer_email] = contributors.get(payer_email, 0) + amount
+
+        self.ious()
+        for month_key, split_contributors in self._split_contributors.items():
+            contributors = self._month(month_key)['contributors']
+            for email, amount in split_contributors.items():
+                contributors[email] = contributors.get(email, 0) + amount
+
+    def _add_contributors(self, month_key, splits):
+        """Payer and participant portions of a split expense"""
+        contributors = self._split_contributors.setdefault(month_key, {})
+
+        if splits['payer']['amount'] > 0:
+            payer_email = splits['payer']['email']
+            contributors[payer_email] = contributors.get(payer_email, 0) + splits['payer']['amount']
+
+        for split in splits['splits']:
+            contributors[split['email']] = contributors.get(split['email'], 0) + split['amount']
+
+    def _add_user_share(self, year_start, year_end):
+        """Current user's share of this year's expenses"""
+        current_month = self.now.strftime('%Y-%m')
+        shares = self.aggregates.user_share_by_month(year_start, year_end)
+        for (month_key, transaction_type), user_share in shares.items():
+            if transaction_type != 'expense':
+                continue
+
+            self.total_expenses += user_share
+            self.total_expenses_only += user_share
+
+            if month_key == current_month:
+                self.current_month_total += user_share
+                self.current_month_expenses_only += user_share
+
+    def _add_iou(self, splits):
+        """IOU balances between the current user and everyone else"""
+        payer_id = splits['payer']['id']
+
+        # If current user is the payer, track what others owe them
+        if payer_id == self.user_id:
+            for split in splits['splits']:
+                if split['id'] not in self.owes_me:
+                    self.owes_me[split['id']] = {'name': split['name'], 'amount': 0}
+                self.owes_me[split['id']]['amount'] += split['amount']
+
+        # If current user is in the splits (but not the payer)
+        elif self.user_id in [split['id'] for split in splits['splits']]:
+            current_user_split = next((split['amount'] for split in splits['splits'] if split['id'] == self.user_id), 0)
+
+            if payer_id not in self.i_owe:
+                self.i_owe[payer_id] = {'name': splits['payer']['name'], 'amount': 0}
+            self.i_owe[payer_id]['amount'] += current_user_split
+
+    # Results
+
+    def monthly_series(self):
+        """Chronological (labels, amounts) for the monthly totals chart"""
+        self.monthly()
+        monthly_labels = []
+        monthly_amounts = []
+        for month, data in sorted(self.monthly_totals.items(), key=lambda x: x[0]):
+            monthly_labels.append(month)
+            monthly_amounts.append(data['total'])
+        return monthly_labels, monthly_amounts
+
+    def iou_data(self):
+        """IOU balances with the net position"""
+        self.ious()
+        total_owed = sum(data['amount'] for data in self.owes_me.values())
+        total_owing = sum(data['amount'] for data in self.i_owe.values())
+
+        return SimpleNamespace(
+            owes_me=self.owes_me,
+            i_owe=self.i_owe,
+            net_balance=total_owed - total_owing
+        )
+
+    def top_categories(self, limit=6):
+        """Top current month categories as a list of dicts"""
+        self.categories()
+        return sorted(
+            [
+                {
+                    'name': name,
+                    'amount': data['amount'],
+                    'color': data['color'],
+                    'icon': data['icon']
+                }
+                for name, data in self.category_totals.items()
+            ],
+            key=lambda x: x['amount'],
+            reverse=True
+        )[:limit]
@@ -0,0 +1,178 @@
+"""
+Dashboard response encoder
+Explicit schema for the /analytics/dashboard and /analytics/stats payloads, encoded field by field
+"""
+
+from datetime import date, datetime
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _recent_transaction(expense):
+    category = expense.category
+    account = expense.account
+    return {
+        'id': expense.id,
+        'description': expense.description,
+        'amount': expense.amount,
+        'date': _iso(expense.date),
+        'transaction_type': expense.transaction_type,
+        'currency_code': expense.currency_code,
+        'card_used': expense.card_used,
+        'user_id': expense.user_id,
+        'paid_by': expense.paid_by,
+        'split_method': expense.split_method,
+        'split_with': expense.split_with,
+        'category': {
+            'id': category.id,
+            'name': category.name,
+            'icon': category.icon,
+            'color': category.color
+        } if category else None,
+        'account': {
+            'id': account.id,
+            'name': account.name
+        } if account else None
+    }
+
+
+def _budget_summary(summary):
+    return {
+        'total_budgets': summary.total_budgets,
+        'total_budget': summary.total_budget,
+        'total_spent': summary.total_spent,
+        'over_budget': summary.over_budget,
+        'approaching_limit': summary.approaching_limit,
+        'budgets': [
+            {
+                'category': item.category,
+                'budget': item.budget,
+                'spent': item.spent,
+                'percentage': item.percentage
+            }
+            for item in summary.budgets
+        ]
+    }
+
+
+def _iou_data(iou_data):
+    return {
+        'owes_me': iou_data.owes_me,
+        'i_owe': iou_data.i_owe,
+        'net_balance': iou_data.net_balance
+    }
+
+
+def _currency(currency):
+    return {'code': currency.code, 'name': currency.name, 'symbol': currency.symbol}
+
+
+def _category(category):
+    return {
+        'id': category.id,
+        'name': category.name,
+        'icon': category.icon,
+        'color': category.color,
+        'parent_id': category.parent_id
+    }
+
+
+def _plain(value):
+    return value
+
+
+class DashboardEncoder:
+    """
+    Encodes AnalyticsService.get_dashboard_data() results into the dashboard
+    response schema. Every field has a dedicated encoder, and list fields
+    are bounded (recent transactions, last MONTHS_LIMIT months), so payload
+    size does not grow with transaction history or the number of users.
+    """
+
+    # Dashboard sections exposed by the API; full transaction history
+    # ('transactions') and the system-wide user list ('people') are not
+    SECTIONS = (
+        'recent_transactions', 'totals', 'monthly', 'monthly_breakdown', 'top_categories', 'iou',
+        'budget_summary', 'currency', 'reference', 'assets'
+    )
+
+    # Months of history in the monthly series
+    MONTHS_LIMIT = 12
+
+    FIELDS = {
+        'now': _iso,
+        'recent_transactions': lambda expenses: [_recent_transaction(expense) for expense in expenses],
+        'total_expenses': _plain,
+        'total_expenses_only': _plain,
+        'current_month_total': _plain,
+        'current_month_expenses_only': _plain,
+        'unique_cards': list,
+        'total_income': _plain,
+        'total_transfers': _plain,
+        'net_cash_flow': _plain,
+        'savings_rate': _plain,
+        'monthly_breakdown': list,
+        'top_categories': list,
+        'iou_data': _iou_data,
+        'budget_summary': _budget_summary,
+        'base_currency': dict,
+        'currencies': lambda currencies: [_currency(currency) for currency in currencies],
+        'categories': lambda categories: [_category(category) for category in categories],
+        'asset_trends_months': list,
+        'asset_trends': list,
+        'debt_trends': list,
+        'total_assets': _plain,
+        'total_debts': _plain,
+        'net_worth': _plain,
+        'investment_total': _plain
+    }
+
+    def encode(self, data):
+        """Encode the schema fields present in `data`; anything else is dropped"""
+        result = {key: encode(data[key]) for key, encode in self.FIELDS.items() if key in data}
+
+        if 'monthly_totals' in data:
+            result.update(self._encode_monthly(data))
+
+        return result
+
+    def _encode_monthly(self, data):
+        """Monthly totals and chart series for the most recent MONTHS_LIMIT months"""
+        months = sorted(data['monthly_totals'])[-self.MONTHS_LIMIT:]
+        return {
+            'monthly_totals': {month: data['monthly_totals'][month] for month in months},
+            'monthly_labels': list(data['monthly_labels'][-self.MONTHS_LIMIT:]),
+            'monthly_amounts': list(data['monthly_amounts'][-self.MONTHS_LIMIT:])
+        }
+
+
+class StatsEncoder(DashboardEncoder):
+    """
+    Encodes AnalyticsService.get_stats_data() results: the dashboard schema
+    plus the statistics page's chart series
+    """
+
+    FIELDS = dict(DashboardEncoder.FIELDS, **{
+        'category_names': list,
+        'category_totals': list,
+        'tag_names': list,
+        'tag_totals': list,
+        'tag_colors': list,
+        'liquidity_ratio': _plain,
+        'account_growth': _plain,
+        'spending_trend': _plain,
+        'net_balance': _plain
+    })
+
+    def _encode_monthly(self, data):
+        """Monthly series, with monthly_income kept aligned to monthly_labels"""
+        result = super()._encode_monthly(data)
+        if 'monthly_income' in data:
+            result['monthly_income'] = list(data['monthly_income'][-self.MONTHS_LIMIT:])
+        return result
+
+
+dashboard_encoder = DashboardEncoder()
+stats_encoder = StatsEncoder()
@@ -1,7 +1,7 @@
 """Analytics Service - Dashboard and statistics"""
 from datetime import datetime, timedelta
-from sqlalchemy import or_
-from src.models.transaction import Expense
+from sqlalchemy.orm import joinedload, selectinload
+from src.models.transaction import Expense, CategorySplit
 from src.models.budget import Budget
 from src.models.group import Group
 from src.models.user import User
@@ -10,149 +10,124 @@ from src.models.currency import Currency
 from src.models.account import Account
 from src.models.associations import group_users
 from src.extensions import db
+from src.utils.split_calculator import SplitCalculator
+from src.services.analytics.aggregator import DashboardAggregator
+from src.services.analytics.sql_aggregates import AnalyticsAggregates
+from src.services.analytics.trends import TrendEngine
+
+class DashboardContext:
+    """State shared by the dashboard sections of one request, built on first use"""
+
+    def __init__(self, user_id, now, recent_limit):
+        self.user_id = user_id
+        self.now = now
+        self.recent_limit = recent_limit
+        self._current_user = None
+        self._aggregator = None
+
+    @property
+    def current_user(self):
+        if self._current_user is None:
+            self._current_user = User.query.get(self.user_id)
+        return self._current_user
+
+    @property
+    def aggregator(self):
+        if self._aggregator is None:
+            self._aggregator = DashboardAggregator(self.user_id, self.now)
+        return self._aggregator
+
 
 class AnalyticsService:
+    # Dashboard sections and the keys each one contributes
+    DASHBOARD_SECTIONS = {
+        'transactions': ('expenses', 'expense_splits'),
+        'recent_transactions': ('recent_transactions',),
+        'totals': ('total_expenses', 'total_expenses_only', 'current_month_total', 'current_month_expenses_only',
+                   'unique_cards', 'total_income', 'total_transfers', 'net_cash_flow', 'savings_rate'),
+        'monthly': ('monthly_totals', 'monthly_labels', 'monthly_amounts'),
+        'monthly_breakdown': ('monthly_breakdown',),
+        'top_categories': ('top_categories',),
+        'iou': ('iou_data',),
+        'budget_summary': ('budget_summary',),
+        'people': ('users', 'groups'),
+        'currency': ('base_currency',),
+        'reference': ('currencies', 'categories'),
+        'assets': ('asset_trends_months', 'asset_trends', 'debt_trends', 'total_assets', 'total_debts',
+                   'net_worth', 'investment_total'),
+    }
+
+    # Default size of the bounded recent_transactions list
+    RECENT_TRANSACTIONS_LIMIT = 20
+
+    # Months in the monthly expense breakdown
+    BREAKDOWN_MONTHS = 6
+
     def __init__(self):
         pass
 
-    def get_dashboard_data(self, user_id):
-        """Get dashboard overview data"""
-        from src.utils.helpers import get_base_currency, sync_investments_with_accounts, calculate_asset_debt_trends
-        from src.models.user import User
-
-        now = datetime.now()
-        current_user = User.query.get(user_id)
-        base_currency = get_base_currency(current_user)
+    def resolve_sections(self, sections=None):
+        """
+        Normalize a section selection to an ordered list of section names
+        Accepts None (every section), a comma-separated string or an iterable
+        """
+        if sections is None:
+            return list(self.DASHBOARD_SECTIONS)
+
+        if isinstance(sections, str):
+            sections = sections.split(',')
+        requested = {section.strip() for section in sections if section and section.strip()}
+
+        unknown = requested - set(self.DASHBOARD_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown dashboard section(s): {', '.join(sorted(unknown))}")
+
+        return [section for section in self.DASHBOARD_SECTIONS if section in requested]
+
+    def get_dashboard_data(self, user_id, sections=None, recent_limit=None):
+        """
+        Get dashboard overview data
+        Only the requested sections (see DASHBOARD_SECTIONS) are computed;
+        by default every section is included
+        """
+        context = DashboardContext(user_id, datetime.now(), recent_limit or self.RECENT_TRANSACTIONS_LIMIT)
+
+        data = {'now': context.now}
+        for section in self.resolve_sections(sections):
+            data.update(getattr(self, f'_dashboard_{section}')(context))
+        return data
 
-        # Fetch all expenses where the user is either the creator or a split participant
+    def _dashboard_transactions(self, context):
+        """Every expense the user created or is split with, plus their splits"""
         expenses = Expense.query.filter(
-            or_(
-                Expense.user_id == user_id,
-                Expense.split_with.like(f'%{user_id}%')
-            )
+            Expense.involving_user(context.user_id)
+        ).options(
+            selectinload(Expense.tags),
+            joinedload(Expense.account),
+            joinedload(Expense.category),
+            selectinload(Expense.category_splits).joinedload(CategorySplit.category)
         ).order_by(Expense.date.desc()).all()
 
-        users = User.query.all()
-        groups = Group.query.join(group_users).filter(group_users.c.user_id == user_id).all()
-
-        # Synchronize investment portfolios with linked accounts
-        try:
-            sync_investments_with_accounts(user_id)
-        except Exception as e:
-            pass  # Silently fail if sync fails
-
-        # Pre-calculate expense splits to avoid repeated calculations in template
-        expense_splits = {}
-        for expense in expenses:
-            expense_splits[expense.id] = expense.calculate_splits()
-
-        # Calculate monthly totals with contributors
-        monthly_totals = {}
-        if expenses:
-            for expense in expenses:
-                month_key = expense.date.strftime('%Y-%m')
-                if month_key not in monthly_totals:
-                    monthly_totals[month_key] = {
-                        'total': 0.0,
-                        'by_card': {},
-                        'contributors': {},
-                        'by_account': {}
-                    }
-
-                # Add to total - only add expenses, not income or transfers
-                if not hasattr(expense, 'transaction_type') or expense.transaction_type == 'expense':
-                    monthly_totals[month_key]['total'] += expense.amount
-
-                    # Add to card totals
-                    if expense.card_used not in monthly_totals[month_key]['by_card']:
-                        monthly_totals[month_key]['by_card'][expense.card_used] = 0
-                    monthly_totals[month_key]['by_card'][expense.card_used] += expense.amount
-
-                    # Add to account totals if available
-                    if hasattr(expense, 'account') and expense.account:
-                        account_name = expense.account.name
-                        if account_name not in monthly_totals[month_key]['by_account']:
-                            monthly_totals[month_key]['by_account'][account_name] = 0
-                        monthly_totals[month_key]['by_account'][account_name] += expense.amount
-
-                    # Calculate splits and add to contributors
-                    splits = expense_splits[expense.id]
-
-                    # Add payer's portion
-                    if splits['payer']['amount'] > 0:
-                        payer_email = splits['payer']['email']
-                        if payer_email not in monthly_totals[month_key]['contributors']:
-                            monthly_totals[month_key]['contributors'][payer_email] = 0
-                        monthly_totals[month_key]['contributors'][payer_email] += splits['payer']['amount']
-
-                    # Add other contributors' portions
-                    for split in splits['splits']:
-                        if split['email'] not in monthly_totals[month_key]['contributors']:
-                            monthly_totals[month_key]['contributors'][split['email']] = 0
-                        monthly_totals[month_key]['contributors'][split['email']] += split['amount']
-
-        # Calculate total expenses for current user (only their portions for the current year)
-        current_year = now.year
-        total_expenses = 0
-        total_expenses_only = 0
-        total_income = 0
-        total_transfers = 0
-        monthly_labels = []
-        monthly_amounts = []
-
-        # Sort monthly totals to ensure chronological order
-        sorted_monthly_totals = sorted(monthly_totals.items(), key=lambda x: x[0])
-
-        for month, data in sorted_monthly_totals:
-            monthly_labels.append(month)
-            monthly_amounts.append(data['total'])
-
-        # Calculate totals for each transaction type
-        for expense in expenses:
-            if hasattr(expense, 'transaction_type'):
-                if expense.transaction_type == 'income':
-                    total_income += expense.amount
-                elif expense.transaction_type == 'transfer':
-                    total_transfers += expense.amount
-
-        # Calculate user's share from expense splits
-        current_month_total = 0
-        current_month_expenses_only = 0
-        unique_cards = set()
-
-        for expense in expenses:
-            if expense.date.year != current_year:
-                continue
-
-            splits = expense_splits[expense.id]
-            user_share = 0
-
-            # Find user's share
-            if splits['payer']['id'] == user_id:
-                user_share = splits['payer']['amount']
-            else:
-                for split in splits['splits']:
-                    if split['id'] == user_id:
-                        user_share = split['amount']
-                        break
-
-            # Add to totals
-            if not hasattr(expense, 'transaction_type') or expense.transaction_type == 'expense':
-                total_expenses += user_share
-                total_expenses_only += user_share
-
-                if expense.date.month == now.month and expense.date.year == now.year:
-                    current_month_total += user_share
-                    current_month_expenses_only += user_share
-
-                if expense.card_used:
-                    unique_cards.add(expense.card_used)
-
-        # Calculate IOU data
-        iou_data = self._calculate_iou_data(user_id, expenses, expense_splits)
-
-        # Calculate budget summary
-        budget_summary = self._calculate_budget_summary(user_id, now)
+        return {
+            'expenses': expenses,
+            'expense_splits': SplitCalculator.compute_many(expenses)
+        }
+
+    def _dashboard_recent_transactions(self, context):
+        """The user's most recent transactions, bounded by context.recent_limit"""
+        expenses = Expense.query.filter(
+            Expense.involving_user(context.user_id)
+        ).options(
+            joinedload(Expense.account),
+            joinedload(Expense.category)
+        ).order_by(Expense.date.desc(), Expense.id.desc()).limit(context.recent_limit).all()
+
+        return {'recent_transactions': expenses}
+
+    def _dashboard_totals(self, context):
+        aggregator = context.aggregator.totals()
+        total_income = aggregator.total_income
+        total_expenses_only = aggregator.total_expenses_only
 
         # Calculate derived metrics
         net_cash_flow = total_income - total_expenses_only
@@ -163,90 +138,99 @@ class AnalyticsService:
         else:
             savings_rate = 0
 
-        # Get categories and currencies
-        categories = Category.query.filter_by(user_id=user_id).order_by(Category.name).all()
-        currencies = Currency.query.all()
-
-        # Calculate asset and debt trends
-        asset_debt_trends = calculate_asset_debt_trends(current_user)
-
         return {
-            'expenses': expenses,
-            'expense_splits': expense_splits,
-            'top_categories': self._get_category_spending(expenses, expense_splits),
-            'monthly_totals': monthly_totals,
-            'total_expenses': total_expenses,
+            'total_expenses': aggregator.total_expenses,
             'total_expenses_only': total_expenses_only,
-            'current_month_total': current_month_total,
-            'current_month_expenses_only': current_month_expenses_only,
-            'unique_cards': list(unique_cards),
-            'users': users,
-            'groups': groups,
-            'iou_data': iou_data,
-            'base_currency': base_currency,
-            'budget_summary': budget_summary,
-            'currencies': currencies,
-            'categories': categories,
-            'monthly_labels': monthly_labels,
-            'monthly_amounts': monthly_amounts,
+            'current_month_total': aggregator.current_month_total,
+            'current_month_expenses_only': aggregator.current_month_expenses_only,
+            'unique_cards': list(aggregator.unique_cards),
             'total_income': total_income,
-            'total_transfers': total_transfers,
+            'total_transfers': aggregator.total_transfers,
             'net_cash_flow': net_cash_flow,
-            'savings_rate': savings_rate,
-            'asset_trends_months': asset_debt_trends['months'],
-            'asset_trends': asset_debt_trends['assets'],
-            'debt_trends': asset_debt_trends['debts'],
-            'total_assets': asset_debt_trends['total_assets'],
-            'total_debts': asset_debt_trends['total_debts'],
-            'net_worth': asset_debt_trends['net_worth'],
-            'investment_total': asset_debt_trends['investment_total'],
-            'now': now
+            'savings_rate': savings_rate
         }
 
-    def _calculate_iou_data(self, user_id, expenses, expense_splits):
-        """Calculate IOU balances between users"""
-        from types import SimpleNamespace
+    def _dashboard_monthly(self, context):
+        aggregator = context.aggregator.monthly()
+        monthly_labels, monthly_amounts = aggregator.monthly_series()
+        return {
+            'monthly_totals': aggregator.monthly_totals,
+            'monthly_labels': monthly_labels,
+            'monthly_amounts': monthly_amounts
+        }
 
-        owes_me = {}  # People who owe current user
-        i_owe = {}    # People current user owes
+    def _dashboard_monthly_breakdown(self, context):
+        """Expenses of the last BREAKDOWN_MONTHS months by category and account, newest month first"""
+        from src.services.analytics.trends import add_months
 
-        for expense in expenses:
-            splits = expense_splits[expense.id]
-            payer_id = splits['payer']['id']
+        aggregates = AnalyticsAggregates(context.user_id)
+        start = add_months(context.now, 1 - self.BREAKDOWN_MONTHS)
 
-            # If current user is the payer
-            if payer_id == user_id:
-                # Track what others owe current user
-                for split in splits['splits']:
-                    split_user_id = split['id']
-                    user_name = split['name']
-                    amount = split['amount']
+        months = {}
 
-                    if split_user_id not in owes_me:
-                        owes_me[split_user_id] = {'name': user_name, 'amount': 0}
-                    owes_me[split_user_id]['amount'] += amount
+        def month_entry(month):
+            if month not in months:
+                months[month] = {'month': month, 'total': 0, 'count': 0, 'categories': [], 'accounts': []}
+            return months[month]
 
-            # If current user is in the splits (but not the payer)
-            elif user_id in [split['id'] for split in splits['splits']]:
-                payer = User.query.filter_by(id=payer_id).first()
+        for month, name, color, amount, count in aggregates.monthly_category_expenses(start):
+            entry = month_entry(month)
+            entry['total'] += abs(amount or 0)
+            entry['count'] += count
+            entry['categories'].append({'name': name or 'Uncategorized', 'color': color, 'total': abs(amount or 0)})
 
-                # Find current user's split amount
-                current_user_split = next((split['amount'] for split in splits['splits'] if split['id'] == user_id), 0)
+        for month, name, amount in aggregates.monthly_account_expenses(start):
+            month_entry(month)['accounts'].append({'name': name or 'Unknown', 'total': abs(amount or 0)})
 
-                if payer_id not in i_owe:
-                    i_owe[payer_id] = {'name': payer.name if payer else 'Unknown', 'amount': 0}
-                i_owe[payer_id]['amount'] += current_user_split
+        for entry in months.values():
+            entry['categories'].sort(key=lambda item: -item['total'])
+            entry['accounts'].sort(key=lambda item: -item['total'])
 
-        # Calculate net balance
-        total_owed = sum(data['amount'] for data in owes_me.values())
-        total_owing = sum(data['amount'] for data in i_owe.values())
-        net_balance = total_owed - total_owing
+        return {'monthly_breakdown': sorted(months.values(), key=lambda entry: entry['month'], reverse=True)}
 
-        return SimpleNamespace(
-            owes_me=owes_me,
-            i_owe=i_owe,
-            net_balance=net_balance
-        )
+    def _dashboard_top_categories(self, context):
+        return {'top_categories': context.aggregator.top_categories()}
+
+    def _dashboard_iou(self, context):
+        return {'iou_data': context.aggregator.iou_data()}
+
+    def _dashboard_budget_summary(self, context):
+        return {'budget_summary': self._calculate_budget_summary(context.user_id, context.now)}
+
+    def _dashboard_people(self, context):
+        return {
+            'users': User.query.all(),
+            'groups': Group.query.join(group_users).filter(group_users.c.user_id == context.user_id).all()
+        }
+
+    def _dashboard_currency(self, context):
+        from src.utils.helpers import get_base_currency
+        return {'base_currency': get_base_currency(context.current_user)}
+
+    def _dashboard_reference(self, context):
+        return {
+            'currencies': Currency.query.all(),
+            'categories': Category.query.filter_by(user_id=context.user_id).order_by(Category.name).all()
+        }
+
+    def _dashboard_assets(self, context):
+        from src.utils.helpers import calculate_asset_debt_trends
+
+        # Read-only: linked account balances are synced when holdings or prices
+        # change (see sync_investments_with_accounts), not on dashboard reads
+
+        # Calculate asset and debt trends
+        asset_debt_trends = calculate_asset_debt_trends(context.current_user)
+
+        return {
+            'asset_trends_months': asset_debt_trends['months'],
+            'asset_trends': asset_debt_trends['assets'],
+            'debt_trends': asset_debt_trends['debts'],
+            'total_assets': asset_debt_trends['total_assets'],
+            'total_debts': asset_debt_trends['total_debts'],
+            'net_worth': asset_debt_trends['net_worth'],
+            'investment_total': asset_debt_trends['investment_total']
+        }
 
     def _calculate_budget_summary(self, user_id, now):
         """Calculate budget summary for the current month"""
@@ -261,22 +245,17 @@ class AnalyticsService:
         over_budget_count = 0
         approaching_limit_count = 0
 
+        # Calculate spending for every budget category from this month's rollups
+        month_start = datetime(now.year, now.month, 1)
+        if now.month < 12:
+            month_end = datetime(now.year, now.month + 1, 1)
+        else:
+            month_end = datetime(now.year + 1, 1, 1)
+
+        category_spent = AnalyticsAggregates(user_id).own_amount_by_category(month_start, month_end)
+
         for budget in budgets:
-            # Calculate spending for this budget category
-            month_start = datetime(now.year, now.month, 1)
-            if now.month < 12:
-                month_end = datetime(now.year, now.month + 1, 1)
-            else:
-                month_end = datetime(now.year + 1, 1, 1)
-
-            expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.category_id == budget.category_id,
-                Expense.date >= month_start,
-                Expense.date < month_end
-            ).all()
-
-            spent = sum(e.amount for e in expenses if not hasattr(e, 'transaction_type') or e.transaction_type == 'expense')
+            spent = category_spent.get(budget.category_id, 0)
 
             total_budget += budget.amount
             total_spent += spent
@@ -305,124 +284,34 @@ class AnalyticsService:
             budgets=budget_items
         )
 
-    def _get_category_spending(self, expenses, expense_splits):
-        """Get top category spending for current month"""
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-
-        category_totals = {}
-
-        for expense in expenses:
-            # Skip non-expenses
-            if hasattr(expense, 'transaction_type') and expense.transaction_type != 'expense':
-                continue
-
-            # Filter expenses for the current month and year
-            if expense.date.month != current_month or expense.date.year != current_year:
-                continue
-
-            # Handle category splits first
-            if expense.category_splits:
-                for split in expense.category_splits:
-                    if split.category:
-                        category_name = split.category.name
-                        if category_name not in category_totals:
-                            category_totals[category_name] = {
-                                'amount': 0,
-                                'color': split.category.color,
-                                'icon': split.category.icon
-                            }
-                        category_totals[category_name]['amount'] += split.amount
-            else:
-                # Use single category
-                if expense.category:
-                    category_name = expense.category.name
-                    if category_name not in category_totals:
-                        category_totals[category_name] = {
-                            'amount': 0,
-                            'color': expense.category.color,
-                            'icon': expense.category.icon
-                        }
-                    category_totals[category_name]['amount'] += expense.amount
-
-        # Sort and return top categories as list of dicts
-        sorted_categories = sorted(
-            [
-                {
-                    'name': name,
-                    'amount': data['amount'],
-                    'color': data['color'],
-                    'icon': data['icon']
-                }
-                for name, data in category_totals.items()
-            ],
-            key=lambda x: x['amount'],
-            reverse=True
-        )[:6]  # Top 6 categories
-
-        return sorted_categories
-
-    def get_spending_trends(self, user_id, months=6):
-        """Get spending trends over time"""
+    def get_spending_trends(self, user_id, months=6, granularity='month'):
+        """Get spending trends over the last N calendar months, newest period first"""
+        engine = TrendEngine(user_id, months, granularity)
+
         trends = []
-        for i in range(months):
-            month_date = datetime.now() - timedelta(days=30*i)
-            expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.date >= datetime(month_date.year, month_date.month, 1),
-                Expense.date < datetime(month_date.year, month_date.month + 1, 1) if month_date.month < 12
-                    else datetime(month_date.year + 1, 1, 1)
-            ).all()
-            total = sum(e.amount for e in expenses)
-            trends.append({'month': month_date.strftime('%Y-%m'), 'total': total})
+        for period, totals in zip(engine.periods, engine.own_totals()):
+            trends.append({
+                'period': period['key'],
+                'month': period['start'].strftime('%Y-%m'),
+                'total': sum(totals.values())
+            })
+        trends.reverse()
         return trends
 
     def get_stats_data(self, user_id):
         """Get detailed statistics data"""
-        # Get base dashboard data
-        data = self.get_dashboard_data(user_id)
-
-        # Add monthly_income for stats page
-        from src.models.transaction import Expense
-        from sqlalchemy import or_
+        # Get base dashboard data, without the full transaction history or the system-wide user list
+        data = self.get_dashboard_data(
+            user_id, [section for section in self.DASHBOARD_SECTIONS if section not in ('transactions', 'people')]
+        )
 
-        # Get all expenses for the user
-        expenses = Expense.query.filter(
-            or_(
-                Expense.user_id == user_id,
-                Expense.split_with.like(f'%{user_id}%')
-            )
-        ).all()
-
-        # Pre-calculate splits
-        expense_splits = {}
-        for expense in expenses:
-            expense_splits[expense.id] = expense.calculate_splits()
-
-        # Track monthly income
-        monthly_income_dict = {}
-
-        for expense in expenses:
-            # Only process income transactions
-            if hasattr(expense, 'transaction_type') and expense.transaction_type == 'income':
-                month_key = expense.date.strftime('%Y-%m')
-
-                if month_key not in monthly_income_dict:
-                    monthly_income_dict[month_key] = 0
-
-                # Calculate user's portion of the income
-                splits = expense_splits[expense.id]
-                user_portion = 0
-
-                if splits['payer']['id'] == user_id:
-                    user_portion = splits['payer']['amount']
-                else:
-                    for split in splits['splits']:
-                        if split['id'] == user_id:
-                            user_portion = split['amount']
-                            break
-
-                monthly_income_dict[month_key] += user_portion
+        # Track the user's share of income per month
+        shares = AnalyticsAggregates(user_id).user_share_by_month()
+        monthly_income_dict = {
+            month_key: amount
+            for (month_key, transaction_type), amount in shares.items()
+            if transaction_type == 'income'
+        }
 
         # Create monthly_income array in same order as monthly_labels
         monthly_income = []
@@ -467,84 +356,33 @@ class AnalyticsService:
 
         return data
 
-    def get_cashflow_data(self, user_id, months=6):
-        """Get cash flow data for the last N months"""
-        from sqlalchemy import or_
-        from datetime import datetime, timedelta
-        from calendar import month_abbr
+    def get_cashflow_data(self, user_id, months=6, granularity='month'):
+        """Get cash flow data (the user's share of income and expenses) for the last N calendar months"""
+        engine = TrendEngine(user_id, months, granularity)
 
-        # Get all transactions for the user
-        expenses = Expense.query.filter(
-            or_(
-                Expense.user_id == user_id,
-                Expense.split_with.like(f'%{user_id}%')
-            )
-        ).all()
-
-        # Pre-calculate splits
-        expense_splits = {}
-        for expense in expenses:
-            expense_splits[expense.id] = expense.calculate_splits()
-
-        # Calculate last N months
-        now = datetime.now()
-        monthly_data = []
-
-        for i in range(months - 1, -1, -1):
-            # Calculate month
-            target_date = now - timedelta(days=30*i)
-            month_start = datetime(target_date.year, target_date.month, 1)
-
-            if target_date.month < 12:
-                month_end = datetime(target_date.year, target_date.month + 1, 1)
-            else:
-                month_end = datetime(target_date.year + 1, 1, 1)
-
-            # Calculate totals for this month
-            income = 0
-            expense_total = 0
-
-            for expense in expenses:
-                if expense.date >= month_start and expense.date < month_end:
-                    splits = expense_splits[expense.id]
-                    user_share = 0
-
-                    # Find user's share
-                    if splits['payer']['id'] == user_id:
-                        user_share = splits['payer']['amount']
-                    else:
-                        for split in splits['splits']:
-                            if split['id'] == user_id:
-                                user_share = split['amount']
-                                break
-
-                    # Categorize by transaction type
-                    if hasattr(expense, 'transaction_type'):
-                        if expense.transaction_type == 'income':
-                            income += user_share
-                        elif expense.transaction_type == 'expense':
-                            expense_total += user_share
-                    else:
-                        # Default to expense if no type
-                        expense_total += user_share
+        cashflow_data = []
+        for period, totals in zip(engine.periods, engine.share_totals()):
+            income = totals.get('income', 0)
+            expense_total = totals.get('expense', 0)
 
             savings = income - expense_total
 
-            monthly_data.append({
-                'month': month_abbr[target_date.month],
+            cashflow_data.append({
+                'period': period['key'],
+                'month': period['label'],
                 'income': round(income, 2),
                 'expenses': round(expense_total, 2),
                 'savings': round(savings, 2)
             })
 
-        return monthly_data
+        return cashflow_data
 
     def get_financial_health(self, user_id):
         """Calculate financial health metrics"""
         from datetime import datetime
 
         # Get dashboard data for base calculations
-        dashboard_data = self.get_dashboard_data(user_id)
+        dashboard_data = self.get_dashboard_data(user_id, ['totals', 'assets'])
 
         total_income = dashboard_data.get('total_income', 0)
         total_expenses = dashboard_data.get('total_expenses_only', 0)
@@ -604,7 +442,7 @@ class AnalyticsService:
         from calendar import month_abbr
 
         # Get current data
-        dashboard_data = self.get_dashboard_data(user_id)
+        dashboard_data = self.get_dashboard_data(user_id, ['assets'])
 
         current_assets = dashboard_data.get('total_assets', 0)
         current_liabilities = dashboard_data.get('total_debts', 0)
@@ -0,0 +1,232 @@
+"""
+SQL aggregation layer
+GROUP BY queries behind the dashboard, stats and cash flow metrics
+"""
+
+from sqlalchemy import func, literal_column
+from src.extensions import db
+from src.models.transaction import Expense, CategorySplit
+from src.models.category import Category
+from src.models.account import Account
+from src.models.user import User
+from src.models.rollup import MonthlyUserRollup
+from src.utils.split_calculator import SplitCalculator
+
+
+def month_bucket(column):
+    """'YYYY-MM' month bucket for a date column (SQLite strftime, PostgreSQL date_trunc)"""
+    # Format strings are inlined so SELECT and GROUP BY render the same expression
+    if db.engine.dialect.name == 'sqlite':
+        return func.strftime(literal_column("'%Y-%m'"), column)
+    return func.to_char(func.date_trunc(literal_column("'month'"), column), literal_column("'YYYY-MM'"))
+
+
+class AnalyticsAggregates:
+    """
+    Per-user aggregates over every transaction the user created or is split with
+    Month/type totals and user shares are read from monthly_user_rollups; the
+    card, account, payer and category breakdowns are GROUP BY queries over
+    expenses, and split transactions are the only rows loaded into Python.
+    """
+
+    # Split transactions per split calculation
+    BATCH_SIZE = 500
+
+    # Columns SplitCalculator.compute needs, plus what the metrics group on
+    SPLIT_COLUMNS = (
+        Expense.id, Expense.date, Expense.transaction_type, Expense.amount,
+        Expense.original_amount, Expense.currency_code, Expense.paid_by,
+        Expense.split_method, Expense.split_value, Expense.split_with,
+        Expense.split_details
+    )
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.month = month_bucket(Expense.date)
+
+    def _query(self, *columns, start=None, end=None):
+        query = db.session.query(*columns).select_from(Expense).filter(Expense.involving_user(self.user_id))
+        if start is not None:
+            query = query.filter(Expense.date >= start)
+        if end is not None:
+            query = query.filter(Expense.date < end)
+        return query
+
+    def _batches(self, query):
+        """Yield the query's rows in lists of BATCH_SIZE, streamed rather than loaded all at once"""
+        batch = []
+        for row in query.yield_per(self.BATCH_SIZE):
+            batch.append(row)
+            if len(batch) == self.BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _rollups(self, *columns, start=None, end=None):
+        """Query monthly_user_rollups; start/end are month boundaries (end exclusive)"""
+        query = db.session.query(*columns).filter(
+            MonthlyUserRollup.user_id == self.user_id,
+            MonthlyUserRollup.transaction_count > 0
+        )
+        if start is not None:
+            query = query.filter(MonthlyUserRollup.month >= start.strftime('%Y-%m'))
+        if end is not None:
+            query = query.filter(MonthlyUserRollup.month < end.strftime('%Y-%m'))
+        return query
+
+    def _rollup_totals(self, column, start=None, end=None):
+        rows = self._rollups(
+            MonthlyUserRollup.month, MonthlyUserRollup.transaction_type, func.sum(column), start=start, end=end
+        ).group_by(MonthlyUserRollup.month, MonthlyUserRollup.transaction_type)
+        return {(month, transaction_type): total for month, transaction_type, total in rows}
+
+    def monthly_type_totals(self):
+        """Total amount per month and transaction type, returns {(month, type): amount}"""
+        return self._rollup_totals(MonthlyUserRollup.total_amount)
+
+    def user_share_by_month(self, start=None, end=None):
+        """User's share of every transaction, returns {(month, type): amount}"""
+        return self._rollup_totals(MonthlyUserRollup.share_amount, start, end)
+
+    def own_amount_by_month(self, start=None, end=None):
+        """Full amount of transactions the user created, returns {(month, type): amount}"""
+        return self._rollup_totals(MonthlyUserRollup.own_amount, start, end)
+
+    def own_amount_by_category(self, start, end, transaction_type='expense'):
+        """Full amount of the user's own transactions per category, returns {category_id: amount}"""
+        rows = self._rollups(
+            MonthlyUserRollup.category_id, func.sum(MonthlyUserRollup.own_amount), start=start, end=end
+        ).filter(
+            MonthlyUserRollup.transaction_type == transaction_type
+        ).group_by(MonthlyUserRollup.category_id)
+        return {category_id: total for category_id, total in rows}
+
+    def monthly_card_totals(self):
+        """Expense amount per month and card, returns [(month, card, amount)]"""
+        return self._query(self.month, Expense.card_used, func.sum(Expense.amount)).filter(
+            Expense.transaction_type == 'expense'
+        ).group_by(self.month, Expense.card_used).all()
+
+    def monthly_account_totals(self):
+        """Expense amount per month and account, returns [(month, account name, amount)]"""
+        return self._query(self.month, Account.name, func.sum(Expense.amount)).join(
+            Account, Account.id == Expense.account_id
+        ).filter(
+            Expense.transaction_type == 'expense'
+        ).group_by(self.month, Expense.account_id, Account.name).all()
+
+    def monthly_category_expenses(self, start=None):
+        """
+        Expense amount and count per month and category from start on
+        Returns [(month, category name, category color, amount, count)]; name and
+        color are None for uncategorized expenses
+        """
+        return self._query(
+            self.month, Category.name, Category.color, func.sum(Expense.amount), func.count(Expense.id), start=start
+        ).outerjoin(
+            Category, Category.id == Expense.category_id
+        ).filter(
+            Expense.transaction_type == 'expense'
+        ).group_by(self.month, Expense.category_id, Category.name, Category.color).all()
+
+    def monthly_account_expenses(self, start=None):
+        """Expense amount per month and account from start on, returns [(month, account name or None, amount)]"""
+        return self._query(self.month, Account.name, func.sum(Expense.amount), start=start).outerjoin(
+            Account, Account.id == Expense.account_id
+        ).filter(
+            Expense.transaction_type == 'expense'
+        ).group_by(self.month, Expense.account_id, Account.name).all()
+
+    def monthly_payer_totals(self):
+        """
+        Amount carried by the payer of unsplit expenses per month
+        Returns [(month, payer email, amount)]; the email is None for unknown payers
+        """
+        return self._query(self.month, User.id, func.sum(Expense.amount)).outerjoin(
+            User, User.id == Expense.paid_by
+        ).filter(
+            Expense.transaction_type == 'expense',
+            Expense.has_no_splits(),
+            Expense.amount > 0
+        ).group_by(self.month, User.id).all()
+
+    def unique_cards(self, start=None, end=None):
+        """Distinct cards used for expenses in the window"""
+        rows = self._query(Expense.card_used, start=start, end=end).filter(
+            Expense.transaction_type == 'expense'
+        ).distinct()
+        return [card for card, in rows if card]
+
+    def category_totals(self, start=None, end=None):
+        """
+        Expense amount per category, honouring category splits
+        Returns {category name: {'amount', 'color', 'icon'}}
+        """
+        split_rows = self._query(CategorySplit.category_id, func.sum(CategorySplit.amount), start=start, end=end).join(
+            CategorySplit, CategorySplit.expense_id == Expense.id
+        ).filter(
+            Expense.transaction_type == 'expense'
+        ).group_by(CategorySplit.category_id).all()
+
+        has_category_splits = db.session.query(CategorySplit.id).filter(
+            CategorySplit.expense_id == Expense.id
+        ).exists()
+        expense_rows = self._query(Expense.category_id, func.sum(Expense.amount), start=start, end=end).filter(
+            Expense.transaction_type == 'expense',
+            Expense.category_id.isnot(None),
+            ~has_category_splits
+        ).group_by(Expense.category_id).all()
+
+        amounts = {}
+        for category_id, total in split_rows + expense_rows:
+            amounts[category_id] = amounts.get(category_id, 0) + total
+
+        categories = Category.query.filter(Category.id.in_(amounts)).all() if amounts else []
+
+        # Categories are reported by name, so same-named categories are merged
+        category_totals = {}
+        for category in categories:
+            if category.name not in category_totals:
+                category_totals[category.name] = {
+                    'amount': 0,
+                    'color': category.color,
+                    'icon': category.icon
+                }
+            category_totals[category.name]['amount'] += amounts[category.id]
+
+        return category_totals
+
+    def own_amounts(self, start=None, end=None):
+        """(date, transaction_type, amount) of every transaction the user created in the window"""
+        query = db.session.query(Expense.date, Expense.transaction_type, Expense.amount).filter(
+            Expense.user_id == self.user_id
+        )
+        if start is not None:
+            query = query.filter(Expense.date >= start)
+        if end is not None:
+            query = query.filter(Expense.date < end)
+        return query.all()
+
+    def user_shares(self, start=None, end=None):
+        """Yield (date, transaction_type, share) for every transaction involving the user in the window"""
+        users = {}
+        for batch in self._batches(self._query(*self.SPLIT_COLUMNS, start=start, end=end)):
+            batch_splits = SplitCalculator.compute_many(batch, users=users)
+            for row in batch:
+                yield row.date, row.transaction_type, SplitCalculator.user_share(batch_splits[row.id], self.user_id)
+
+    def split_expenses(self, start=None, end=None):
+        """
+        Yield (row, splits) for split transactions in the window
+        Rows are lightweight column tuples rather than Expense instances
+        """
+        rows = self._query(*self.SPLIT_COLUMNS, start=start, end=end).filter(
+            Expense.has_splits()
+        ).order_by(Expense.date.desc())
+
+        users = {}
+        for batch in self._batches(rows):
+            batch_splits = SplitCalculator.compute_many(batch, users=users)
+            for row in batch:
+                yield row, batch_splits[row.id]
@@ -0,0 +1,123 @@
+"""
+Trend engine
+Buckets a user's totals into calendar days, weeks, months or quarters with one query per window
+"""
+
+from bisect import bisect_right
+from calendar import month_abbr
+from datetime import datetime, timedelta
+from src.services.analytics.sql_aggregates import AnalyticsAggregates
+
+
+def add_months(moment, months):
+    """First day of the month `months` away from moment's month"""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class TrendEngine:
+    """
+    Trend series over the last `months` calendar months, bucketed by granularity
+    Month and quarter buckets are read from monthly_user_rollups; day and week
+    buckets come from a single query over the window. Rows are assigned to buckets in
+    one pass, so the number of buckets never adds queries.
+    """
+
+    GRANULARITIES = ('day', 'week', 'month', 'quarter')
+
+    def __init__(self, user_id, months=6, granularity='month', now=None):
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of: {', '.join(self.GRANULARITIES)}")
+        if months < 1:
+            raise ValueError('months must be at least 1')
+
+        self.user_id = user_id
+        self.months = months
+        self.granularity = granularity
+        self.now = now or datetime.now()
+        self.aggregates = AnalyticsAggregates(user_id)
+
+        # Window: the current calendar month and the (months - 1) before it,
+        # ending with the period that contains now
+        self.start = add_months(self.now, 1 - months)
+        self.end = min(add_months(self.now, 1), self._next_period(self._period_start(self.now)))
+        self.periods = self._build_periods()
+        self._starts = [period['start'] for period in self.periods]
+
+    def _period_start(self, moment):
+        if self.granularity == 'day':
+            return datetime(moment.year, moment.month, moment.day)
+        if self.granularity == 'week':
+            day = datetime(moment.year, moment.month, moment.day)
+            return day - timedelta(days=day.weekday())
+        if self.granularity == 'quarter':
+            return datetime(moment.year, (moment.month - 1) // 3 * 3 + 1, 1)
+        return datetime(moment.year, moment.month, 1)
+
+    def _next_period(self, start):
+        if self.granularity == 'day':
+            return start + timedelta(days=1)
+        if self.granularity == 'week':
+            return start + timedelta(days=7)
+        return add_months(start, 3 if self.granularity == 'quarter' else 1)
+
+    def _label(self, start):
+        """(key, short label) for a period starting at `start`"""
+        if self.granularity == 'day':
+            return start.strftime('%Y-%m-%d'), start.strftime('%b %d')
+        if self.granularity == 'week':
+            year, week, _ = start.isocalendar()
+            return f'{year}-W{week:02d}', start.strftime('%b %d')
+        if self.granularity == 'quarter':
+            quarter = (start.month - 1) // 3 + 1
+            return f'{start.year}-Q{quarter}', f'Q{quarter} {start.year}'
+        return start.strftime('%Y-%m'), month_abbr[start.month]
+
+    def _build_periods(self):
+        """Chronological periods covering the window; the first and last are clipped to it"""
+        periods = []
+        start = self._period_start(self.start)
+        while start < self.end:
+            end = self._next_period(start)
+            key, label = self._label(start)
+            periods.append({
+                'key': key,
+                'label': label,
+                'start': max(start, self.start),
+                'end': min(end, self.end)
+            })
+            start = end
+        return periods
+
+    def _bucket(self, moment):
+        """Index of the period containing moment, or None outside the window"""
+        if moment is None or moment < self.start or moment >= self.end:
+            return None
+        return bisect_right(self._starts, moment) - 1
+
+    def _fold(self, rows):
+        """Sum (moment, transaction_type, amount) rows into [{type: amount}] per period"""
+        buckets = [{} for _ in self.periods]
+        for moment, transaction_type, amount in rows:
+            index = self._bucket(moment)
+            if index is not None:
+                bucket = buckets[index]
+                bucket[transaction_type] = bucket.get(transaction_type, 0) + (amount or 0)
+        return buckets
+
+    def _monthly_rows(self, totals):
+        """Rollup {(month, type): amount} as (month start, type, amount) rows"""
+        for (month_key, transaction_type), amount in totals.items():
+            yield datetime.strptime(month_key, '%Y-%m'), transaction_type, amount
+
+    def own_totals(self):
+        """Full amount of transactions the user created, per period and transaction type"""
+        if self.granularity in ('day', 'week'):
+            return self._fold(self.aggregates.own_amounts(self.start, self.end))
+        return self._fold(self._monthly_rows(self.aggregates.own_amount_by_month(self.start, self.end)))
+
+    def share_totals(self):
+        """User's share of every transaction they are involved in, per period and transaction type"""
+        if self.granularity in ('day', 'week'):
+            return self._fold(self.aggregates.user_shares(self.start, self.end))
+        return self._fold(self._monthly_rows(self.aggregates.user_share_by_month(self.start, self.end)))
@@ -351,16 +351,22 @@ def delete_account():
         user_id = current_user.id
 
         # Delete all user data
-        Expense.query.filter_by(user_id=user_id).delete()
+        from src.models.rollup import MonthlyUserRollup
+        scope = {'data_version_users': {user_id}}
+        expense_users = MonthlyUserRollup.users_of(Expense.query.filter_by(user_id=user_id))
+        db.session.execute(
+            db.delete(Expense).where(Expense.user_id == user_id),
+            execution_options={'data_version_users': expense_users}
+        )
         Income.query.filter_by(user_id=user_id).delete()
-        Budget.query.filter_by(user_id=user_id).delete()
-        Category.query.filter_by(user_id=user_id).delete()
+        db.session.execute(db.delete(Budget).where(Budget.user_id == user_id), execution_options=scope)
+        db.session.execute(db.delete(Category).where(Category.user_id == user_id), execution_options=scope)
 
         # Delete investments
         portfolios = Portfolio.query.filter_by(user_id=user_id).all()
         for portfolio in portfolios:
             Holding.query.filter_by(portfolio_id=portfolio.id).delete()
-        Portfolio.query.filter_by(user_id=user_id).delete()
+        db.session.execute(db.delete(Portfolio).where(Portfolio.user_id == user_id), execution_options=scope)
 
         # Delete group memberships
         groups = Group.query.filter_by(created_by=user_id).all()
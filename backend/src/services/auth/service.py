@@ -181,8 +181,10 @@ class AuthService:
 
         try:
             from src.models.budget import Budget
+            from src.models.budget_spend import BudgetPeriodSpend
             from src.models.recurring import RecurringExpense, IgnoredRecurringPattern
-            from src.models.transaction import Expense
+            from src.models.transaction import Expense, ExpenseParticipant
+            from src.models.rollup import MonthlyUserRollup
             from src.models.group import Settlement, Group
             from src.models.category import CategoryMapping, Tag, Category
             from src.models.account import SimpleFin, Account
@@ -191,7 +193,11 @@ class AuthService:
             # Delete all related data in the correct order
             # 1. First handle budgets (they reference categories)
             current_app.logger.info("Deleting budgets...")
-            Budget.query.filter_by(user_id=user_id).delete()
+            BudgetPeriodSpend.delete_for_users({user_id})
+            db.session.execute(
+                db.delete(Budget).where(Budget.user_id == user_id),
+                execution_options={'data_version_users': {user_id}}
+            )
 
             # 2. Delete recurring expenses
             current_app.logger.info("Deleting recurring expenses...")
@@ -199,13 +205,26 @@ class AuthService:
 
             # 3. Delete expenses
             current_app.logger.info("Deleting expenses...")
-            Expense.query.filter_by(user_id=user_id).delete()
+            rollup_users = MonthlyUserRollup.users_of(Expense.query.filter_by(user_id=user_id))
+            ExpenseParticipant.query.filter(
+                ExpenseParticipant.expense_id.in_(db.session.query(Expense.id).filter_by(user_id=user_id))
+            ).delete(synchronize_session=False)
+            db.session.execute(
+                db.delete(Expense).where(Expense.user_id == user_id),
+                execution_options={'data_version_users': rollup_users}
+            )
+            MonthlyUserRollup.rebuild_for_users(rollup_users)
 
             # 4. Delete settlements
             current_app.logger.info("Deleting settlements...")
-            Settlement.query.filter(
-                or_(Settlement.payer_id == user_id, Settlement.receiver_id == user_id)
-            ).delete(synchronize_session=False)
+            settlements = or_(Settlement.payer_id == user_id, Settlement.receiver_id == user_id)
+            settlement_users = {user_id}
+            for payer_id, receiver_id in db.session.query(Settlement.payer_id, Settlement.receiver_id).filter(settlements):
+                settlement_users |= {payer_id, receiver_id}
+            db.session.execute(
+                db.delete(Settlement).where(settlements),
+                execution_options={'synchronize_session': False, 'data_version_users': settlement_users}
+            )
 
             # 5. Delete category mappings
             current_app.logger.info("Deleting category mappings...")
@@ -221,7 +240,10 @@ class AuthService:
 
             # 8. Handle user's accounts
             current_app.logger.info("Deleting accounts...")
-            Account.query.filter_by(user_id=user_id).delete()
+            db.session.execute(
+                db.delete(Account).where(Account.user_id == user_id),
+                execution_options={'data_version_users': {user_id}}
+            )
 
             # 9. Handle tags - first remove from association table
             current_app.logger.info("Handling tags...")
@@ -236,7 +258,10 @@ class AuthService:
 
             # 10. Categories can now be deleted
             current_app.logger.info("Deleting categories...")
-            Category.query.filter_by(user_id=user_id).delete()
+            db.session.execute(
+                db.delete(Category).where(Category.user_id == user_id),
+                execution_options={'data_version_users': {user_id}}
+            )
 
             # 11. Handle group memberships
             current_app.logger.info("Handling group memberships...")
@@ -0,0 +1,224 @@
+"""
+Budget Evaluator
+Computes spend for many budgets at once
+"""
+
+from calendar import monthrange
+from datetime import datetime, timedelta
+from flask import has_request_context
+from sqlalchemy.orm import contains_eager
+from src.extensions import db
+from src.models.transaction import Expense, CategorySplit
+from src.models.budget import period_bounds
+from src.services.category.tree import get_category_tree
+from src.utils.split_calculator import SplitCalculator
+
+
+class BudgetEvaluator:
+    """
+    Evaluates every budget of a user at once. Windows that are whole budget
+    periods are read from the budget_period_spend counters; any other window
+    is computed with one expense query and one category split query over the
+    union of their categories and periods, attributed to each budget in memory.
+    Both paths attribute spend exactly like Budget.calculate_spent_amount().
+    """
+
+    @staticmethod
+    def period_dates(budget, period=None):
+        """
+        Inclusive (start, end) a budget is evaluated over
+        period is None for the budget's current period or (year, month) for a calendar month
+        """
+        if period:
+            year, month = period
+            return datetime(year, month, 1), datetime(year, month, monthrange(year, month)[1], 23, 59, 59)
+        return budget.get_current_period_dates()
+
+    @staticmethod
+    def user_share(expense, splits, user_id):
+        """
+        The user's share of an expense, or None when the user has no share
+        The payer's full share counts only when the payer is not also listed in split_with
+        """
+        if expense.paid_by == user_id and (not expense.split_with or user_id not in expense.split_with.split(',')):
+            return splits['payer']['amount']
+        for split in splits['splits']:
+            if split['email'] == user_id:
+                return split['amount']
+        return None
+
+    @classmethod
+    def budget_categories(cls, budgets):
+        """{budget: [category_id, ...]} including direct subcategories where the budget asks for them"""
+        trees = {}
+        categories = {}
+        for budget in budgets:
+            if budget.include_subcategories:
+                if budget.user_id not in trees:
+                    trees[budget.user_id] = get_category_tree(budget.user_id)
+                categories[budget] = trees[budget.user_id].subtree_ids(budget.category_id, depth=1)
+            else:
+                categories[budget] = [budget.category_id]
+        return categories
+
+    @classmethod
+    def evaluate(cls, user_id, budgets, period=None):
+        """
+        Spent amount for every budget, returns {budget.id: spent}
+        period is None for each budget's current period or (year, month) for a calendar month.
+        Within a request, results are memoized by (budget id, period bounds, data version),
+        so repeated spent/remaining/percentage/status lookups share one computation.
+        """
+        from src.models.data_version import request_memo, request_data_version
+
+        budgets = list(budgets)
+        if not budgets:
+            return {}
+
+        windows = {budget: cls.period_dates(budget, period) for budget in budgets}
+
+        if not has_request_context():
+            return cls._compute(user_id, budgets, windows)
+
+        version = request_data_version(user_id)
+        memo = request_memo('budget_spend')
+        keys = {budget: (budget.id, *windows[budget], version) for budget in budgets}
+
+        results = {}
+        misses = []
+        for budget in budgets:
+            if budget.id is not None and keys[budget] in memo:
+                results[budget.id] = memo[keys[budget]]
+            else:
+                misses.append(budget)
+
+        if misses:
+            computed = cls._compute(user_id, misses, {budget: windows[budget] for budget in misses})
+            results.update(computed)
+            for budget in misses:
+                if budget.id is not None:
+                    memo[keys[budget]] = computed[budget.id]
+
+        return results
+
+    @classmethod
+    def history(cls, budgets, periods, now=None):
+        """
+        Spend over each budget's last `periods` periods, newest first
+        Returns {budget.id: [(start, end, spent), ...]} from one aggregate query
+        over the budget_period_spend counters, whatever the number of periods.
+        """
+        from src.models.budget_spend import BudgetPeriodSpend
+
+        budgets = [budget for budget in budgets if budget.id is not None]
+        if not budgets:
+            return {}
+
+        now = now or datetime.utcnow()
+        windows = {}
+        for budget in budgets:
+            start, end = period_bounds(budget.period, now)
+            windows[budget.id] = [(start, end)]
+            for _ in range(periods - 1):
+                start, end = period_bounds(budget.period, start - timedelta(seconds=1))
+                windows[budget.id].append((start, end))
+
+        first_start = min(window[-1][0] for window in windows.values())
+        rows = db.session.query(
+            BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start, BudgetPeriodSpend.spent
+        ).filter(
+            BudgetPeriodSpend.budget_id.in_(windows),
+            BudgetPeriodSpend.period_start >= first_start
+        )
+        spent = {(budget_id, period_start): total for budget_id, period_start, total in rows}
+
+        return {
+            budget_id: [(start, end, spent.get((budget_id, start), 0.0)) for start, end in window]
+            for budget_id, window in windows.items()
+        }
+
+    @classmethod
+    def _compute(cls, user_id, budgets, windows):
+        """Evaluate budgets over their (start, end) windows, returns {budget.id: spent}"""
+        from src.models.budget_spend import BudgetPeriodSpend
+
+        counted = [
+            budget for budget in budgets
+            if budget.id is not None and windows[budget] == period_bounds(budget.period, windows[budget][0])
+        ]
+        results = {}
+        if counted:
+            stored = BudgetPeriodSpend.read({(budget.id, windows[budget][0]) for budget in counted})
+            results = {budget.id: stored.get((budget.id, windows[budget][0]), 0.0) for budget in counted}
+
+        budgets = [budget for budget in budgets if budget.id not in results]
+        if budgets:
+            results.update(cls._compute_raw(user_id, budgets, windows))
+        return results
+
+    @classmethod
+    def _compute_raw(cls, user_id, budgets, windows):
+        """Evaluate budgets from raw expenses and category splits"""
+        categories = cls.budget_categories(budgets)
+
+        all_category_ids = {category_id for category_ids in categories.values() for category_id in category_ids}
+        window_start = min(start for start, _ in windows.values())
+        window_end = max(end for _, end in windows.values())
+
+        # Whole-transaction spend, indexed by category
+        expenses = Expense.query.filter(
+            Expense.user_id == user_id,
+            Expense.date >= window_start,
+            Expense.date <= window_end,
+            Expense.category_id.in_(all_category_ids)
+        ).all()
+
+        plain_expenses = [expense for expense in expenses if not expense.has_category_splits]
+        users = {}
+        expense_splits = SplitCalculator.compute_many(plain_expenses, users=users)
+
+        expenses_by_category = {}
+        for expense in plain_expenses:
+            share = cls.user_share(expense, expense_splits[expense.id], user_id)
+            if share is not None:
+                expenses_by_category.setdefault(expense.category_id, []).append((expense.date, share))
+
+        # Category split spend: the split amount scaled by the user's share of the transaction
+        category_splits = CategorySplit.query.join(
+            Expense, CategorySplit.expense_id == Expense.id
+        ).options(
+            contains_eager(CategorySplit.expense)
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.date >= window_start,
+            Expense.date <= window_end,
+            CategorySplit.category_id.in_(all_category_ids)
+        ).all()
+
+        split_expenses = {cat_split.expense.id: cat_split.expense for cat_split in category_splits if cat_split.expense}
+        split_expense_splits = SplitCalculator.compute_many(split_expenses.values(), users=users)
+
+        splits_by_category = {}
+        for cat_split in category_splits:
+            expense = cat_split.expense
+            if not expense:
+                continue
+
+            share = cls.user_share(expense, split_expense_splits[expense.id], user_id)
+            if share is not None and expense.amount > 0:
+                splits_by_category.setdefault(cat_split.category_id, []).append(
+                    (expense.date, cat_split.amount * (share / expense.amount))
+                )
+
+        results = {}
+        for budget in budgets:
+            start, end = windows[budget]
+            total_spent = 0.0
+            for by_category in (expenses_by_category, splits_by_category):
+                for category_id in categories[budget]:
+                    for date, amount in by_category.get(category_id, ()):
+                        if start <= date <= end:
+                            total_spent += amount
+            results[budget.id] = total_spent
+
+        return results
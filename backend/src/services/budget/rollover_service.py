@@ -3,60 +3,158 @@ Budget Rollover Service
 Handles automatic rollover of unused budget amounts to the next period
 """
 
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from src.extensions import db
-from src.models.budget import Budget
+from flask import current_app
+from sqlalchemy import bindparam
+from src.extensions import db, scheduler
+from src.models.budget import Budget, period_bounds
+from src.models.budget_spend import BudgetPeriodSpend
+from src.models.data_version import bump_data_version
 import logging
 
 logger = logging.getLogger(__name__)
 
+# App inherited by forked worker processes (see process_all_rollovers)
+_worker_app = None
+_worker_ready = False
+
+
+def _process_batch_in_worker(user_ids, now):
+    """Process pool entry point; runs in a forked copy of the parent process"""
+    global _worker_ready
+    with _worker_app.app_context():
+        if not _worker_ready:
+            # Connections inherited from the parent must not be shared
+            db.engine.dispose()
+            _worker_ready = True
+        return BudgetRolloverService.process_user_batch(user_ids, now)
+
 
 class BudgetRolloverService:
-    """Service for processing budget rollovers"""
+    """
+    Service for processing budget rollovers
+    Budgets are processed in batches of users. Each batch reads the spend of
+    every finished period from the budget_period_spend counters with one
+    aggregate query, writes all updates with chunked bulk UPDATEs and commits
+    on its own. Processed budgets move their start_date into the current
+    period and are no longer due, so an interrupted run simply resumes where
+    it stopped when run again.
+    """
+
+    # Users per batch (one transaction each)
+    USER_BATCH_SIZE = 200
+
+    # Budgets per bulk UPDATE statement
+    UPDATE_CHUNK_SIZE = 500
 
     @staticmethod
     def get_next_period_start(budget):
-        """Calculate the start date of the next budget period"""
-        current_start, current_end = budget.get_current_period_dates()
-
-        if budget.period == 'weekly':
-            return current_end + timedelta(seconds=1)
-        elif budget.period == 'monthly':
-            # Move to first day of next month
-            if current_end.month == 12:
-                return current_end.replace(year=current_end.year + 1, month=1, day=1,
-                                          hour=0, minute=0, second=0, microsecond=0)
-            else:
-                return current_end.replace(month=current_end.month + 1, day=1,
-                                          hour=0, minute=0, second=0, microsecond=0)
-        elif budget.period == 'yearly':
-            return current_end.replace(year=current_end.year + 1, month=1, day=1,
-                                      hour=0, minute=0, second=0, microsecond=0)
-
-        return current_end + timedelta(days=1)
+        """Calculate the start date of the period after the one the budget is tracking"""
+        _, current_end = period_bounds(budget.period, budget.start_date)
+        return current_end + timedelta(seconds=1)
 
     @staticmethod
-    def should_process_rollover(budget):
+    def should_process_rollover(budget, now=None):
         """Check if a budget is ready for rollover processing"""
         if not budget.active or not budget.rollover:
             return False
 
-        # Get current period end date
-        _, current_end = budget.get_current_period_dates()
-        now = datetime.utcnow()
+        # The period containing start_date is the one being tracked; it rolls over once it has ended
+        _, current_end = period_bounds(budget.period, budget.start_date)
+        return (now or datetime.utcnow()) > current_end
+
+    @staticmethod
+    def plan_rollover(budget, spends, now):
+        """
+        Close every finished period since the budget's start_date
+        `spends` maps period start to spent for this budget. Returns
+        (rollover_amount, next_period_start), or None when nothing has ended.
+        """
+        start, end = period_bounds(budget.period, budget.start_date)
+        if now <= end:
+            return None
+
+        rollover_amount = budget.rollover_amount or 0.0
+        while now > end:
+            # Only rollover positive amounts (unused budget)
+            unused = budget.amount + rollover_amount - spends.get(start, 0.0)
+            rollover_amount = max(0, unused)
+            start, end = period_bounds(budget.period, end + timedelta(seconds=1))
 
-        # Check if we're past the end of the current period
-        return now > current_end
+        return rollover_amount, start
 
     @staticmethod
-    def calculate_rollover_amount(budget):
+    def calculate_rollover_amount(budget, now=None):
         """Calculate the amount to rollover to the next period"""
-        spent = budget.calculate_spent_amount()
-        total_budget = budget.get_total_budget()
-        unused = total_budget - spent
+        spends = BudgetRolloverService._period_spends([budget])
+        plan = BudgetRolloverService.plan_rollover(budget, spends.get(budget.id, {}), now or datetime.utcnow())
+        return plan[0] if plan else 0
 
-        # Only rollover positive amounts (unused budget)
-        return max(0, unused)
+    @staticmethod
+    def _period_spends(budgets):
+        """{budget_id: {period_start: spent}} for every period from each budget's start_date on"""
+        if not budgets:
+            return {}
+
+        first_start = min(period_bounds(budget.period, budget.start_date)[0] for budget in budgets)
+        rows = db.session.query(
+            BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start, BudgetPeriodSpend.spent
+        ).filter(
+            BudgetPeriodSpend.budget_id.in_([budget.id for budget in budgets]),
+            BudgetPeriodSpend.period_start >= first_start
+        )
+
+        spends = {}
+        for budget_id, period_start, spent in rows:
+            spends.setdefault(budget_id, {})[period_start] = spent
+        return spends
+
+    @staticmethod
+    def _write_updates(updates, now):
+        """Apply {budget_id, rollover_amount, start_date} updates in chunked bulk UPDATEs"""
+        table = Budget.__table__
+        statement = table.update().where(
+            table.c.id == bindparam('b_id')
+        ).values(
+            rollover_amount=bindparam('b_rollover_amount'),
+            start_date=bindparam('b_start_date'),
+            updated_at=now
+        )
+
+        chunk_size = BudgetRolloverService.UPDATE_CHUNK_SIZE
+        for i in range(0, len(updates), chunk_size):
+            db.session.execute(statement, updates[i:i + chunk_size])
+
+    @staticmethod
+    def process_user_batch(user_ids, now=None):
+        """Process rollovers for every due budget of the given users in one transaction"""
+        now = now or datetime.utcnow()
+
+        budgets = Budget.query.with_entities(
+            Budget.id, Budget.user_id, Budget.amount, Budget.period, Budget.start_date, Budget.rollover_amount
+        ).filter(
+            Budget.user_id.in_(user_ids),
+            Budget.active == True,
+            Budget.rollover == True
+        ).all()
+
+        due = [budget for budget in budgets if now > period_bounds(budget.period, budget.start_date)[1]]
+        spends = BudgetRolloverService._period_spends(due)
+
+        updates = []
+        for budget in due:
+            rollover_amount, next_start = BudgetRolloverService.plan_rollover(budget, spends.get(budget.id, {}), now)
+            updates.append({'b_id': budget.id, 'b_rollover_amount': rollover_amount, 'b_start_date': next_start})
+
+        if updates:
+            BudgetRolloverService._write_updates(updates, now)
+            bump_data_version({budget.user_id for budget in due})
+        db.session.commit()
+
+        return {'processed': len(updates), 'total': len(budgets)}
 
     @staticmethod
     def process_budget_rollover(budget):
@@ -65,19 +163,19 @@ class BudgetRolloverService:
             if not BudgetRolloverService.should_process_rollover(budget):
                 return False
 
-            # Calculate unused amount from current period
-            rollover_amount = BudgetRolloverService.calculate_rollover_amount(budget)
+            now = datetime.utcnow()
+            spends = BudgetRolloverService._period_spends([budget])
+            rollover_amount, next_start = BudgetRolloverService.plan_rollover(budget, spends.get(budget.id, {}), now)
 
             logger.info(f"Processing rollover for budget {budget.id}: "
                        f"User={budget.user_id}, Category={budget.category_id}, "
                        f"Amount={rollover_amount}")
 
-            # Update the budget with the new rollover amount
             budget.rollover_amount = rollover_amount
-            budget.updated_at = datetime.utcnow()
+            budget.updated_at = now
 
             # Update start_date to mark the beginning of the new period
-            budget.start_date = BudgetRolloverService.get_next_period_start(budget)
+            budget.start_date = next_start
 
             db.session.commit()
 
@@ -92,29 +190,90 @@ class BudgetRolloverService:
             return False
 
     @staticmethod
-    def process_all_rollovers():
-        """Process rollovers for all eligible budgets"""
-        logger.info("Starting budget rollover processing...")
+    def _user_batches(batch_size):
+        """Users with rollover budgets, in batches, paged by user id"""
+        query = db.session.query(Budget.user_id).filter(
+            Budget.active == True,
+            Budget.rollover == True
+        ).distinct().order_by(Budget.user_id)
 
-        # Get all active budgets with rollover enabled
-        budgets = Budget.query.filter_by(active=True, rollover=True).all()
+        last_user_id = None
+        while True:
+            page = query if last_user_id is None else query.filter(Budget.user_id > last_user_id)
+            user_ids = [user_id for user_id, in page.limit(batch_size)]
+            if not user_ids:
+                return
+            yield user_ids
+            last_user_id = user_ids[-1]
+
+    @staticmethod
+    def process_all_rollovers(workers=1, batch_size=None, now=None):
+        """
+        Process rollovers for all eligible budgets
+        With workers > 1, user batches are fanned out across a pool of forked
+        processes. Only the process-rollovers CLI command asks for that: the
+        nightly job runs inside server processes, which must not fork, so it
+        runs serially, as does SQLite.
+        """
+        global _worker_app
+
+        now = now or datetime.utcnow()
+        batch_size = batch_size or BudgetRolloverService.USER_BATCH_SIZE
+        if db.engine.dialect.name == 'sqlite':
+            workers = 1
+        if workers > 1 and scheduler.running:
+            logger.warning("Not forking rollover workers from a process running the scheduler; running serially")
+            workers = 1
+
+        logger.info("Starting budget rollover processing...")
+        started = time.monotonic()
 
         processed_count = 0
         error_count = 0
+        total = 0
 
-        for budget in budgets:
-            try:
-                if BudgetRolloverService.process_budget_rollover(budget):
-                    processed_count += 1
-            except Exception as e:
-                logger.error(f"Failed to process budget {budget.id}: {str(e)}")
+        def record(user_ids, result=None, error=None):
+            nonlocal processed_count, error_count, total
+            if error is not None:
+                logger.error(f"Failed to process rollovers for {len(user_ids)} users "
+                             f"starting at {user_ids[0]}: {str(error)}")
                 error_count += 1
+                return
+            processed_count += result['processed']
+            total += result['total']
+
+        if workers > 1:
+            _worker_app = current_app._get_current_object()
+            batches = list(BudgetRolloverService._user_batches(batch_size))
+            # Forked children inherit the parent's pooled connections; drop them first
+            db.session.remove()
+            db.engine.dispose()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [(user_ids, pool.submit(_process_batch_in_worker, user_ids, now)) for user_ids in batches]
+                for user_ids, future in futures:
+                    try:
+                        record(user_ids, future.result())
+                    except Exception as e:
+                        record(user_ids, error=e)
+        else:
+            for user_ids in BudgetRolloverService._user_batches(batch_size):
+                try:
+                    record(user_ids, BudgetRolloverService.process_user_batch(user_ids, now))
+                except Exception as e:
+                    db.session.rollback()
+                    record(user_ids, error=e)
+
+        elapsed = time.monotonic() - started
+        budgets_per_second = total / elapsed if elapsed > 0 else 0.0
 
         logger.info(f"Budget rollover processing completed: "
-                   f"{processed_count} budgets processed, {error_count} errors")
+                   f"{processed_count} budgets processed, {error_count} errors, "
+                   f"{total} checked in {elapsed:.2f}s ({budgets_per_second:.0f} budgets/sec)")
 
         return {
             'processed': processed_count,
             'errors': error_count,
-            'total': len(budgets)
+            'total': total,
+            'elapsed': elapsed,
+            'budgets_per_second': budgets_per_second
         }
@@ -210,7 +210,9 @@ def budget_transactions(budget_id):
 @login_required_dev
 def trends_data():
     """Get budget trends data for charts"""
-    trends = budget_service.get_trends_data(current_user.id)
+    periods = request.args.get('periods', BudgetService.TREND_PERIODS, type=int)
+    periods = max(1, min(periods, BudgetService.MAX_TREND_PERIODS))
+    trends = budget_service.get_trends_data(current_user.id, periods)
 
     return jsonify({
         'success': True,
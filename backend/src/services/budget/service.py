@@ -5,15 +5,22 @@ Business logic for budget management and tracking
 
 from datetime import datetime
 from flask import current_app
+from sqlalchemy import func
 from src.extensions import db
 from src.models.budget import Budget
 from src.models.category import Category
+from src.services.budget.evaluator import BudgetEvaluator
+from src.services.category.tree import get_category_tree
 from src.utils.currency_converter import get_base_currency
 
 
 class BudgetService:
     """Service class for budget operations"""
 
+    # Periods of history in budget trends by default, and at most
+    TREND_PERIODS = 6
+    MAX_TREND_PERIODS = 60
+
     def __init__(self):
         pass
 
@@ -31,13 +38,15 @@ class BudgetService:
 
         budgets = Budget.query.filter_by(user_id=user_id).order_by(Budget.created_at.desc()).all()
 
+        # Calculate spent for the specified month for every budget at once
+        spent_by_budget = BudgetEvaluator.evaluate(user_id, budgets, (year, month))
+
         budget_data = []
         total_month_budget = 0
         total_month_spent = 0
 
         for budget in budgets:
-            # Calculate spent for the specified month
-            spent = budget.calculate_spent_amount(year=year, month=month)
+            spent = spent_by_budget[budget.id]
             remaining = budget.amount - spent
             percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
 
@@ -248,32 +257,37 @@ class BudgetService:
             return False, 'This budget does not include subcategories', None
 
         # Get category and its subcategories
-        category = Category.query.get(budget.category_id)
-        if not category:
+        tree = get_category_tree(user_id)
+        if budget.category_id not in tree:
             return False, 'Category not found', None
 
         period_start, period_end = budget.get_current_period_dates()
 
-        # Calculate spending for each subcategory
+        # Spending for every subcategory in one grouped query
         from src.models.transaction import Expense
-        spending_data = []
-
-        for subcategory in category.subcategories:
-            # Get expenses for this subcategory in the budget period
-            expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.category_id == subcategory.id,
-                Expense.date >= period_start,
-                Expense.date <= period_end
-            ).all()
-
-            total = sum(expense.amount for expense in expenses)
+        subcategory_ids = tree.children(budget.category_id)
+        totals = {}
+        if subcategory_ids:
+            totals = {
+                category_id: (total, count)
+                for category_id, total, count in db.session.query(
+                    Expense.category_id, func.sum(Expense.amount), func.count(Expense.id)
+                ).filter(
+                    Expense.user_id == user_id,
+                    Expense.category_id.in_(subcategory_ids),
+                    Expense.date >= period_start,
+                    Expense.date <= period_end
+                ).group_by(Expense.category_id)
+            }
 
+        spending_data = []
+        for subcategory_id in subcategory_ids:
+            total, count = totals.get(subcategory_id, (0, 0))
             if total > 0:
                 spending_data.append({
-                    'subcategory': subcategory,
+                    'subcategory': tree.nodes[subcategory_id],
                     'amount': total,
-                    'count': len(expenses)
+                    'count': count
                 })
 
         # Sort by amount descending
@@ -299,48 +313,40 @@ class BudgetService:
         from src.models.transaction import Expense
 
         if budget.include_subcategories:
-            # Get category and all its subcategories
-            category = Category.query.get(budget.category_id)
-            category_ids = [budget.category_id]
-            if category and category.subcategories:
-                category_ids.extend([sub.id for sub in category.subcategories])
-
-            transactions = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.category_id.in_(category_ids),
-                Expense.date >= period_start,
-                Expense.date <= period_end
-            ).order_by(Expense.date.desc()).all()
+            category_ids = get_category_tree(user_id).subtree_ids(budget.category_id, depth=1)
         else:
-            transactions = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.category_id == budget.category_id,
-                Expense.date >= period_start,
-                Expense.date <= period_end
-            ).order_by(Expense.date.desc()).all()
+            category_ids = [budget.category_id]
+
+        transactions = Expense.query.filter(
+            Expense.user_id == user_id,
+            Expense.category_id.in_(category_ids),
+            Expense.date >= period_start,
+            Expense.date <= period_end
+        ).order_by(Expense.date.desc()).all()
 
         return True, 'Success', transactions
 
-    def get_trends_data(self, user_id):
+    def get_trends_data(self, user_id, periods=None):
         """
         Get budget trends data for charts
-        Returns spending trends over time
+        Returns spending over each budget's last `periods` periods (newest first)
         """
+        periods = periods or self.TREND_PERIODS
         budgets = Budget.query.filter_by(user_id=user_id, active=True).all()
+        history = BudgetEvaluator.history(budgets, periods)
 
         trends_data = []
         for budget in budgets:
-            # Get last 6 periods of data
-            historical_data = []
-            for i in range(6):
-                # Calculate period dates for i periods ago
-                # This is simplified - actual implementation would need period-specific logic
-                spent = budget.calculate_spent_amount()
-                historical_data.append({
+            historical_data = [
+                {
                     'period': i,
+                    'start': start.date().isoformat(),
+                    'end': end.date().isoformat(),
                     'spent': spent,
                     'budget': budget.amount
-                })
+                }
+                for i, (start, end, spent) in enumerate(history[budget.id])
+            ]
 
             trends_data.append({
                 'budget': budget,
@@ -361,17 +367,19 @@ class BudgetService:
         on_track_count = 0
         over_budget_count = 0
 
-        for budget in budgets:
-            if budget.period == 'monthly':
-                total_budgeted += budget.amount
-                spent = budget.calculate_spent_amount()
-                total_spent += spent
-
-                status = budget.get_status()
-                if status == 'on_track':
-                    on_track_count += 1
-                elif status == 'over_budget':
-                    over_budget_count += 1
+        monthly_budgets = [budget for budget in budgets if budget.period == 'monthly']
+        spent_by_budget = BudgetEvaluator.evaluate(user_id, monthly_budgets)
+
+        for budget in monthly_budgets:
+            total_budgeted += budget.amount
+            spent = spent_by_budget[budget.id]
+            total_spent += spent
+
+            status = budget.get_status(spent)
+            if status == 'on_track':
+                on_track_count += 1
+            elif status == 'over_budget':
+                over_budget_count += 1
 
         return {
             'total_budgeted': total_budgeted,
@@ -0,0 +1,160 @@
+"""
+Batch Categorizer
+Categorizes many expenses in one pass with category mappings compiled once
+"""
+
+import time
+from sqlalchemy import bindparam, func
+from src.extensions import db
+from src.models.category import CategoryMapping
+from src.models.merchant_cache import MerchantCategoryCache
+from src.models.rules_version import request_rules_version
+from src.models.transaction import Expense
+from src.services.category_changes import write_category_changes
+from src.utils.compiled_rules import get_mapping_set
+from src.utils.merchant import MerchantDecisionCache, normalize_merchant
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchCategorizer:
+    """
+    Makes the decisions helpers.auto_categorize_transaction would make for a
+    sequence of descriptions, in memory
+    Mappings are compiled and their match counts and the user's merchant
+    decisions are read once; match counts advance in memory as rows are
+    decided, so later rows rank exactly as they would one call at a time.
+    write() adds the accumulated match counts with one aggregated UPDATE and
+    stores newly learned merchant decisions with one INSERT
+    (MerchantDecisionCache.write).
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.version = request_rules_version(user_id)
+        self.mapping_set = get_mapping_set(user_id)
+        self.match_counts = dict(db.session.query(CategoryMapping.id, CategoryMapping.match_count).filter(
+            CategoryMapping.user_id == user_id,
+            CategoryMapping.active == True
+        ))
+        self.decisions = {
+            row.merchant: (row.category_id, row.mapping_id)
+            for row in db.session.query(
+                MerchantCategoryCache.merchant, MerchantCategoryCache.category_id, MerchantCategoryCache.mapping_id
+            ).filter(
+                MerchantCategoryCache.user_id == user_id,
+                MerchantCategoryCache.rules_version == self.version
+            ).order_by(MerchantCategoryCache.id)
+        }
+        self.increments = {}
+        self._learned = {}
+        self._merchants = {}
+        self._scores = {}
+
+    def _candidates(self, text):
+        # Scores don't depend on match counts, so each distinct text is scored once
+        scores = self._scores.get(text)
+        if scores is None:
+            scores = self._scores[text] = self.mapping_set.candidates(text)
+        return scores
+
+    def _count(self, mapping_id):
+        self.match_counts[mapping_id] = (self.match_counts.get(mapping_id) or 0) + 1
+        self.increments[mapping_id] = self.increments.get(mapping_id, 0) + 1
+
+    def categorize(self, description):
+        """Category id for one description (None if no match), as auto_categorize_transaction decides it"""
+        if not description:
+            return None
+        description = description.strip().lower()
+
+        merchant = self._merchants.get(description)
+        if merchant is None:
+            merchant = self._merchants[description] = normalize_merchant(description)
+        if len(merchant) > MerchantCategoryCache.MERCHANT_LENGTH:
+            merchant = ''
+
+        if merchant and merchant in self.decisions:
+            category_id, mapping_id = self.decisions[merchant]
+            if mapping_id is not None:
+                self._count(mapping_id)
+            return category_id
+
+        best_mapping_id = self.mapping_set.best(self._candidates(description), self.match_counts)
+        if best_mapping_id is None:
+            return None
+        category_id = self.mapping_set.mappings[best_mapping_id][0]
+
+        if merchant and self.mapping_set.best(self._candidates(merchant), self.match_counts) == best_mapping_id:
+            self.decisions[merchant] = self._learned[merchant] = (category_id, best_mapping_id)
+
+        self._count(best_mapping_id)
+        return category_id
+
+    def write(self):
+        """Write accumulated match counts and learned merchant decisions (does not commit)"""
+        if self.increments:
+            table = CategoryMapping.__table__
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('b_id')).values(
+                    match_count=func.coalesce(table.c.match_count, 0) + bindparam('b_count')
+                ),
+                [{'b_id': mapping_id, 'b_count': count} for mapping_id, count in self.increments.items()]
+            )
+            self.increments = {}
+
+        if self._learned:
+            MerchantDecisionCache.write(self.user_id, self.version, self._learned)
+            self._learned = {}
+
+
+class BatchCategorizeService:
+    """Categorizes all uncategorized expenses of a user in chunks"""
+
+    # Expenses per chunk (one database transaction each)
+    CHUNK_SIZE = 5000
+
+    @staticmethod
+    def run(user_id, chunk_size=None):
+        """
+        Categorize every uncategorized expense of the user
+        Expenses are streamed in id order; each chunk's results are written with
+        bulk UPDATEs per category (keeping rollups, budget counters and data
+        versions in step, see write_category_changes) and committed.
+        Returns (categorized, total).
+        """
+        chunk_size = chunk_size or BatchCategorizeService.CHUNK_SIZE
+        started = time.monotonic()
+        categorizer = BatchCategorizer(user_id)
+
+        total = 0
+        categorized = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(Expense.id, Expense.description).filter(
+                Expense.user_id == user_id,
+                Expense.category_id == None,
+                Expense.id > last_id
+            ).order_by(Expense.id).limit(chunk_size).all()
+            if not rows:
+                break
+
+            changes = {}
+            for row in rows:
+                category_id = categorizer.categorize(row.description)
+                if category_id:
+                    changes.setdefault(category_id, []).append(row.id)
+
+            if changes:
+                write_category_changes(user_id, changes)
+            categorizer.write()
+            db.session.commit()
+
+            total += len(rows)
+            categorized += sum(len(ids) for ids in changes.values())
+            last_id = rows[-1].id
+
+        logger.info(f"Batch categorization for {user_id}: {categorized} of {total} transactions categorized "
+                    f"in {time.monotonic() - started:.2f}s")
+        return categorized, total
@@ -7,9 +7,11 @@ from datetime import datetime, timedelta
 from src.extensions import db
 from src.models.category import Category, CategoryMapping
 from src.models.transaction import Expense
+from src.models.rollup import MonthlyUserRollup
 from src.models.recurring import RecurringExpense
 from src.models.budget import Budget
-from src.utils.helpers import auto_categorize_transaction
+from src.models.rules_version import bump_rules_version
+from src.services.category.batch_categorizer import BatchCategorizeService
 
 class CategoryService:
     """Service class for category and mapping operations"""
@@ -100,6 +102,17 @@ class CategoryService:
             db.session.rollback()
             return False, f'Error updating category: {str(e)}'
 
+    @staticmethod
+    def _recategorize_expenses(category_id, other_category):
+        """Move every expense of a category to other_category (or uncategorized)"""
+        expenses = Expense.query.filter_by(category_id=category_id)
+        db.session.execute(
+            db.update(Expense).where(Expense.category_id == category_id).values(
+                category_id=other_category.id if other_category else None
+            ),
+            execution_options={'data_version_users': MonthlyUserRollup.users_of(expenses)}
+        )
+
     def delete_category(self, category_id, user_id):
         """Delete a category - Returns (success, message)"""
         category = self.get_category(category_id)
@@ -121,25 +134,30 @@ class CategoryService:
 
             if category.subcategories:
                 for subcategory in category.subcategories:
-                    Expense.query.filter_by(category_id=subcategory.id).update({
-                        'category_id': other_category.id if other_category else None
-                    })
+                    CategoryService._recategorize_expenses(subcategory.id, other_category)
+                    MonthlyUserRollup.move_category(
+                        db.session, subcategory.id, other_category.id if other_category else None
+                    )
                     RecurringExpense.query.filter_by(category_id=subcategory.id).update({
                         'category_id': other_category.id if other_category else None
                     })
                     CategoryMapping.query.filter_by(category_id=subcategory.id).delete()
                     db.session.delete(subcategory)
 
-            Expense.query.filter_by(category_id=category_id).update({
-                'category_id': other_category.id if other_category else None
-            })
+            CategoryService._recategorize_expenses(category_id, other_category)
+            MonthlyUserRollup.move_category(db.session, category_id, other_category.id if other_category else None)
             RecurringExpense.query.filter_by(category_id=category_id).update({
                 'category_id': other_category.id if other_category else None
             })
-            Budget.query.filter_by(category_id=category_id).update({
-                'category_id': other_category.id if other_category else None
-            })
+            db.session.execute(
+                db.update(Budget).where(Budget.category_id == category_id).values(
+                    category_id=other_category.id if other_category else None
+                ),
+                execution_options={'data_version_users': {user_id}}
+            )
             CategoryMapping.query.filter_by(category_id=category_id).delete()
+            # Bulk deletes skip the flush hook that invalidates compiled mappings
+            bump_rules_version({user_id})
 
             db.session.delete(category)
             db.session.commit()
@@ -255,25 +273,9 @@ class CategoryService:
     def bulk_categorize_transactions(self, user_id):
         """Categorize all uncategorized transactions - Returns (success, message, categorized_count, total_count)"""
         try:
-            uncategorized = Expense.query.filter_by(
-                user_id=user_id,
-                category_id=None
-            ).all()
-
-            total_count = len(uncategorized)
-            categorized_count = 0
-
-            for expense in uncategorized:
-                if not expense.description:
-                    continue
+            # Mappings are compiled once and results written in chunked bulk UPDATEs
+            categorized_count, total_count = BatchCategorizeService.run(user_id)
 
-                category_id = auto_categorize_transaction(expense.description, user_id)
-
-                if category_id:
-                    expense.category_id = category_id
-                    categorized_count += 1
-
-            db.session.commit()
             return True, f'Successfully categorized {categorized_count} out of {total_count} transactions', categorized_count, total_count
 
         except Exception as e:
@@ -0,0 +1,106 @@
+"""
+Category tree
+A user's whole category hierarchy loaded with one query and cached per data version
+"""
+
+from collections import namedtuple
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+from src.models.category import Category
+from src.utils.analytics_cache import AnalyticsCache
+
+CategoryNode = namedtuple('CategoryNode', 'id name icon color parent_id user_id is_system')
+
+
+class CategoryTree:
+    """
+    Parent/child index over a user's categories
+    Holds plain tuples rather than ORM objects so it can be shared across
+    requests. Category writes bump the user's data version (see
+    models.data_version), which makes cached trees unreachable.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = {node.id: node for node in nodes}
+        self._children = {}
+        for node in nodes:
+            self._children.setdefault(node.parent_id, []).append(node.id)
+
+    @classmethod
+    def load(cls, user_id):
+        """Build the tree for a user from one query"""
+        rows = Category.query.with_entities(
+            Category.id, Category.name, Category.icon, Category.color,
+            Category.parent_id, Category.user_id, Category.is_system
+        ).filter(Category.user_id == user_id).order_by(Category.id)
+        return cls([CategoryNode(*row) for row in rows])
+
+    def __contains__(self, category_id):
+        return category_id in self.nodes
+
+    def roots(self):
+        """Ids of top-level categories"""
+        return list(self._children.get(None, []))
+
+    def children(self, category_id):
+        """Ids of the direct subcategories of a category"""
+        return list(self._children.get(category_id, []))
+
+    def descendants(self, category_id, depth=None):
+        """Ids below a category, breadth first, down to `depth` levels (all levels when None)"""
+        result = []
+        level = [category_id]
+        seen = {category_id}
+        while level and (depth is None or depth > 0):
+            level = [child for parent in level for child in self._children.get(parent, []) if child not in seen]
+            seen.update(level)
+            result.extend(level)
+            if depth is not None:
+                depth -= 1
+        return result
+
+    def subtree_ids(self, category_id, depth=None):
+        """The category followed by its descendants, ready for an IN filter"""
+        return [category_id] + self.descendants(category_id, depth)
+
+    def ancestors(self, category_id):
+        """Ids from the category's parent up to its root"""
+        result = []
+        node = self.nodes.get(category_id)
+        while node is not None and node.parent_id is not None and node.parent_id not in result:
+            result.append(node.parent_id)
+            node = self.nodes.get(node.parent_id)
+        return result
+
+
+# Shared per-process cache of category trees
+category_tree_cache = AnalyticsCache(max_entries=256)
+
+
+def get_category_tree(user_id, version=None):
+    """The user's category tree, rebuilt only after their data version changes"""
+    return category_tree_cache.get_or_compute(
+        user_id, 'category_tree', lambda: CategoryTree.load(user_id), version=version
+    )
+
+
+def preload_subcategories(categories):
+    """
+    Populate Category.subcategories for the given categories and everything below them
+    Loads each owner's categories with one query instead of one lazy load per node.
+    """
+    pending = [category for category in categories if 'subcategories' in inspect(category).unloaded]
+    if not pending:
+        return
+
+    loaded = Category.query.filter(
+        Category.user_id.in_({category.user_id for category in pending})
+    ).order_by(Category.id).all()
+
+    by_parent = {}
+    for category in loaded:
+        by_parent.setdefault(category.parent_id, []).append(category)
+
+    for category in set(loaded) | set(pending):
+        if 'subcategories' in inspect(category).unloaded:
+            set_committed_value(category, 'subcategories', by_parent.get(category.id, []))
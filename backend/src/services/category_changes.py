@@ -0,0 +1,48 @@
+"""
+Category changes
+Bulk re-categorization of expenses shared by rule application and batch categorization
+"""
+
+from src.extensions import db
+from src.models.budget_alert import BudgetAlert
+from src.models.budget_spend import BudgetPeriodSpend
+from src.models.data_version import bump_data_version
+from src.models.rollup import MonthlyUserRollup
+from src.models.transaction import Expense
+
+# Expense ids per UPDATE statement
+UPDATE_CHUNK_SIZE = 500
+
+
+def write_category_changes(user_id, changes, session=None):
+    """
+    Move expenses to new categories: {category_id: [expense_id, ...]}
+    Writes one bulk UPDATE per category (and chunk) and keeps rollups, budget
+    counters, budget alerts and data versions in step, since the UPDATEs
+    bypass the flush hooks. Does not commit.
+    """
+    session = session or db.session
+    expense_ids = [expense_id for ids in changes.values() for expense_id in ids]
+
+    # Read the old state before the UPDATEs
+    rollup_totals = MonthlyUserRollup.category_changes(session, changes)
+    spend_before = BudgetPeriodSpend.compute(session, {user_id}, expense_ids=expense_ids)
+
+    table = Expense.__table__
+    for category_id, ids in changes.items():
+        for i in range(0, len(ids), UPDATE_CHUNK_SIZE):
+            session.execute(
+                table.update().where(table.c.id.in_(ids[i:i + UPDATE_CHUNK_SIZE])).values(category_id=category_id)
+            )
+
+    MonthlyUserRollup.apply(session, rollup_totals)
+
+    spend_after = BudgetPeriodSpend.compute(session, {user_id}, expense_ids=expense_ids)
+    spend_totals = {
+        key: spend_after.get(key, 0.0) - spend_before.get(key, 0.0)
+        for key in set(spend_before) | set(spend_after)
+    }
+    BudgetPeriodSpend.apply(session, spend_totals)
+    BudgetAlert.detect(session, spend_totals)
+
+    bump_data_version({user_id} | {key[0] for key in rollup_totals}, session)
@@ -8,8 +8,10 @@ from flask import current_app
 from src.extensions import db
 from src.models.user import User
 from src.models.account import Account
-from src.models.transaction import Expense
+from src.models.transaction import Expense, ExpenseParticipant
+from src.models.rollup import MonthlyUserRollup
 from src.models.budget import Budget
+from src.models.budget_spend import BudgetPeriodSpend
 from src.models.category import Category
 from src.models.group import Group
 from src.models.investment import Portfolio, Investment
@@ -610,11 +612,21 @@ class DemoService:
 
         try:
             # Delete existing data
-            Expense.query.filter_by(user_id=user_id).delete()
-            Budget.query.filter_by(user_id=user_id).delete()
-            Account.query.filter_by(user_id=user_id).delete()
-            Category.query.filter_by(user_id=user_id).delete()
-            Portfolio.query.filter_by(user_id=user_id).delete()
+            rollup_users = MonthlyUserRollup.users_of(Expense.query.filter_by(user_id=user_id))
+            ExpenseParticipant.query.filter(
+                ExpenseParticipant.expense_id.in_(db.session.query(Expense.id).filter_by(user_id=user_id))
+            ).delete(synchronize_session=False)
+            db.session.execute(
+                db.delete(Expense).where(Expense.user_id == user_id),
+                execution_options={'data_version_users': rollup_users}
+            )
+            MonthlyUserRollup.rebuild_for_users(rollup_users)
+            BudgetPeriodSpend.delete_for_users({user_id})
+            for model in (Budget, Account, Category, Portfolio):
+                db.session.execute(
+                    db.delete(model).where(model.user_id == user_id),
+                    execution_options={'data_version_users': {user_id}}
+                )
 
             db.session.commit()
 
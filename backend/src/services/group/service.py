@@ -9,8 +9,10 @@ from src.extensions import db
 from src.models.group import Group, Settlement
 from src.models.user import User
 from src.models.transaction import Expense
+from src.models.rollup import MonthlyUserRollup
 from src.models.associations import group_users
 from src.utils.helpers import calculate_balances
+from src.utils.split_calculator import SplitCalculator
 
 
 class GroupService:
@@ -167,10 +169,23 @@ class GroupService:
 
         try:
             # Delete associated settlements
-            Settlement.query.filter_by(group_id=group_id).delete()
+            settlement_users = set()
+            for payer_id, receiver_id in db.session.query(
+                Settlement.payer_id, Settlement.receiver_id
+            ).filter(Settlement.group_id == group_id):
+                settlement_users |= {payer_id, receiver_id}
+            db.session.execute(
+                db.delete(Settlement).where(Settlement.group_id == group_id),
+                execution_options={'data_version_users': settlement_users}
+            )
 
             # Update expenses to remove group reference
-            Expense.query.filter_by(group_id=group_id).update({'group_id': None})
+            db.session.execute(
+                db.update(Expense).where(Expense.group_id == group_id).values(group_id=None),
+                execution_options={
+                    'data_version_users': MonthlyUserRollup.users_of(Expense.query.filter_by(group_id=group_id))
+                }
+            )
 
             # Delete the group
             db.session.delete(group)
@@ -241,13 +256,18 @@ class GroupService:
         for member_id in member_ids:
             member_balances[member_id] = 0
 
+        # Calculate splits for all member-paid expenses in one pass
+        expense_splits = SplitCalculator.compute_many(
+            expense for expense in expenses if expense.paid_by and expense.paid_by in member_ids
+        )
+
         # Process each expense
         for expense in expenses:
             if not expense.paid_by or expense.paid_by not in member_ids:
                 continue
 
             # Get the splits for this expense
-            splits = expense.calculate_splits() if hasattr(expense, 'calculate_splits') else {'splits': []}
+            splits = expense_splits[expense.id]
 
             # The payer paid the full amount
             for split in splits.get('splits', []):
@@ -276,6 +296,7 @@ class GroupService:
                 member_balances[settlement.receiver_id] -= settlement.amount
 
         # Simplify debts (who owes whom)
+        members_by_id = {member.id: member for member in group.members}
         simplified_debts = []
         creditors = {k: v for k, v in member_balances.items() if v > 0.01}
         debtors = {k: v for k, v in member_balances.items() if v < -0.01}
@@ -288,8 +309,8 @@ class GroupService:
 
                 amount_to_settle = min(debt, credit)
                 if amount_to_settle > 0.01:
-                    debtor = User.query.get(debtor_id)
-                    creditor = User.query.get(creditor_id)
+                    debtor = members_by_id.get(debtor_id)
+                    creditor = members_by_id.get(creditor_id)
 
                     simplified_debts.append({
                         'from': debtor.name if debtor and hasattr(debtor, 'name') else debtor_id,
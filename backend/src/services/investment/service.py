@@ -3,6 +3,7 @@ from datetime import datetime
 from flask import current_app
 from src.extensions import db
 from src.models.investment import Portfolio, Investment, InvestmentTransaction
+from src.utils.helpers import sync_investments_with_accounts
 
 class InvestmentService:
     def __init__(self):
@@ -29,6 +30,7 @@ class InvestmentService:
             )
             db.session.add(investment)
             db.session.commit()
+            sync_investments_with_accounts(user_id)
             return True, 'Investment added!', investment
         except Exception as e:
             db.session.rollback()
@@ -37,4 +39,7 @@ class InvestmentService:
     def update_prices(self, portfolio_id):
         """Update investment prices from external API"""
         # Would call FMP or Yahoo Finance integration
+        portfolio = Portfolio.query.get(portfolio_id)
+        if portfolio:
+            sync_investments_with_accounts(portfolio.user_id)
         return True, 'Prices updated!'
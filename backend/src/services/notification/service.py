@@ -1,9 +1,28 @@
 """Notification Service - Email notifications and alerts"""
+from datetime import datetime
 from flask import current_app
 from flask_mail import Message
-from src.extensions import mail
+from src.extensions import db, mail, scheduler
 from src.models.user import User
 
+
+def _deliver_budget_alerts():
+    with scheduler.app.app_context():
+        NotificationService().send_pending_budget_alerts()
+
+
+def schedule_budget_alert_delivery():
+    """
+    Send queued budget alerts in the background as soon as possible
+    Without a running scheduler, the periodic send_budget_alerts job picks them up.
+    """
+    if not scheduler.running:
+        return
+    scheduler.add_job(
+        id='deliver_budget_alerts', func=_deliver_budget_alerts, trigger='date', replace_existing=True
+    )
+
+
 class NotificationService:
     def __init__(self):
         pass
@@ -18,21 +37,112 @@ class NotificationService:
             current_app.logger.error(f"Email error: {str(e)}")
             return False, f'Error: {str(e)}'
 
-    def send_budget_alert(self, user_id, budget):
-        """Send budget overspend alert"""
+    def send_budget_alert(self, user_id, budget, spent=None, threshold=100):
+        """Send budget alert for a budget at `threshold` percent of its limit"""
         user = User.query.get(user_id)
         if not user:
             return False, 'User not found'
 
-        subject = f"Budget Alert: {budget.name}"
+        if spent is None:
+            spent = budget.calculate_spent_amount()
+
+        name = budget.name or (budget.category.name if budget.category else 'your budget')
+        if threshold >= 100:
+            status = 'has exceeded its limit'
+        else:
+            status = f'has reached {threshold}% of its limit'
+
+        subject = f"Budget Alert: {name}"
         html_body = f"""
         <h2>Budget Alert</h2>
-        <p>Your budget for {budget.name} has exceeded its limit.</p>
-        <p>Budget: ${budget.amount}</p>
-        <p>Spent: ${budget.calculate_spent_amount()}</p>
+        <p>Your budget for {name} {status}.</p>
+        <p>Budget: ${budget.get_total_budget():.2f}</p>
+        <p>Spent: ${spent:.2f}</p>
         """
         return self.send_email(user.id, subject, html_body)
 
+    def send_pending_budget_alerts(self, limit=500):
+        """
+        Send queued budget alerts, oldest first
+        Alerts for the same budget period are sent as one email for the highest threshold.
+        Each period's rows are claimed ('pending' -> 'sending') before the email goes
+        out, so processes sending concurrently never send the same alert twice.
+        Failed sends go back to pending until BudgetAlert.MAX_ATTEMPTS is reached.
+        Returns the number of emails sent.
+        """
+        from src.models.budget import Budget
+        from src.models.budget_alert import BudgetAlert
+
+        table = BudgetAlert.__table__
+        now = datetime.utcnow()
+
+        # Rows whose sender died while sending
+        db.session.execute(table.update().where(
+            table.c.status == 'sending',
+            table.c.claimed_at < now - BudgetAlert.SENDING_TIMEOUT
+        ).values(status='pending', claimed_at=None))
+        db.session.commit()
+
+        alerts = db.session.query(
+            BudgetAlert.id, BudgetAlert.budget_id, BudgetAlert.user_id, BudgetAlert.period_start,
+            BudgetAlert.threshold, BudgetAlert.spent
+        ).filter_by(status='pending').order_by(BudgetAlert.id).limit(limit).all()
+        if not alerts:
+            return 0
+
+        budgets = {
+            budget.id: budget
+            for budget in Budget.query.filter(Budget.id.in_({alert.budget_id for alert in alerts}))
+        }
+
+        by_period = {}
+        for alert in alerts:
+            by_period.setdefault((alert.budget_id, alert.period_start), []).append(alert)
+
+        # Periods another sender is working on get their remaining alerts later
+        busy = set(db.session.query(BudgetAlert.budget_id, BudgetAlert.period_start).filter(
+            BudgetAlert.budget_id.in_(budgets),
+            BudgetAlert.status == 'sending'
+        ))
+
+        sent_count = 0
+        for (budget_id, period_start), period_alerts in by_period.items():
+            if (budget_id, period_start) in busy:
+                continue
+            alert_ids = [alert.id for alert in period_alerts]
+            claimed = db.session.execute(table.update().where(
+                table.c.id.in_(alert_ids),
+                table.c.status == 'pending'
+            ).values(status='sending', claimed_at=now))
+            if claimed.rowcount != len(alert_ids):
+                # Another sender took some of them; leave the period to it
+                db.session.rollback()
+                continue
+            db.session.commit()
+
+            alert = max(period_alerts, key=lambda item: item.threshold)
+            budget = budgets.get(budget_id)
+
+            if budget is None:
+                values = {'status': 'skipped'}
+            else:
+                success, _ = self.send_budget_alert(alert.user_id, budget, spent=alert.spent, threshold=alert.threshold)
+                if success:
+                    sent_count += 1
+                    values = {'status': 'sent', 'sent_at': datetime.utcnow()}
+                else:
+                    values = {
+                        'status': db.case(
+                            (table.c.attempts + 1 >= BudgetAlert.MAX_ATTEMPTS, 'failed'), else_='pending'
+                        ),
+                        'attempts': table.c.attempts + 1
+                    }
+
+            db.session.execute(table.update().where(table.c.id.in_(alert_ids)).values(claimed_at=None, **values))
+            db.session.commit()
+
+        return sent_count
+
     def send_monthly_report(self, user_id):
         """Send monthly expense report"""
         user = User.query.get(user_id)
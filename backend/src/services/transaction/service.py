@@ -6,7 +6,6 @@ Business logic for transaction (expense/income/transfer) management
 import json
 from datetime import datetime
 from flask import current_app
-from sqlalchemy import or_
 from src.extensions import db
 from src.models.transaction import Expense, CategorySplit
 from src.models.account import Account
@@ -14,6 +13,7 @@ from src.models.user import User
 from src.models.group import Group
 from src.models.currency import Currency
 from src.models.category import Tag
+from src.utils.split_calculator import SplitCalculator
 
 
 class TransactionService:
@@ -306,7 +306,7 @@ class TransactionService:
 
             if enable_category_split:
                 expense.category_id = None
-                CategorySplit.query.filter_by(expense_id=expense.id).delete()
+                expense.category_splits.clear()
 
                 splits_data = form_data.get('category_splits_data', '[]')
                 try:
@@ -319,16 +319,14 @@ class TransactionService:
                         amount = float(split.get('amount', 0))
 
                         if category_id and amount > 0:
-                            cat_split = CategorySplit(
-                                expense_id=expense.id,
+                            expense.category_splits.append(CategorySplit(
                                 category_id=category_id,
                                 amount=amount
-                            )
-                            db.session.add(cat_split)
+                            ))
                 except (json.JSONDecodeError, ValueError) as e:
                     return False, f'Invalid category split data: {str(e)}'
             else:
-                CategorySplit.query.filter_by(expense_id=expense.id).delete()
+                expense.category_splits.clear()
 
                 category_id = form_data.get('category_id')
                 if category_id and category_id.strip() and category_id != 'null':
@@ -396,16 +394,11 @@ class TransactionService:
         """
         # Fetch all expenses where the user is either the creator or a split participant
         expenses = Expense.query.filter(
-            or_(
-                Expense.user_id == user_id,
-                Expense.split_with.like(f'%{user_id}%')
-            )
+            Expense.involving_user(user_id)
         ).order_by(Expense.date.desc()).all()
 
         # Pre-calculate all expense splits
-        expense_splits = {}
-        for expense in expenses:
-            expense_splits[expense.id] = expense.calculate_splits()
+        expense_splits = SplitCalculator.compute_many(expenses)
 
         return expenses, expense_splits
 
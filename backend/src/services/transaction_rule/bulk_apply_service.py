@@ -0,0 +1,268 @@
+"""
+Bulk Rule Apply Service
+Re-categorizes a user's existing transactions with their transaction rules
+"""
+
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app
+from src.extensions import db, scheduler
+from src.models.rule_apply_job import RuleApplyJob
+from src.models.transaction import Expense
+from src.services.category_changes import write_category_changes
+from src.utils.compiled_rules import CompiledRuleSet
+from src.utils.rule_matches import RuleMatchCounter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# State inherited by forked worker processes (see BulkRuleApplyService.run)
+_worker_app = None
+_worker_rule_set = None
+_worker_ready = False
+
+
+def _apply_range_in_worker(user_id, after_id, upto_id):
+    """Process pool entry point; runs in a forked copy of the parent process"""
+    global _worker_ready
+    with _worker_app.app_context():
+        if not _worker_ready:
+            # Connections inherited from the parent must not be shared
+            db.engine.dispose()
+            _worker_ready = True
+        return BulkRuleApplyService.apply_chunk(user_id, _worker_rule_set, after_id, upto_id)
+
+
+def _run_job_in_background(job_id):
+    with scheduler.app.app_context():
+        BulkRuleApplyService.run_job(job_id)
+
+
+class BulkRuleApplyService:
+    """
+    Applies the first matching rule to every transaction of a user
+    Transactions are streamed in id order in chunks against a precompiled
+    rule set. Each chunk writes its changes with one bulk UPDATE per target
+    category, keeps rollups, budget counters and data versions in step (the
+    UPDATEs bypass the flush hooks) and commits on its own, so no write lock
+    is held for the whole run. Progress is recorded on a RuleApplyJob row.
+    """
+
+    # Expenses per chunk (one database transaction each)
+    CHUNK_SIZE = 1000
+
+    @staticmethod
+    def apply_chunk(user_id, rule_set, after_id, upto_id=None, limit=None):
+        """
+        Apply rules to the user's transactions with after_id < id (<= upto_id), at most limit of them
+        Rule match counts are written with the chunk's commit. Returns
+        {'processed', 'updated', 'matches', 'last_id'}.
+        """
+        query = db.session.query(
+            Expense.id, Expense.description, Expense.amount, Expense.transaction_type, Expense.category_id
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.id > after_id
+        )
+        if upto_id is not None:
+            query = query.filter(Expense.id <= upto_id)
+        query = query.order_by(Expense.id)
+        if limit is not None:
+            query = query.limit(limit)
+        rows = query.all()
+
+        changes = {}
+        matches = RuleMatchCounter()
+        matched = 0
+        for row in rows:
+            transaction_data = {
+                'description': row.description,
+                'amount': row.amount,
+                'transaction_type': row.transaction_type,
+                'category_id': row.category_id
+            }
+
+            rule = rule_set.first_match(transaction_data)  # Only apply first matching rule
+            if not rule:
+                continue
+            transaction_data = rule.apply(transaction_data)
+            matches.record([rule.id])
+            matched += 1
+
+            # Update transaction if category changed
+            if transaction_data.get('category_id') != row.category_id:
+                changes.setdefault(transaction_data['category_id'], []).append(row.id)
+
+        if changes:
+            write_category_changes(user_id, changes)
+        matches.write()
+        db.session.commit()
+
+        return {
+            'processed': len(rows),
+            'updated': sum(len(ids) for ids in changes.values()),
+            'matches': matched,
+            'last_id': rows[-1].id if rows else after_id
+        }
+
+    @staticmethod
+    def _ranges(user_id, chunk_size):
+        """(after_id, upto_id) keyset ranges of chunk_size transactions each"""
+        ids = [expense_id for expense_id, in db.session.query(Expense.id).filter(
+            Expense.user_id == user_id
+        ).order_by(Expense.id)]
+        return [
+            (ids[i - 1] if i else 0, ids[min(i + chunk_size, len(ids)) - 1])
+            for i in range(0, len(ids), chunk_size)
+        ]
+
+    @staticmethod
+    def _update_job(job_id, **values):
+        if job_id is None:
+            return
+        table = RuleApplyJob.__table__
+        db.session.execute(table.update().where(table.c.id == job_id).values(**values))
+        db.session.commit()
+
+    @staticmethod
+    def run(user_id, rule_ids=None, workers=1, chunk_size=None, job_id=None):
+        """
+        Apply rules to all of a user's transactions
+        With workers > 1, users with more than one chunk of transactions are
+        fanned out across a pool of forked processes. Only the apply-rules CLI
+        command asks for that: forking a server process (and its scheduler
+        threads) is unsafe, so it always runs serially, as does SQLite.
+        Returns processed, updated, total and elapsed.
+        """
+        global _worker_app, _worker_rule_set
+
+        chunk_size = chunk_size or BulkRuleApplyService.CHUNK_SIZE
+        if db.engine.dialect.name == 'sqlite':
+            workers = 1
+        if workers > 1 and scheduler.running:
+            logger.warning("Not forking bulk rule workers from a process running the scheduler; running serially")
+            workers = 1
+
+        started = time.monotonic()
+        rule_set = CompiledRuleSet.load(user_id, rule_ids)
+        total = Expense.query.filter(Expense.user_id == user_id).count()
+        BulkRuleApplyService._update_job(job_id, total=total)
+
+        processed = 0
+        updated = 0
+
+        def record(result):
+            nonlocal processed, updated
+            processed += result['processed']
+            updated += result['updated']
+            BulkRuleApplyService._update_job(job_id, processed=processed, updated=updated)
+
+        if workers > 1 and total > chunk_size:
+            _worker_app = current_app._get_current_object()
+            _worker_rule_set = rule_set
+            ranges = BulkRuleApplyService._ranges(user_id, chunk_size)
+            # Forked children inherit the parent's pooled connections; drop them first
+            db.session.remove()
+            db.engine.dispose()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [pool.submit(_apply_range_in_worker, user_id, after_id, upto_id) for after_id, upto_id in ranges]
+                for future in futures:
+                    record(future.result())
+        else:
+            last_id = 0
+            while True:
+                result = BulkRuleApplyService.apply_chunk(user_id, rule_set, last_id, limit=chunk_size)
+                if not result['processed']:
+                    break
+                record(result)
+                last_id = result['last_id']
+
+        elapsed = time.monotonic() - started
+        logger.info(f"Bulk rule application for {user_id}: {updated} of {processed} transactions updated "
+                    f"in {elapsed:.2f}s")
+
+        return {
+            'processed': processed,
+            'updated': updated,
+            'total': total,
+            'elapsed': elapsed
+        }
+
+    @staticmethod
+    def start_job(user_id, rule_ids=None):
+        """
+        Record a pending job and return it; the job runs in the background
+        It is handed to this process's scheduler right away. Jobs recorded
+        while no scheduler runs are picked up by run_pending_jobs().
+        """
+        job = RuleApplyJob(user_id=user_id, rule_ids=json.dumps(rule_ids) if rule_ids else None, status='pending')
+        db.session.add(job)
+        db.session.commit()
+
+        if scheduler.running:
+            scheduler.add_job(
+                id=f'bulk_apply_rules_{job.id}', func=_run_job_in_background, args=[job.id], trigger='date'
+            )
+        return job
+
+    @staticmethod
+    def run_job(job_id):
+        """
+        Run a recorded job, marking it completed or failed
+        The job is claimed with a conditional UPDATE first, so it runs once even
+        when several processes pick it up. Returns None if it was already taken.
+        """
+        table = RuleApplyJob.__table__
+        claimed = db.session.execute(
+            table.update().where(table.c.id == job_id, table.c.status == 'pending').values(
+                status='running', started_at=datetime.utcnow()
+            )
+        )
+        db.session.commit()
+        if claimed.rowcount != 1:
+            return None
+
+        job = RuleApplyJob.query.get(job_id)
+        user_id = job.user_id
+        rule_ids = json.loads(job.rule_ids) if job.rule_ids else None
+
+        try:
+            result = BulkRuleApplyService.run(user_id, rule_ids, job_id=job_id)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Bulk rule application {job_id} failed: {str(e)}")
+            BulkRuleApplyService._update_job(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            return None
+
+        BulkRuleApplyService._update_job(job_id, status='completed', finished_at=datetime.utcnow())
+        return result
+
+    @staticmethod
+    def run_pending_jobs():
+        """
+        Run every pending job, oldest first (periodic scheduler task). Returns the number run.
+        Jobs whose worker died mid-run are failed rather than rerun, since their
+        finished chunks already counted their rule matches.
+        """
+        table = RuleApplyJob.__table__
+        now = datetime.utcnow()
+        abandoned = db.session.execute(table.update().where(
+            table.c.status == 'running',
+            table.c.started_at < now - RuleApplyJob.RUNNING_TIMEOUT
+        ).values(status='failed', error='Interrupted before completion', finished_at=now))
+        db.session.commit()
+        if abandoned.rowcount:
+            logger.warning(f"Marked {abandoned.rowcount} interrupted bulk rule application job(s) as failed")
+
+        job_ids = [job_id for job_id, in db.session.query(RuleApplyJob.id).filter(
+            RuleApplyJob.status == 'pending'
+        ).order_by(RuleApplyJob.id)]
+
+        ran = 0
+        for job_id in job_ids:
+            if BulkRuleApplyService.run_job(job_id) is not None:
+                ran += 1
+        return ran
@@ -0,0 +1,181 @@
+"""
+Rule Preview Service
+Shows what a candidate transaction rule would do to a user's existing transactions
+"""
+
+import re
+import time
+from src.models.transaction import Expense
+from src.services.category.tree import get_category_tree
+from src.utils.analytics_cache import AnalyticsCache
+from src.utils.compiled_rules import CompiledRule
+
+
+class TransactionColumns:
+    """
+    Column-oriented copy of the fields rules are matched against, newest first
+    Built from one query of plain tuples and shared across requests; expense
+    writes bump the user's data version, which makes cached copies unreachable.
+    """
+
+    FIELDS = ('id', 'date', 'description', 'amount', 'transaction_type', 'category_id')
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * len(self.FIELDS)
+        for field, column in zip(self.FIELDS, columns):
+            setattr(self, field, column)
+
+        # Same conversions CompiledRule.matches() applies per row, done once
+        self.abs_amounts = tuple(_abs_amount(amount) for amount in self.amount)
+        self._text = {}
+
+    @classmethod
+    def load(cls, user_id):
+        rows = Expense.query.with_entities(
+            *[getattr(Expense, field) for field in cls.FIELDS]
+        ).filter(
+            Expense.user_id == user_id
+        ).order_by(Expense.date.desc(), Expense.id.desc()).all()
+        return cls([tuple(row) for row in rows])
+
+    def __len__(self):
+        return len(self.id)
+
+    def text(self, field, case_sensitive):
+        """A field as match text (None where empty), lowercased unless case_sensitive"""
+        key = (field, case_sensitive)
+        if key not in self._text:
+            values = getattr(self, field, None) if field in self.FIELDS else None
+            if values is None:
+                values = (None,) * len(self)
+            strings = tuple(str(value) if value else None for value in values)
+            if not case_sensitive:
+                strings = tuple(value.lower() if value is not None else None for value in strings)
+            self._text[key] = strings
+        return self._text[key]
+
+
+def _abs_amount(amount):
+    try:
+        return float(abs(amount))
+    except (ValueError, TypeError):
+        return None
+
+
+def _number(value, name, convert=float):
+    """A request value as a number (None stays None); raises ValueError naming the field otherwise"""
+    if value is None:
+        return None
+    try:
+        return convert(value)
+    except (ValueError, TypeError):
+        raise ValueError(f'{name} must be a number')
+
+
+# Shared per-process cache of transaction columns (large, so only a few users)
+transaction_columns_cache = AnalyticsCache(max_entries=16)
+
+
+def get_transaction_columns(user_id):
+    """The user's transaction columns, reloaded only after their data version changes"""
+    return transaction_columns_cache.get_or_compute(
+        user_id, 'transaction_columns', lambda: TransactionColumns.load(user_id)
+    )
+
+
+class RulePreviewService:
+    """Evaluates a candidate rule against every transaction of a user, column by column"""
+
+    SAMPLE_SIZE = 20
+    MAX_SAMPLE_SIZE = 100
+
+    @staticmethod
+    def matching_indexes(rule, columns):
+        """Row indexes of the columns a compiled rule matches, in column order"""
+        indexes = range(len(columns))
+
+        # Cheap filters first, each pass only over the rows still left
+        if rule.transaction_type_filter:
+            types = columns.transaction_type
+            wanted = rule.transaction_type_filter
+            indexes = [i for i in indexes if types[i] == wanted]
+
+        if rule.amount_min is not None or rule.amount_max is not None:
+            amounts = columns.abs_amounts
+            low = rule.amount_min if rule.amount_min is not None else float('-inf')
+            high = rule.amount_max if rule.amount_max is not None else float('inf')
+            indexes = [i for i in indexes if amounts[i] is not None and low <= amounts[i] <= high]
+
+        texts = columns.text(rule.pattern_field, rule.case_sensitive)
+        if rule.is_regex:
+            search = rule.regex.search
+            return [i for i in indexes if texts[i] is not None and search(texts[i])]
+
+        needle = rule.needle
+        return [i for i in indexes if texts[i] is not None and needle in texts[i]]
+
+    @staticmethod
+    def preview(user_id, rule, sample_size=None):
+        """
+        Summarize what applying `rule` (a TransactionRule, usually unsaved) to the
+        user's transactions would match and which categories it would overwrite
+        Raises ValueError for invalid regex patterns, amount bounds or sample sizes.
+        """
+        started = time.monotonic()
+        sample_size = _number(sample_size, 'sample_size', int)
+        sample_size = min(max(sample_size or RulePreviewService.SAMPLE_SIZE, 0), RulePreviewService.MAX_SAMPLE_SIZE)
+        rule.amount_min = _number(rule.amount_min, 'amount_min')
+        rule.amount_max = _number(rule.amount_max, 'amount_max')
+
+        if rule.is_regex:
+            try:
+                re.compile(rule.pattern if rule.case_sensitive else rule.pattern.lower())
+            except re.error as e:
+                raise ValueError(f'Invalid regex pattern: {str(e)}')
+
+        compiled = CompiledRule(rule)
+        columns = get_transaction_columns(user_id)
+        matched = RulePreviewService.matching_indexes(compiled, columns)
+
+        target = compiled.auto_category_id
+        changes = {}
+        if target:
+            categories = columns.category_id
+            for i in matched:
+                if categories[i] != target:
+                    changes[categories[i]] = changes.get(categories[i], 0) + 1
+
+        names = get_category_tree(user_id).nodes
+
+        def category_name(category_id):
+            node = names.get(category_id)
+            return node.name if node else None
+
+        return {
+            'total_transactions': len(columns),
+            'matched': len(matched),
+            'would_change': sum(changes.values()),
+            'category_changes': [
+                {
+                    'from_category_id': category_id,
+                    'from_category_name': category_name(category_id),
+                    'to_category_id': target,
+                    'to_category_name': category_name(target),
+                    'count': count
+                }
+                for category_id, count in sorted(changes.items(), key=lambda item: (-item[1], item[0] or 0))
+            ],
+            'samples': [
+                {
+                    'id': columns.id[i],
+                    'date': columns.date[i].isoformat() if columns.date[i] else None,
+                    'description': columns.description[i],
+                    'amount': columns.amount[i],
+                    'transaction_type': columns.transaction_type[i],
+                    'category_id': columns.category_id[i],
+                    'category_name': category_name(columns.category_id[i])
+                }
+                for i in matched[:sample_size]
+            ],
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+        }
@@ -0,0 +1,104 @@
+"""
+Analytics result cache
+LRU cache of analytics results keyed by (user, data version, endpoint, params)
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from flask import current_app
+
+
+class AnalyticsCache:
+    """
+    Thread-safe, size-capped LRU cache for analytics results
+    Entries are keyed on the user's data version, so any write that bumps the
+    version makes older entries unreachable; LRU eviction reclaims them.
+    """
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats for monitoring
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+    @property
+    def max_entries(self):
+        if self._max_entries is None:
+            return current_app.config.get('ANALYTICS_CACHE_SIZE', 512)
+        return self._max_entries
+
+    @staticmethod
+    def make_key(user_id, version, endpoint, params=None):
+        # Results depend on "now" (current month, current year), so the day is part of the key
+        return (user_id, version, date.today().isoformat(), endpoint, tuple(sorted((params or {}).items())))
+
+    def get_or_compute(self, user_id, endpoint, compute, params=None, version=None, kind='data'):
+        """
+        Return the cached result for this user/endpoint/params or compute and store it
+        Keyed on the user's data version unless another version is given; `kind`
+        names the version ('data' or 'rules'). Results computed while the open
+        transaction has bumped that version are returned but not stored.
+        """
+        from src.models.data_version import has_uncommitted_bump, request_data_version
+
+        if version is None:
+            version = request_data_version(user_id)
+        key = self.make_key(user_id, version, endpoint, params)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key]
+            self.stats['misses'] += 1
+
+        result = compute()
+        if not has_uncommitted_bump(user_id, kind):
+            self._store(key, result)
+        return result
+
+    def get(self, user_id, endpoint, params=None, version=None, default=None):
+        """The cached result for this user/endpoint/params, or default when there is none"""
+        key = self.make_key(user_id, version, endpoint, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key]
+            self.stats['misses'] += 1
+        return default
+
+    def put(self, user_id, endpoint, result, params=None, version=None):
+        """Store a result computed by the caller"""
+        self._store(self.make_key(user_id, version, endpoint, params), result)
+
+    def _store(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self, user_id=None):
+        """Drop every entry, or only the given user's entries"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == user_id]:
+                    del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared per-process cache
+analytics_cache = AnalyticsCache()
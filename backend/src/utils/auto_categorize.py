@@ -3,6 +3,8 @@ Auto-categorization utility for transactions
 Maps common merchants and keywords to categories
 """
 
+from src.utils.keyword_automaton import KeywordAutomaton
+
 # Merchant and keyword mappings to category names
 CATEGORY_MAPPINGS = {
     'Groceries': [
@@ -80,6 +82,24 @@ CATEGORY_MAPPINGS = {
 }
 
 
+def _keyword_categories():
+    """
+    Category of each keyword
+    A keyword listed under several categories belongs to the first one, which
+    is the one a scan in dictionary order would find.
+    """
+    categories = {}
+    for category_name, keywords in CATEGORY_MAPPINGS.items():
+        for keyword in keywords:
+            categories.setdefault(keyword.lower(), category_name)
+    return categories
+
+
+_KEYWORD_CATEGORIES = _keyword_categories()
+_CATEGORY_ORDER = {name: index for index, name in enumerate(CATEGORY_MAPPINGS)}
+_KEYWORD_AUTOMATON = KeywordAutomaton(_KEYWORD_CATEGORIES)
+
+
 def auto_categorize_transaction(description, vendor=None):
     """
     Auto-categorize a transaction based on description and vendor
@@ -97,13 +117,12 @@ def auto_categorize_transaction(description, vendor=None):
     # Combine description and vendor for matching
     search_text = f"{description} {vendor or ''}".lower()
 
-    # Check each category's keywords
-    for category_name, keywords in CATEGORY_MAPPINGS.items():
-        for keyword in keywords:
-            if keyword.lower() in search_text:
-                return category_name
+    # Find every keyword in one pass; the earliest category in CATEGORY_MAPPINGS wins
+    found = _KEYWORD_AUTOMATON.search(search_text)
+    if not found:
+        return None
 
-    return None
+    return min((_KEYWORD_CATEGORIES[keyword] for keyword in found), key=_CATEGORY_ORDER.get)
 
 
 def get_category_by_name(category_name, user_id):
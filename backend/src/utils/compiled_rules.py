@@ -0,0 +1,389 @@
+"""
+Compiled transaction rules
+A user's active rules and category mappings with patterns compiled and case-folded
+once, literal patterns indexed in keyword automatons, cached per rules version
+"""
+
+import json
+import re
+from bisect import bisect_left, bisect_right
+from src.models.category import CategoryMapping
+from src.models.transaction_rule import TransactionRule
+from src.utils.analytics_cache import AnalyticsCache
+from src.utils.keyword_automaton import KeywordAutomaton
+
+
+class CompiledRule:
+    """
+    Immutable, precompiled copy of a TransactionRule
+    matches() and apply() behave exactly like the model's methods, except that
+    apply() leaves match accounting to the caller.
+    """
+
+    __slots__ = (
+        'id', 'name', 'priority', 'pattern_field', 'case_sensitive', 'is_regex', 'needle', 'regex',
+        'amount_min', 'amount_max', 'transaction_type_filter', 'auto_category_id', 'auto_account_id',
+        'auto_transaction_type', 'tags', 'auto_notes'
+    )
+
+    def __init__(self, rule):
+        self.id = rule.id
+        self.name = rule.name
+        self.priority = rule.priority
+        self.pattern_field = rule.pattern_field
+        self.case_sensitive = rule.case_sensitive
+        self.is_regex = rule.is_regex
+        self.amount_min = rule.amount_min
+        self.amount_max = rule.amount_max
+        self.transaction_type_filter = rule.transaction_type_filter
+        self.auto_category_id = rule.auto_category_id
+        self.auto_account_id = rule.auto_account_id
+        self.auto_transaction_type = rule.auto_transaction_type
+        self.auto_notes = rule.auto_notes
+
+        # Case-insensitive rules match the lowercased pattern against the lowercased value
+        pattern = rule.pattern if rule.case_sensitive else rule.pattern.lower()
+        self.needle = None if rule.is_regex else pattern
+        self.regex = None
+        if rule.is_regex:
+            try:
+                self.regex = re.compile(pattern)
+            except re.error:
+                pass  # Invalid patterns never match
+
+        self.tags = None
+        if rule.auto_tags:
+            try:
+                self.tags = json.loads(rule.auto_tags) if isinstance(rule.auto_tags, str) else rule.auto_tags
+            except (ValueError, TypeError):
+                pass
+
+    def passes_filters(self, transaction_data):
+        """Type and amount checks, before any text matching"""
+        if self.transaction_type_filter:
+            if transaction_data.get('transaction_type', '') != self.transaction_type_filter:
+                return False
+
+        if self.amount_min is not None or self.amount_max is not None:
+            try:
+                amount = float(abs(transaction_data.get('amount', 0)))  # Use absolute value
+            except (ValueError, TypeError):
+                return False
+            if self.amount_min is not None and amount < self.amount_min:
+                return False
+            if self.amount_max is not None and amount > self.amount_max:
+                return False
+
+        return True
+
+    def matches_text(self, field_value):
+        """Match an already stringified (and, for case-insensitive rules, lowercased) field value"""
+        if self.is_regex:
+            return self.regex is not None and self.regex.search(field_value) is not None
+        return self.needle in field_value
+
+    def matches(self, transaction_data):
+        """Check if this rule matches the given transaction data"""
+        return self.passes_filters(transaction_data) and self.matches_field(transaction_data)
+
+    def matches_field(self, transaction_data):
+        """The text part of matches(), without the type and amount checks"""
+        field_value = transaction_data.get(self.pattern_field, '')
+        if not field_value:
+            return False
+
+        field_value = str(field_value)
+        if not self.case_sensitive:
+            field_value = field_value.lower()
+        return self.matches_text(field_value)
+
+    def apply(self, transaction_data):
+        """Apply this rule's actions to transaction data"""
+        if self.auto_category_id:
+            transaction_data['category_id'] = self.auto_category_id
+
+        if self.auto_account_id:
+            transaction_data['account_id'] = self.auto_account_id
+
+        if self.auto_transaction_type:
+            transaction_data['transaction_type'] = self.auto_transaction_type
+
+        if self.tags is not None:
+            transaction_data['tags'] = list(self.tags) if isinstance(self.tags, list) else self.tags
+
+        if self.auto_notes:
+            existing_notes = transaction_data.get('notes', '')
+            if existing_notes:
+                transaction_data['notes'] = f"{existing_notes}\n{self.auto_notes}"
+            else:
+                transaction_data['notes'] = self.auto_notes
+
+        return transaction_data
+
+
+class RuleIndex:
+    """
+    Which compiled rules a transaction's type and amount let through
+    Rule sets are represented as bitmasks over rule positions. Type filters
+    are bucketed by type; amount bounds are kept as sorted endpoints with
+    prefix/suffix masks, so a lookup is two bisections and a few mask ANDs
+    however many amount-banded rules there are.
+    """
+
+    def __init__(self, rules):
+        self._untyped = 0
+        self._typed = {}
+        self._unbounded = 0
+        bounded = []
+        for index, rule in enumerate(rules):
+            bit = 1 << index
+            if rule.transaction_type_filter:
+                self._typed[rule.transaction_type_filter] = self._typed.get(rule.transaction_type_filter, 0) | bit
+            else:
+                self._untyped |= bit
+
+            if rule.amount_min is None and rule.amount_max is None:
+                self._unbounded |= bit
+            else:
+                low = rule.amount_min if rule.amount_min is not None else float('-inf')
+                high = rule.amount_max if rule.amount_max is not None else float('inf')
+                bounded.append((low, high, bit))
+
+        self._bounded = bool(bounded)
+
+        # _low_prefix[j]: rules with the j smallest lower bounds
+        bounded.sort(key=lambda bound: bound[0])
+        self._lows = [low for low, _, _ in bounded]
+        self._low_prefix = [0]
+        for _, _, bit in bounded:
+            self._low_prefix.append(self._low_prefix[-1] | bit)
+
+        # _high_suffix[j]: rules with upper bounds from the j-th smallest on
+        bounded.sort(key=lambda bound: bound[1])
+        self._highs = [high for _, high, _ in bounded]
+        self._high_suffix = [0] * (len(bounded) + 1)
+        for j in range(len(bounded) - 1, -1, -1):
+            self._high_suffix[j] = self._high_suffix[j + 1] | bounded[j][2]
+
+    def eligible(self, transaction_data):
+        """Bitmask of the rules whose type and amount checks pass (see CompiledRule.passes_filters)"""
+        try:
+            rules = self._untyped | self._typed.get(transaction_data.get('transaction_type', ''), 0)
+        except TypeError:
+            rules = self._untyped  # Unhashable types equal no filter
+        if not self._bounded:
+            return rules
+
+        try:
+            amount = float(abs(transaction_data.get('amount', 0)))  # Use absolute value
+        except (ValueError, TypeError):
+            return rules & self._unbounded
+        if amount != amount:
+            return rules  # NaN fails no bound check
+
+        within = self._low_prefix[bisect_right(self._lows, amount)] & self._high_suffix[bisect_left(self._highs, amount)]
+        return rules & (self._unbounded | within)
+
+
+class CompiledRuleSet:
+    """
+    A user's active rules, compiled and sorted by priority (highest first)
+    A RuleIndex narrows the rules to those whose type and amount checks pass
+    before any text is looked at. Literal patterns are indexed in one keyword
+    automaton per matched field and case mode, so finding the rules whose text
+    matches takes one pass over each field however many rules there are; only
+    regex rules are tried one by one. Shared across requests, so it holds no
+    ORM objects.
+    """
+
+    def __init__(self, rules):
+        self.rules = [CompiledRule(rule) for rule in rules]
+        self._index = RuleIndex(self.rules)
+
+        # {(pattern_field, case_sensitive): {needle: rules mask}}
+        needles = {}
+        self._unindexed = 0
+        for index, rule in enumerate(self.rules):
+            if rule.needle:
+                group = needles.setdefault((rule.pattern_field, rule.case_sensitive), {})
+                group[rule.needle] = group.get(rule.needle, 0) | (1 << index)
+            else:
+                self._unindexed |= 1 << index
+
+        # {(pattern_field, case_sensitive): (automaton, {needle: rules mask}, mask of all its rules)}
+        self._literals = {}
+        for key, group in needles.items():
+            rules_mask = 0
+            for mask in group.values():
+                rules_mask |= mask
+            self._literals[key] = (KeywordAutomaton(group), group, rules_mask)
+
+    @classmethod
+    def load(cls, user_id, rule_ids=None):
+        """Compile the user's active rules (optionally only rule_ids) from one query"""
+        query = TransactionRule.query.filter(
+            TransactionRule.user_id == user_id,
+            TransactionRule.active == True
+        )
+        if rule_ids:
+            query = query.filter(TransactionRule.id.in_(rule_ids))
+        return cls(query.order_by(TransactionRule.priority.desc(), TransactionRule.id).all())
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _literal_hits(self, transaction_data, eligible):
+        """Mask of literal rules among `eligible` whose pattern occurs in their field"""
+        hits = 0
+        for (field, case_sensitive), (automaton, group, rules_mask) in self._literals.items():
+            if not rules_mask & eligible:
+                continue
+            field_value = transaction_data.get(field, '')
+            if not field_value:
+                continue
+            field_value = str(field_value)
+            if not case_sensitive:
+                field_value = field_value.lower()
+            for needle in automaton.search(field_value):
+                hits |= group[needle]
+        return hits & eligible
+
+    def _matching(self, transaction_data, after=-1):
+        """Indexes of the rules matching the transaction, in priority order, skipping up to `after`"""
+        eligible = self._index.eligible(transaction_data) >> (after + 1) << (after + 1)
+        if not eligible:
+            return
+
+        hits = self._literal_hits(transaction_data, eligible)
+        candidates = hits | (self._unindexed & eligible)
+        while candidates:
+            lowest = candidates & -candidates
+            candidates ^= lowest
+            index = lowest.bit_length() - 1
+            if lowest & hits or self.rules[index].matches_field(transaction_data):
+                yield index
+
+    def apply_all(self, transaction_data):
+        """
+        Apply every matching rule in priority order, returns (transaction_data, matched rules)
+        Later rules are matched against the changes earlier rules made.
+        """
+        matched = []
+        index = -1
+        while True:
+            # Search again after every applied rule, its actions may change what matches
+            index = next(self._matching(transaction_data, index), None)
+            if index is None:
+                return transaction_data, matched
+            rule = self.rules[index]
+            transaction_data = rule.apply(transaction_data)
+            matched.append(rule)
+
+    def first_match(self, transaction_data):
+        """The highest priority rule matching the transaction, or None"""
+        index = next(self._matching(transaction_data), None)
+        return None if index is None else self.rules[index]
+
+
+class CompiledMappingSet:
+    """
+    A user's active category mappings with keywords indexed in a keyword automaton
+    candidates() returns every matching mapping with the score
+    helpers.auto_categorize_transaction gives it, minus the match_count term,
+    which changes on every match and is therefore supplied by the caller to best().
+    """
+
+    def __init__(self, mappings):
+        self.mappings = {}
+        keywords = {}
+        self._regexes = []
+        for mapping in mappings:
+            self.mappings[mapping.id] = (mapping.category_id, mapping.priority or 0, mapping.is_regex)
+            base_score = (mapping.priority or 0) * 100 + len(mapping.keyword)
+            if mapping.is_regex:
+                try:
+                    self._regexes.append((mapping.id, re.compile(mapping.keyword, re.IGNORECASE), base_score))
+                    continue
+                except re.error:
+                    pass  # If regex is invalid, fall back to simple substring search
+            keywords.setdefault(mapping.keyword.lower(), []).append((mapping.id, base_score))
+
+        self._keywords = keywords
+        self._automaton = KeywordAutomaton(keywords)
+        self._empty = '' in keywords
+
+    @classmethod
+    def load(cls, user_id):
+        """Compile the user's active mappings from one query"""
+        return cls(CategoryMapping.query.with_entities(
+            CategoryMapping.id, CategoryMapping.keyword, CategoryMapping.category_id,
+            CategoryMapping.is_regex, CategoryMapping.priority
+        ).filter(
+            CategoryMapping.user_id == user_id,
+            CategoryMapping.active == True
+        ).all())
+
+    def __len__(self):
+        return len(self.mappings)
+
+    def candidates(self, description):
+        """{mapping_id: score without the match_count term} for mappings matching a normalized description"""
+        found = self._automaton.search(description)
+        if self._empty:
+            found[''] = 0  # An empty keyword matches at the start of anything
+
+        scores = {}
+        for keyword, position in found.items():
+            for mapping_id, score in self._keywords[keyword]:
+                # Adjust score based on position (if simple keyword)
+                if not self.mappings[mapping_id][2]:
+                    if position == 0:  # Matches at the start
+                        score += 50
+                    else:  # Adjust based on how early it appears
+                        score += max(0, 30 - position)
+                scores[mapping_id] = score
+
+        for mapping_id, pattern, score in self._regexes:
+            if pattern.search(description):
+                scores[mapping_id] = score
+
+        return scores
+
+    def best(self, scores, match_counts):
+        """
+        Id of the winning mapping among candidates(), None if there is none
+        match_counts maps mapping ids to their current match_count; candidates
+        missing from it (deleted since compiling) are skipped.
+        """
+        def rank(mapping_id):
+            # Sort matches by score, then in the order mappings were listed: priority, match count
+            match_count = match_counts[mapping_id] or 0
+            priority = self.mappings[mapping_id][1]
+            return (-(scores[mapping_id] + match_count * 10), -priority, -match_count, mapping_id)
+
+        candidates = [mapping_id for mapping_id in scores if mapping_id in match_counts]
+        return min(candidates, key=rank) if candidates else None
+
+
+# Shared per-process cache of compiled rule and mapping sets
+rule_set_cache = AnalyticsCache(max_entries=256)
+
+
+def get_rule_set(user_id):
+    """The user's compiled active rules, recompiled only after their rules version changes"""
+    from src.models.rules_version import request_rules_version
+
+    return rule_set_cache.get_or_compute(
+        user_id, 'rule_set', lambda: CompiledRuleSet.load(user_id), version=request_rules_version(user_id),
+        kind='rules'
+    )
+
+
+def get_mapping_set(user_id):
+    """The user's compiled active category mappings, recompiled only after their rules version changes"""
+    from src.models.rules_version import request_rules_version
+
+    return rule_set_cache.get_or_compute(
+        user_id, 'mapping_set', lambda: CompiledMappingSet.load(user_id), version=request_rules_version(user_id),
+        kind='rules'
+    )
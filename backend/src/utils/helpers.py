@@ -2,13 +2,14 @@
 Helper utility functions
 """
 
-import re
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 from src.models.transaction import Expense
 from src.models.category import CategoryMapping
 from src.models.group import Settlement
-from src.models.user import User
 from src.extensions import db
+from src.utils.compiled_rules import get_mapping_set
+from src.utils.merchant import normalize_merchant, merchant_decision_cache
+from src.utils.split_calculator import SplitCalculator
 
 def auto_categorize_transaction(description, user_id):
     """
@@ -20,57 +21,56 @@ def auto_categorize_transaction(description, user_id):
         
     # Standardize description - lowercase and remove extra spaces
     description = description.strip().lower()
+
+    # Bank feeds repeat each merchant with varying noise (store numbers, dates,
+    # card suffixes), so decisions are remembered per normalized merchant
+    merchant = normalize_merchant(description)
+    if merchant:
+        from src.models.rules_version import request_rules_version
+
+        version = request_rules_version(user_id)
+        decision = merchant_decision_cache.get(user_id, merchant, version)
+        if decision is not None:
+            category_id, mapping_id = decision
+            if mapping_id is not None:
+                _count_mapping_match(mapping_id)
+            return category_id
     
-    # Get all active category mappings for the user
-    mappings = CategoryMapping.query.filter_by(
-        user_id=user_id,
-        active=True
-    ).order_by(CategoryMapping.priority.desc(), CategoryMapping.match_count.desc()).all()
-    
-    # Keep track of matches and their scores
-    matches = []
-    
-    # Check each mapping
-    for mapping in mappings:
-        matched = False
-        if mapping.is_regex:
-            # Use regex pattern matching
-            try:
-                pattern = re.compile(mapping.keyword, re.IGNORECASE)
-                if pattern.search(description):
-                    matched = True
-            except:
-                # If regex is invalid, fall back to simple substring search
-                matched = mapping.keyword.lower() in description
-        else:
-            # Simple substring matching
-            matched = mapping.keyword.lower() in description
-            
-        if matched:
-            # Calculate match score
-            score = (mapping.priority * 100) + (mapping.match_count * 10) + len(mapping.keyword)
-            
-            # Adjust score based on position (if simple keyword)
-            if not mapping.is_regex:
-                position = description.find(mapping.keyword.lower())
-                if position == 0:  # Matches at the start
-                    score += 50
-                elif position > 0:  # Adjust based on how early it appears
-                    score += max(0, 30 - position)
-                    
-            matches.append((mapping, score))
-    
-    # Sort matches by score, descending
-    matches.sort(key=lambda x: x[1], reverse=True)
-    
-    # If we have any matches, increment the match count for the winner and return its category ID
-    if matches:
-        best_mapping = matches[0][0]
-        best_mapping.match_count += 1
-        db.session.commit()
-        return best_mapping.category_id
-    
-    return None
+    # Every active mapping of the user matching the description, found with one
+    # pass of the user's compiled keyword automaton
+    mapping_set = get_mapping_set(user_id)
+    scores = mapping_set.candidates(description)
+    merchant_scores = mapping_set.candidates(merchant) if merchant else {}
+
+    # Match counts change on every match, so they are read for the candidates only
+    candidate_ids = set(scores) | set(merchant_scores)
+    match_counts = dict(
+        db.session.query(CategoryMapping.id, CategoryMapping.match_count).filter(CategoryMapping.id.in_(candidate_ids))
+    ) if candidate_ids else {}
+
+    best_mapping_id = mapping_set.best(scores, match_counts)
+    if best_mapping_id is None:
+        return None
+    category_id = mapping_set.mappings[best_mapping_id][0]
+
+    # Only decisions the noise didn't influence are remembered for the merchant,
+    # stored with the match count and kept in memory once that has committed
+    remember = merchant and mapping_set.best(merchant_scores, match_counts) == best_mapping_id
+    if remember:
+        merchant_decision_cache.write(user_id, version, {merchant: (category_id, best_mapping_id)})
+
+    # Increment the match count for the winner and return its category ID
+    _count_mapping_match(best_mapping_id)
+    if remember:
+        merchant_decision_cache.put(user_id, merchant, version, category_id, best_mapping_id)
+    return category_id
+
+
+def _count_mapping_match(mapping_id):
+    CategoryMapping.query.filter(CategoryMapping.id == mapping_id).update({
+        CategoryMapping.match_count: func.coalesce(CategoryMapping.match_count, 0) + 1
+    }, synchronize_session=False)
+    db.session.commit()
 
 
 def calculate_balances(user_id):
@@ -81,12 +81,15 @@ def calculate_balances(user_id):
     expenses = Expense.query.filter(
         or_(
             Expense.paid_by == user_id,
-            Expense.split_with.like(f'%{user_id}%')
+            Expense.split_with_user(user_id)
         )
     ).all()
+
+    # Calculate all splits up front with a single user lookup
+    expense_splits = SplitCalculator.compute_many(expenses)
     
     for expense in expenses:
-        splits = expense.calculate_splits()
+        splits = expense_splits[expense.id]
         
         # If current user paid for the expense
         if expense.paid_by == user_id:
@@ -95,10 +98,9 @@ def calculate_balances(user_id):
                 other_user_id = split['email']
                 if other_user_id != user_id:
                     if other_user_id not in balances:
-                        other_user = User.query.filter_by(id=other_user_id).first()
                         balances[other_user_id] = {
                             'user_id': other_user_id,
-                            'name': other_user.name if other_user else 'Unknown',
+                            'name': split['name'],
                             'email': other_user_id,
                             'amount': 0
                         }
@@ -118,10 +120,9 @@ def calculate_balances(user_id):
             
             if current_user_portion > 0:
                 if payer_id not in balances:
-                    payer = User.query.filter_by(id=payer_id).first()
                     balances[payer_id] = {
                         'user_id': payer_id,
-                        'name': payer.name if payer else 'Unknown',
+                        'name': splits['payer']['name'],
                         'email': payer_id,
                         'amount': 0
                     }
@@ -134,16 +135,22 @@ def calculate_balances(user_id):
             Settlement.receiver_id == user_id
         )
     ).all()
+
+    # Load names for settlement counterparties not already seen in expenses
+    settlement_user_ids = {
+        settlement.receiver_id if settlement.payer_id == user_id else settlement.payer_id
+        for settlement in settlements
+    }
+    settlement_users = SplitCalculator.load_users(settlement_user_ids - set(balances))
     
     for settlement in settlements:
         if settlement.payer_id == user_id:
             # Current user paid money to someone else
             other_user_id = settlement.receiver_id
             if other_user_id not in balances:
-                other_user = User.query.filter_by(id=other_user_id).first()
                 balances[other_user_id] = {
                     'user_id': other_user_id,
-                    'name': other_user.name if other_user else 'Unknown',
+                    'name': settlement_users.get(other_user_id, 'Unknown'),
                     'email': other_user_id,
                     'amount': 0
                 }
@@ -153,10 +160,9 @@ def calculate_balances(user_id):
             # Current user received money from someone else
             other_user_id = settlement.payer_id
             if other_user_id not in balances:
-                other_user = User.query.filter_by(id=other_user_id).first()
                 balances[other_user_id] = {
                     'user_id': other_user_id,
-                    'name': other_user.name if other_user else 'Unknown',
+                    'name': settlement_users.get(other_user_id, 'Unknown'),
                     'email': other_user_id,
                     'amount': 0
                 }
@@ -190,28 +196,34 @@ def get_base_currency(current_user=None):
         }
 
 
-def sync_investments_with_accounts(user_id):
-    """Sync investment portfolios with their linked accounts, but only for manually added accounts"""
+def sync_investments_with_accounts(user_id=None):
+    """
+    Sync investment portfolios with their linked accounts, but only for manually added accounts
+    Runs when holdings or prices change and from a scheduled job; syncs every user when user_id is None.
+    Returns the number of account balances updated.
+    """
     from flask import current_app
     from src.models.investment import Portfolio
     from src.models.account import Account
 
     try:
-        # Get all portfolios for the user that are linked to accounts
-        portfolios = Portfolio.query.filter(
-            Portfolio.user_id == user_id,
-            Portfolio.account_id.isnot(None)
-        ).all()
+        # Get all portfolios (for the user) that are linked to accounts
+        query = Portfolio.query.filter(Portfolio.account_id.isnot(None))
+        if user_id is not None:
+            query = query.filter(Portfolio.user_id == user_id)
+        portfolios = query.all()
 
         if not portfolios:
-            return  # No linked portfolios, nothing to sync
+            return 0  # No linked portfolios, nothing to sync
 
-        for portfolio in portfolios:
-            # Skip if no linked account
-            if not portfolio.account_id:
-                continue
+        accounts = {
+            account.id: account
+            for account in Account.query.filter(Account.id.in_({p.account_id for p in portfolios}))
+        }
 
-            account = Account.query.get(portfolio.account_id)
+        updated = 0
+        for portfolio in portfolios:
+            account = accounts.get(portfolio.account_id)
             if not account:
                 continue
 
@@ -219,18 +231,21 @@ def sync_investments_with_accounts(user_id):
             if account.import_source == 'simplefin':
                 continue
 
-            # Calculate current portfolio value
+            # Update the account balance to match the current portfolio value
             portfolio_value = portfolio.calculate_total_value()
+            if account.balance != portfolio_value:
+                account.balance = portfolio_value
+                updated += 1
 
-            # Update the account balance to match the portfolio value
-            account.balance = portfolio_value
-
-        # Save all changes
-        db.session.commit()
+        # Only write when a balance actually changed
+        if updated:
+            db.session.commit()
+        return updated
 
     except Exception as e:
         current_app.logger.error(f"Error syncing investments with accounts: {str(e)}")
         db.session.rollback()  # Rollback on error
+        return 0
 
 
 def calculate_asset_debt_trends(current_user):
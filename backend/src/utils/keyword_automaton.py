@@ -0,0 +1,68 @@
+"""
+Keyword automaton
+Aho-Corasick matching of many literal keywords in one pass over a text
+"""
+
+
+class KeywordAutomaton:
+    """
+    Finds every keyword occurring in a text in a single left-to-right scan
+    The cost of a search depends on the length of the text and the number
+    of hits, not on how many keywords were compiled in. Matching is exact;
+    callers lowercase both keywords and text for case-insensitive matching.
+    """
+
+    def __init__(self, keywords):
+        # Empty keywords would match everywhere; callers handle them on their own
+        self.keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+
+        goto = [{}]
+        outputs = [()]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] = (keyword,)
+
+        # Breadth first over the trie: fill in failure links, inherit the outputs
+        # of each state's longest proper suffix and fold failures into a full
+        # transition table, so searching never has to backtrack
+        transitions = [dict(goto[0])]
+        transitions.extend({} for _ in range(len(goto) - 1))
+        fail = [0] * len(goto)
+        level = list(goto[0].values())
+        while level:
+            next_level = []
+            for state in level:
+                transitions[state] = dict(transitions[fail[state]])
+                transitions[state].update(goto[state])
+                outputs[state] = outputs[state] + outputs[fail[state]]
+                for char, child in goto[state].items():
+                    fail[child] = transitions[fail[state]].get(char, 0)
+                    next_level.append(child)
+            level = next_level
+
+        self._transitions = transitions
+        self._outputs = outputs
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def search(self, text):
+        """{keyword: start of its first occurrence} for every keyword found in text"""
+        transitions = self._transitions
+        outputs = self._outputs
+        found = {}
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = transitions[state].get(char, 0)
+            for keyword in outputs[state]:
+                if keyword not in found:
+                    found[keyword] = end - len(keyword)
+        return found
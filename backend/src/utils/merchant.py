@@ -0,0 +1,141 @@
+"""
+Merchant normalization and memoized categorization decisions
+Bank feeds repeat one merchant with varying noise; decisions are cached per normalized merchant
+"""
+
+import re
+from src.extensions import db
+from src.utils.analytics_cache import AnalyticsCache
+
+# Payment processor and terminal prefixes in front of the merchant name
+_PREFIX = re.compile(
+    r'^(?:(?:pos|debit card|checkcard|recurring)\s+(?:purchase\s+|debit\s+)?|(?:sq|tst|sp|pp)\s*\*\s*)'
+)
+
+# Noise inside descriptions, removed in this order
+_NOISE = (
+    re.compile(r'\b\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{2,4})?\b'),  # Dates
+    re.compile(r'\b(?:card|acct|account)\s*(?:ending\s*(?:in\s*)?)?#?\s*\d{2,}\b'),  # Card suffixes
+    re.compile(r'(?:\bx{2,}|\*+)\s*\d{2,}\b'),  # Masked card numbers
+    re.compile(r'(?:#|\bno\.\s*|\bstore\s+)\s*\d+\b'),  # Store numbers
+    re.compile(r'\b[a-z]*\d{3,}[a-z\d]*\b'),  # Reference numbers, terminal ids, zip codes
+    re.compile(r'\b(?=[a-z]*\d[a-z]*\d)[a-z\d]{5,}\b'),  # Mixed order ids like 2k4ll1
+)
+
+_PUNCTUATION = re.compile(r"[^a-z0-9&.'\- ]+")
+_SPACES = re.compile(r'\s+')
+
+US_STATES = frozenset((
+    'al ak az ar ca co ct de dc fl ga hi id il in ia ks ky la me md ma mi mn ms mo mt ne nv nh nj nm '
+    'ny nc nd oh ok or pa ri sc sd tn tx ut vt va wa wv wi wy'
+).split())
+
+
+def normalize_merchant(description):
+    """
+    Reduce a transaction description to its merchant
+    Lowercases and drops processor prefixes, dates, card suffixes, store and
+    reference numbers and a trailing "city ST" pair, e.g.
+    'SQ *BLUE BOTTLE #0412 OAKLAND CA 03/14' -> 'blue bottle'.
+    Returns '' when nothing is left.
+    """
+    if not description:
+        return ''
+
+    text = _PREFIX.sub('', description.strip().lower())
+    for pattern in _NOISE:
+        text = pattern.sub(' ', text)
+    tokens = _SPACES.sub(' ', _PUNCTUATION.sub(' ', text)).split()
+
+    # City and state, only when something is left in front of them
+    if len(tokens) >= 3 and tokens[-1] in US_STATES:
+        tokens = tokens[:-2]
+
+    return ' '.join(tokens).strip(" .-'")
+
+
+class MerchantDecisionCache:
+    """
+    Per-user categorization decisions keyed by normalized merchant
+    An in-process LRU in front of the merchant_category_cache table, so
+    decisions survive restarts and are shared between worker processes.
+    Entries carry the user's rules version: any rule or mapping change makes
+    them unreachable (and bump_rules_version deletes the stored rows).
+    A decision is (category_id, mapping_id) of a matching mapping; "no match"
+    is never stored. Callers write() decisions with their own transaction and
+    put() them in memory once it has committed.
+    """
+
+    ENDPOINT = 'merchant_decision'
+
+    def __init__(self, max_entries=None):
+        self._memory = AnalyticsCache(max_entries=max_entries)
+
+    @property
+    def stats(self):
+        return self._memory.stats
+
+    def get(self, user_id, merchant, version):
+        """The cached decision for a merchant, or None when there is none"""
+        from src.models.merchant_cache import MerchantCategoryCache
+
+        if len(merchant) > MerchantCategoryCache.MERCHANT_LENGTH:
+            return None
+
+        params = {'merchant': merchant}
+        decision = self._memory.get(user_id, self.ENDPOINT, params=params, version=version)
+        if decision is not None:
+            return decision
+
+        row = db.session.query(
+            MerchantCategoryCache.category_id, MerchantCategoryCache.mapping_id
+        ).filter(
+            MerchantCategoryCache.user_id == user_id,
+            MerchantCategoryCache.merchant == merchant,
+            MerchantCategoryCache.rules_version == version
+        ).order_by(MerchantCategoryCache.id.desc()).first()
+        if row is None:
+            return None
+
+        decision = (row.category_id, row.mapping_id)
+        self._memory.put(user_id, self.ENDPOINT, decision, params=params, version=version)
+        return decision
+
+    def put(self, user_id, merchant, version, category_id, mapping_id):
+        """Keep a committed decision in memory"""
+        decision = (category_id, mapping_id)
+        if mapping_id is not None:
+            self._memory.put(user_id, self.ENDPOINT, decision, params={'merchant': merchant}, version=version)
+        return decision
+
+    @staticmethod
+    def write(user_id, version, decisions, session=None):
+        """
+        Store {merchant: (category_id, mapping_id)} with one INSERT (does not commit)
+        "No match" decisions and merchants too long for the table are skipped.
+        Returns the number of rows written.
+        """
+        from src.models.merchant_cache import MerchantCategoryCache
+
+        rows = [
+            {
+                'user_id': user_id,
+                'merchant': merchant,
+                'rules_version': version,
+                'category_id': category_id,
+                'mapping_id': mapping_id
+            }
+            for merchant, (category_id, mapping_id) in decisions.items()
+            if mapping_id is not None and len(merchant) <= MerchantCategoryCache.MERCHANT_LENGTH
+        ]
+        if rows:
+            (session or db.session).execute(MerchantCategoryCache.__table__.insert(), rows)
+        return len(rows)
+
+    def clear(self, user_id=None):
+        """Drop in-process entries, for every user or one"""
+        self._memory.clear(user_id)
+
+
+# Shared per-process cache
+merchant_decision_cache = MerchantDecisionCache(max_entries=4096)
@@ -5,6 +5,8 @@ Applies transaction rules for auto-categorization and automation
 
 from src.models.transaction_rule import TransactionRule
 from src.extensions import db
+from src.utils.compiled_rules import get_rule_set
+from src.utils.rule_matches import write_rule_matches
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,43 +23,24 @@ def apply_transaction_rules(transaction_data, user_id):
     Returns:
         dict: Updated transaction data with rules applied
     """
-    # Get all active rules for user, ordered by priority (highest first)
-    rules = TransactionRule.query.filter_by(
-        user_id=user_id,
-        active=True
-    ).order_by(TransactionRule.priority.desc()).all()
-
-    logger.info(f"Applying {len(rules)} rules for user {user_id}")
-
-    # Track which rules matched for logging
-    matched_rules = []
-
-    # Apply each rule
-    for rule in rules:
-        if rule.matches(transaction_data):
-            logger.debug(f"Rule matched: {rule.name}")
-            matched_rules.append(rule.name)
+    # Active rules for user, compiled and ordered by priority (highest first)
+    rule_set = get_rule_set(user_id)
 
-            # Apply the rule's actions
-            transaction_data = rule.apply(transaction_data)
+    logger.info(f"Applying {len(rule_set)} rules for user {user_id}")
 
-            # Stop after first match if desired (can make this configurable)
-            # For now, we'll apply all matching rules in priority order
-            # The highest priority rule will set the category first,
-            # but lower priority rules can still add tags, notes, etc.
+    # Apply every matching rule in priority order
+    # The highest priority rule will set the category first,
+    # but lower priority rules can still add tags, notes, etc.
+    transaction_data, matched_rules = rule_set.apply_all(transaction_data)
 
     if matched_rules:
-        logger.info(f"Matched rules: {', '.join(matched_rules)}")
+        logger.info(f"Matched rules: {', '.join(rule.name for rule in matched_rules)}")
+        # Match counts are written with the caller's transaction, which commits them
+        # together with the categorized expense
+        write_rule_matches([rule.id for rule in matched_rules])
     else:
         logger.debug(f"No rules matched for transaction: {transaction_data.get('description', '')}")
 
-    # Commit rule match count updates
-    try:
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Failed to commit rule match counts: {str(e)}")
-        db.session.rollback()
-
     return transaction_data
 
 
@@ -72,16 +55,8 @@ def get_matching_rule(transaction_data, user_id):
     Returns:
         TransactionRule: First matching rule or None
     """
-    rules = TransactionRule.query.filter_by(
-        user_id=user_id,
-        active=True
-    ).order_by(TransactionRule.priority.desc()).all()
-
-    for rule in rules:
-        if rule.matches(transaction_data):
-            return rule
-
-    return None
+    rule = get_rule_set(user_id).first_match(transaction_data)
+    return TransactionRule.query.get(rule.id) if rule else None
 
 
 def suggest_rule_from_edit(transaction, new_category_id, user_id):
@@ -154,7 +129,8 @@ def suggest_rule_from_edit(transaction, new_category_id, user_id):
 def bulk_apply_rules(user_id, rule_ids=None):
     """
     Apply rules to all existing transactions for a user
-    Useful for re-categorizing after creating new rules
+    Useful for re-categorizing after creating new rules. Runs in chunks (see
+    BulkRuleApplyService); /transaction-rules/bulk-apply runs it as a background job.
 
     Args:
         user_id: User ID
@@ -163,55 +139,16 @@ def bulk_apply_rules(user_id, rule_ids=None):
     Returns:
         dict: Summary of changes made
     """
-    from src.models.transaction import Expense
-
-    # Get transactions
-    transactions = Expense.query.filter_by(user_id=user_id).all()
-
-    # Get rules to apply
-    if rule_ids:
-        rules = TransactionRule.query.filter(
-            TransactionRule.id.in_(rule_ids),
-            TransactionRule.user_id == user_id,
-            TransactionRule.active == True
-        ).order_by(TransactionRule.priority.desc()).all()
-    else:
-        rules = TransactionRule.query.filter_by(
-            user_id=user_id,
-            active=True
-        ).order_by(TransactionRule.priority.desc()).all()
-
-    updated_count = 0
-
-    for transaction in transactions:
-        transaction_data = {
-            'description': transaction.description,
-            'amount': transaction.amount,
-            'transaction_type': transaction.transaction_type,
-            'category_id': transaction.category_id
-        }
-
-        # Track if category was changed
-        original_category = transaction.category_id
-
-        # Apply rules
-        for rule in rules:
-            if rule.matches(transaction_data):
-                transaction_data = rule.apply(transaction_data)
-                break  # Only apply first matching rule
-
-        # Update transaction if category changed
-        if transaction_data.get('category_id') != original_category:
-            transaction.category_id = transaction_data['category_id']
-            updated_count += 1
+    from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
 
     try:
-        db.session.commit()
-        logger.info(f"Bulk rule application: {updated_count} transactions updated")
+        result = BulkRuleApplyService.run(user_id, rule_ids)
+        logger.info(f"Bulk rule application: {result['updated']} transactions updated")
         return {
             'success': True,
-            'transactions_processed': len(transactions),
-            'transactions_updated': updated_count
+            'transactions_processed': result['processed'],
+            'transactions_updated': result['updated'],
+            'elapsed': result['elapsed']
         }
     except Exception as e:
         db.session.rollback()
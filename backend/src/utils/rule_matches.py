@@ -0,0 +1,70 @@
+"""
+Rule match accounting
+Transaction rule hits written with the transaction that made them, in aggregated batches
+"""
+
+from datetime import datetime
+from sqlalchemy import bindparam, case, func
+from src.extensions import db
+from src.models.transaction_rule import TransactionRule
+
+
+class RuleMatchCounter:
+    """
+    Tally of rule matches for one database transaction
+    Hits are recorded here and write() adds them to match_count / last_matched
+    with one executemany UPDATE in the caller's session, so the counts commit
+    (or roll back) together with the expenses the rules categorized. Bulk jobs
+    tally a whole chunk and write it just before the chunk's commit.
+    """
+
+    def __init__(self):
+        self._pending = {}  # {rule_id: [count, last_matched]}
+
+    def record(self, rule_ids, matched_at=None):
+        """Count one match for every id in rule_ids (ids may repeat)"""
+        matched_at = matched_at or datetime.utcnow()
+        for rule_id in rule_ids:
+            entry = self._pending.get(rule_id)
+            if entry is None:
+                self._pending[rule_id] = [1, matched_at]
+            else:
+                entry[0] += 1
+                entry[1] = max(entry[1], matched_at)
+
+    def pending(self):
+        """{rule_id: (count, last_matched)} not yet written"""
+        return {rule_id: tuple(entry) for rule_id, entry in self._pending.items()}
+
+    def write(self, session=None):
+        """
+        Add the recorded counts with one aggregated UPDATE (does not commit)
+        Returns the number of rules updated.
+        """
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        table = TransactionRule.__table__
+        statement = table.update().where(
+            table.c.id == bindparam('b_id')
+        ).values(
+            match_count=func.coalesce(table.c.match_count, 0) + bindparam('b_count'),
+            last_matched=case(
+                (table.c.last_matched == None, bindparam('b_last_matched')),
+                (table.c.last_matched < bindparam('b_last_matched'), bindparam('b_last_matched')),
+                else_=table.c.last_matched
+            )
+        )
+        (session or db.session).execute(statement, [
+            {'b_id': rule_id, 'b_count': count, 'b_last_matched': last_matched}
+            for rule_id, (count, last_matched) in batch.items()
+        ])
+        return len(batch)
+
+
+def write_rule_matches(rule_ids, matched_at=None, session=None):
+    """Add one match for every id in rule_ids in the current transaction (see RuleMatchCounter.write)"""
+    counter = RuleMatchCounter()
+    counter.record(rule_ids, matched_at)
+    return counter.write(session)
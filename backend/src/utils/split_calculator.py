@@ -0,0 +1,288 @@
+"""
+Split calculation engine
+Computes how an expense is divided between its payer and participants
+"""
+
+import json
+from src.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SplitCalculator:
+    """Calculates expense splits in bulk with a single user lookup"""
+
+    # Keep IN lists below SQLite's bound parameter limit
+    USER_LOOKUP_CHUNK_SIZE = 500
+
+    @classmethod
+    def compute_many(cls, expenses, users=None):
+        """
+        Calculate splits for many expenses at once
+        Loads every referenced user in one IN query and returns {expense_id: splits}
+        Pass a `users` dict to reuse names across calls; missing users are added to it
+        """
+        expenses = list(expenses)
+        if users is None:
+            users = cls.load_users(cls.referenced_user_ids(expenses))
+        else:
+            users.update(cls.load_users(cls.referenced_user_ids(expenses) - set(users)))
+
+        return {expense.id: cls.compute(expense, users) for expense in expenses}
+
+    @classmethod
+    def compute_one(cls, expense):
+        """Calculate splits for a single expense"""
+        return cls.compute(expense, cls.load_users(cls.referenced_user_ids([expense])))
+
+    @classmethod
+    def referenced_user_ids(cls, expenses):
+        """Collect the payer and participant IDs referenced by the given expenses"""
+        user_ids = set()
+        for expense in expenses:
+            user_ids.add(expense.paid_by)
+            for user_id in cls.parse_split_with(expense.split_with):
+                user_ids.add(user_id.strip())
+        return user_ids
+
+    @staticmethod
+    def user_share(splits, user_id):
+        """The given user's share of an expense from its calculated splits"""
+        if splits['payer']['id'] == user_id:
+            return splits['payer']['amount']
+        for split in splits['splits']:
+            if split['id'] == user_id:
+                return split['amount']
+        return 0
+
+    @staticmethod
+    def parse_split_with(split_with):
+        """Split the comma-separated participant list stored on an expense"""
+        return split_with.split(',') if split_with else []
+
+    @staticmethod
+    def parse_split_details(expense):
+        """Parse the JSON split details stored on an expense"""
+        split_details = {}
+        if expense.split_details:
+            try:
+                if isinstance(expense.split_details, str):
+                    split_details = json.loads(expense.split_details)
+                elif isinstance(expense.split_details, dict):
+                    split_details = expense.split_details
+            except Exception as e:
+                logger.warning(f"Error parsing split_details for expense {expense.id}: {str(e)}")
+                split_details = {}
+        return split_details
+
+    @classmethod
+    def load_users(cls, user_ids):
+        """Load names for the given user IDs, returns {user_id: name}"""
+        from src.models.user import User
+
+        user_ids = [user_id for user_id in user_ids if user_id]
+        users = {}
+
+        for i in range(0, len(user_ids), cls.USER_LOOKUP_CHUNK_SIZE):
+            chunk = user_ids[i:i + cls.USER_LOOKUP_CHUNK_SIZE]
+            rows = db.session.query(User.id, User.name).filter(User.id.in_(chunk)).all()
+            for user_id, name in rows:
+                users[user_id] = name
+
+        return users
+
+    @classmethod
+    def flush_users(cls, flush_context, user_ids):
+        """
+        load_users() shared by the flush hooks of one flush
+        Names are kept on the flush context, so each user is looked up at most once per flush
+        """
+        users = flush_context.attributes.setdefault('split_calculator_users', {})
+        looked_up = flush_context.attributes.setdefault('split_calculator_looked_up', set())
+        missing = set(user_ids) - looked_up
+        if missing:
+            users.update(cls.load_users(missing))
+            looked_up |= missing
+        return users
+
+    @classmethod
+    def compute(cls, expense, users):
+        """
+        Calculate splits for one expense using preloaded user names
+        `users` maps user ID to name, as returned by load_users()
+        """
+        # Get the user who paid
+        payer_name = users[expense.paid_by] if expense.paid_by in users else "Unknown"
+        payer_email = expense.paid_by if expense.paid_by in users else None
+
+        # Get all people this expense is split with
+        split_with_ids = cls.parse_split_with(expense.split_with)
+        split_users = []
+
+        for user_id in split_with_ids:
+            user_id = user_id.strip()
+            if user_id in users:
+                split_users.append({
+                    'id': user_id,
+                    'name': users[user_id],
+                    'email': user_id
+                })
+
+        # Handle case where original_amount is None by using amount
+        original_amount = expense.original_amount if expense.original_amount is not None else expense.amount
+
+        # Set up result structure with both base and original currency
+        result = {
+            'payer': {
+                'id': payer_email,  # Add id field
+                'name': payer_name,
+                'email': payer_email,
+                'amount': 0,  # Base currency amount
+                'original_amount': original_amount,  # Original amount
+                'currency_code': expense.currency_code  # Original currency code
+            },
+            'splits': []
+        }
+
+        # Parse split details if available
+        split_details = cls.parse_split_details(expense)
+
+        if expense.split_method == 'none' or not expense.split_with:
+            # No splitting - full amount to payer
+            result['payer']['amount'] = expense.amount
+
+        elif expense.split_method == 'equal':
+            total_participants = len(split_users) + (1 if expense.paid_by not in split_with_ids else 0)
+            per_person = expense.amount / total_participants if total_participants > 0 else 0
+            per_person_original = original_amount / total_participants if total_participants > 0 else 0
+
+            if expense.paid_by not in split_with_ids:
+                result['payer']['amount'] = per_person
+            else:
+                result['payer']['amount'] = 0
+
+            for user in split_users:
+                result['splits'].append({
+                    'id': user['email'],  # Add id field
+                    'name': user['name'],
+                    'email': user['email'],
+                    'amount': per_person,
+                    'original_amount': per_person_original,
+                    'currency_code': expense.currency_code
+                })
+
+        elif expense.split_method == 'percentage':
+            if split_details and isinstance(split_details, dict) and split_details.get('type') == 'percentage':
+                percentages = split_details.get('values', {})
+                total_assigned = 0
+                total_original_assigned = 0
+
+                payer_percent = float(percentages.get(expense.paid_by, 0))
+                payer_amount = (expense.amount * payer_percent) / 100
+                payer_original_amount = (original_amount * payer_percent) / 100
+
+                result['payer']['amount'] = payer_amount if expense.paid_by not in split_with_ids else 0
+                total_assigned += payer_amount if expense.paid_by not in split_with_ids else 0
+                total_original_assigned += payer_original_amount if expense.paid_by not in split_with_ids else 0
+
+                for user in split_users:
+                    user_percent = float(percentages.get(user['id'], 0))
+                    user_amount = (expense.amount * user_percent) / 100
+                    user_original_amount = (original_amount * user_percent) / 100
+
+                    result['splits'].append({
+                        'id': user['email'],  # Add id field
+                        'name': user['name'],
+                        'email': user['email'],
+                        'amount': user_amount,
+                        'original_amount': user_original_amount,
+                        'currency_code': expense.currency_code
+                    })
+                    total_assigned += user_amount
+                    total_original_assigned += user_original_amount
+
+                if abs(total_assigned - expense.amount) > 0.01:
+                    difference = expense.amount - total_assigned
+                    if result['splits']:
+                        result['splits'][-1]['amount'] += difference
+                    elif result['payer']['amount'] > 0:
+                        result['payer']['amount'] += difference
+            else:
+                payer_percentage = expense.split_value if expense.split_value is not None else 0
+                payer_amount = (expense.amount * payer_percentage) / 100
+                payer_original_amount = (original_amount * payer_percentage) / 100
+
+                result['payer']['amount'] = payer_amount if expense.paid_by not in split_with_ids else 0
+
+                remaining = expense.amount - result['payer']['amount']
+                remaining_original = original_amount - payer_original_amount
+                per_person = remaining / len(split_users) if split_users else 0
+                per_person_original = remaining_original / len(split_users) if split_users else 0
+
+                for user in split_users:
+                    result['splits'].append({
+                        'id': user['email'],  # Add id field
+                        'name': user['name'],
+                        'email': user['email'],
+                        'amount': per_person,
+                        'original_amount': per_person_original,
+                        'currency_code': expense.currency_code
+                    })
+
+        elif expense.split_method == 'custom':
+            if split_details and isinstance(split_details, dict) and split_details.get('type') in ['amount', 'custom']:
+                amounts = split_details.get('values', {})
+                total_assigned = 0
+
+                payer_amount = float(amounts.get(expense.paid_by, 0))
+                payer_ratio = payer_amount / expense.amount if expense.amount else 0
+                payer_original_amount = original_amount * payer_ratio
+
+                result['payer']['amount'] = payer_amount if expense.paid_by not in split_with_ids else 0
+                total_assigned += payer_amount if expense.paid_by not in split_with_ids else 0
+
+                for user in split_users:
+                    user_amount = float(amounts.get(user['id'], 0))
+                    user_ratio = user_amount / expense.amount if expense.amount else 0
+                    user_original_amount = original_amount * user_ratio
+
+                    result['splits'].append({
+                        'id': user['email'],  # Add id field
+                        'name': user['name'],
+                        'email': user['email'],
+                        'amount': user_amount,
+                        'original_amount': user_original_amount,
+                        'currency_code': expense.currency_code
+                    })
+                    total_assigned += user_amount
+
+                if abs(total_assigned - expense.amount) > 0.01:
+                    difference = expense.amount - total_assigned
+                    if result['splits']:
+                        result['splits'][-1]['amount'] += difference
+                    elif result['payer']['amount'] > 0:
+                        result['payer']['amount'] += difference
+            else:
+                payer_amount = expense.split_value if expense.split_value is not None else 0
+                payer_ratio = payer_amount / expense.amount if expense.amount else 0
+                payer_original_amount = original_amount * payer_ratio
+
+                result['payer']['amount'] = payer_amount if expense.paid_by not in split_with_ids else 0
+
+                remaining = expense.amount - result['payer']['amount']
+                remaining_original = original_amount - payer_original_amount
+                per_person = remaining / len(split_users) if split_users else 0
+                per_person_original = remaining_original / len(split_users) if split_users else 0
+
+                for user in split_users:
+                    result['splits'].append({
+                        'id': user['email'],  # Add id field
+                        'name': user['name'],
+                        'email': user['email'],
+                        'amount': per_person,
+                        'original_amount': per_person_original,
+                        'currency_code': expense.currency_code
+                    })
+
+        return result
@@ -0,0 +1,16 @@
+"""
+Dialect INSERT constructs
+INSERT ... ON CONFLICT for the databases the app runs on (SQLite and PostgreSQL)
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def conflict_insert(session, table):
+    """An INSERT for `table` supporting on_conflict_do_nothing() / on_conflict_do_update() on the session's database"""
+    dialect = session.connection().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
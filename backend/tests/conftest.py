@@ -0,0 +1,57 @@
+"""
+Shared test fixtures
+Tests run against an in-memory SQLite database created fresh for every test
+"""
+
+import os
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite://')
+
+import pytest
+from src import create_app
+from src.extensions import db as _db, scheduler
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    # Background jobs would race the assertions
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    return app
+
+
+@pytest.fixture
+def db(app):
+    """A fresh schema per test; per-process caches are keyed by versions that restart with it"""
+    from src.services.category.tree import category_tree_cache
+    from src.services.transaction_rule.preview_service import transaction_columns_cache
+    from src.utils.analytics_cache import analytics_cache
+    from src.utils.compiled_rules import rule_set_cache
+    from src.utils.merchant import merchant_decision_cache
+
+    with app.app_context():
+        _db.create_all()
+        for cache in (analytics_cache, category_tree_cache, transaction_columns_cache, rule_set_cache,
+                      merchant_decision_cache):
+            cache.clear()
+        yield _db
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """auth_headers(user_id): Authorization header with an access token for the user"""
+    from flask_jwt_extended import create_access_token
+
+    def headers(user_id):
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+    return headers
@@ -0,0 +1,55 @@
+"""Batch categorization decides like auto_categorize_transaction one row at a time"""
+
+import random
+from datetime import datetime
+from src.models import User, Category, CategoryMapping, Expense, MerchantCategoryCache
+from src.services.category.batch_categorizer import BatchCategorizeService
+from src.utils.helpers import auto_categorize_transaction
+from src.utils.merchant import merchant_decision_cache
+
+MERCHANTS = ['SQ *BLUE BOTTLE', 'STARBUCKS', 'WHOLE FOODS MKT', 'SHELL OIL', 'AMAZON MKTP', 'CORNER DELI', 'UBER TRIP']
+NOISE = ['', ' #0412', ' 03/14', ' OAKLAND CA', ' CARD 4431', ' 2K4LL1']
+KEYWORDS = ['blue bottle', 'starbucks', 'whole', 'foods', 'shell', 'amazon', 'uber', 'trip', 'oakland', 'deli', 'card']
+
+
+def test_batch_matches_per_row_decisions(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    categories = [Category(name=name, user_id='a@x.com') for name in ('Coffee', 'Food', 'Fuel', 'Shopping', 'Travel')]
+    db.session.add_all(categories)
+    db.session.flush()
+
+    rng = random.Random(7)
+    for keyword in rng.sample(KEYWORDS, 8):
+        db.session.add(CategoryMapping(
+            user_id='a@x.com', keyword=keyword, category_id=rng.choice(categories).id,
+            priority=rng.randint(0, 2), match_count=rng.randint(0, 3), active=True
+        ))
+    for _ in range(60):
+        db.session.add(Expense(
+            description=rng.choice(MERCHANTS) + rng.choice(NOISE) + rng.choice(NOISE), amount=10.0,
+            date=datetime(2026, 3, 1), card_used='Visa', split_method='none', paid_by='a@x.com',
+            user_id='a@x.com', transaction_type='expense'
+        ))
+    db.session.commit()
+    initial_counts = dict(db.session.query(CategoryMapping.id, CategoryMapping.match_count))
+
+    expected = {
+        expense.id: auto_categorize_transaction(expense.description, 'a@x.com')
+        for expense in Expense.query.order_by(Expense.id).all()
+    }
+    expected_counts = dict(db.session.query(CategoryMapping.id, CategoryMapping.match_count))
+
+    # Start over from the same mappings and an empty merchant cache
+    for mapping in CategoryMapping.query:
+        mapping.match_count = initial_counts[mapping.id]
+    MerchantCategoryCache.query.delete()
+    db.session.commit()
+    merchant_decision_cache.clear()
+
+    categorized, total = BatchCategorizeService.run('a@x.com', chunk_size=7)
+
+    assert total == 60 and 0 < categorized < 60
+    assert categorized == sum(1 for category_id in expected.values() if category_id)
+    assert dict(db.session.query(Expense.id, Expense.category_id)) == expected
+    assert dict(db.session.query(CategoryMapping.id, CategoryMapping.match_count)) == expected_counts
@@ -0,0 +1,110 @@
+"""Budget alert queueing and delivery"""
+
+from datetime import datetime
+import pytest
+from src.models import User, Category, Expense, Budget, BudgetAlert
+from src.services.notification.service import NotificationService
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """Emails NotificationService sends; set outbox.fail to make sends fail"""
+    class Outbox(list):
+        fail = False
+
+    sent = Outbox()
+
+    def send_email(self, to, subject, html_body):
+        if sent.fail:
+            return False, 'Error: unreachable'
+        sent.append((to, subject))
+        return True, 'Email sent successfully'
+
+    monkeypatch.setattr(NotificationService, 'send_email', send_email)
+    return sent
+
+
+def _setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    fun = Category(name='Fun', user_id='a@x.com')
+    db.session.add(fun)
+    db.session.flush()
+    db.session.add(Budget(user_id='a@x.com', category_id=fun.id, amount=100.0, period='monthly'))
+    db.session.commit()
+    db.session.add(Expense(
+        description='Concert', amount=120.0, date=datetime.utcnow(), card_used='Visa', split_method='none',
+        paid_by='a@x.com', user_id='a@x.com', category_id=fun.id, transaction_type='expense'
+    ))
+    db.session.commit()
+
+
+def _statuses():
+    return sorted((alert.threshold, alert.status, alert.attempts) for alert in BudgetAlert.query)
+
+
+def test_alerts_are_sent_once(db, outbox):
+    _setup(db)
+    assert _statuses() == [(80, 'pending', 0), (100, 'pending', 0)]
+
+    assert NotificationService().send_pending_budget_alerts() == 1
+    assert NotificationService().send_pending_budget_alerts() == 0
+    assert len(outbox) == 1
+    assert _statuses() == [(80, 'sent', 0), (100, 'sent', 0)]
+
+
+def test_alerts_claimed_elsewhere_are_left_alone(db, outbox):
+    _setup(db)
+    alert = BudgetAlert.query.filter_by(threshold=100).one()
+    alert.status = 'sending'
+    alert.claimed_at = datetime.utcnow()
+    db.session.commit()
+
+    assert NotificationService().send_pending_budget_alerts() == 0
+    assert outbox == []
+    assert _statuses() == [(80, 'pending', 0), (100, 'sending', 0)]
+
+
+def test_abandoned_claims_are_sent_again(db, outbox):
+    _setup(db)
+    for alert in BudgetAlert.query:
+        alert.status = 'sending'
+        alert.claimed_at = datetime.utcnow() - 2 * BudgetAlert.SENDING_TIMEOUT
+    db.session.commit()
+
+    assert NotificationService().send_pending_budget_alerts() == 1
+    assert _statuses() == [(80, 'sent', 0), (100, 'sent', 0)]
+
+
+def test_failed_sends_are_retried(db, outbox):
+    _setup(db)
+    outbox.fail = True
+
+    assert NotificationService().send_pending_budget_alerts() == 0
+    assert _statuses() == [(80, 'pending', 1), (100, 'pending', 1)]
+
+    for _ in range(BudgetAlert.MAX_ATTEMPTS - 1):
+        NotificationService().send_pending_budget_alerts()
+    assert _statuses() == [(80, 'failed', 5), (100, 'failed', 5)]
+
+
+def test_retried_send_succeeds(db, outbox):
+    _setup(db)
+    outbox.fail = True
+    NotificationService().send_pending_budget_alerts()
+    outbox.fail = False
+
+    assert NotificationService().send_pending_budget_alerts() == 1
+    assert _statuses() == [(80, 'sent', 1), (100, 'sent', 1)]
+
+
+def test_concurrent_crossings_queue_one_alert(db, monkeypatch):
+    _setup(db)
+    budget = Budget.query.one()
+
+    # A writer that read the queued alerts before the first writer committed
+    monkeypatch.setattr(BudgetAlert, 'queued', classmethod(lambda cls, session, budget_ids, period_starts: set()))
+    BudgetAlert.detect(db.session, {(budget.id, BudgetAlert.query.first().period_start): 1.0})
+    db.session.commit()
+
+    assert _statuses() == [(80, 'pending', 0), (100, 'pending', 0)]
@@ -0,0 +1,210 @@
+"""Budgets evaluated together spend the same as budgets evaluated one at a time"""
+
+import random
+from calendar import monthrange
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.models import User, Category, Expense, CategorySplit, Budget
+from src.services.budget.evaluator import BudgetEvaluator
+from src.services.budget.service import BudgetService
+from src.utils.split_calculator import SplitCalculator
+
+
+def _setup(db, rng):
+    db.session.add_all([User(id=user_id, name=user_id[0]) for user_id in ('a@x.com', 'b@x.com', 'c@x.com')])
+    db.session.flush()
+    parents = [Category(name=name, user_id='a@x.com') for name in ('Food', 'Home', 'Fun')]
+    db.session.add_all(parents)
+    db.session.flush()
+    children = [Category(name=f'{parent.name} sub', user_id='a@x.com', parent_id=parent.id) for parent in parents]
+    db.session.add_all(children)
+    db.session.flush()
+    category_ids = [category.id for category in parents + children]
+
+    now = datetime.utcnow()
+    for _ in range(250):
+        paid_by = rng.choice(['a@x.com', 'a@x.com', 'b@x.com'])
+        expense = Expense(
+            description='Expense', amount=round(rng.uniform(-10, 120), 2),
+            date=now - timedelta(days=rng.randint(0, 120), hours=rng.randint(0, 23)), card_used='Visa',
+            split_method=rng.choice(['none', 'equal', 'percentage']), split_value=30.0,
+            split_with=rng.choice([None, 'b@x.com', 'a@x.com,c@x.com', 'b@x.com,c@x.com']), paid_by=paid_by,
+            user_id='a@x.com', category_id=rng.choice(category_ids + [None]), transaction_type='expense'
+        )
+        db.session.add(expense)
+        if rng.random() < 0.2:
+            db.session.flush()
+            expense.has_category_splits = True
+            for category_id in rng.sample(category_ids, 2):
+                db.session.add(CategorySplit(expense_id=expense.id, category_id=category_id, amount=expense.amount / 2))
+
+    for _ in range(12):
+        db.session.add(Budget(
+            user_id='a@x.com', category_id=rng.choice(category_ids), amount=100.0,
+            period=rng.choice(['weekly', 'monthly', 'yearly']), include_subcategories=rng.random() < 0.5,
+            start_date=datetime(2025, 1, 1)
+        ))
+    db.session.commit()
+
+
+def _reference_spent(budget, start, end):
+    """One budget's spend scanned from every expense, as calculate_spent_amount did per budget"""
+    category_ids = {budget.category_id}
+    if budget.include_subcategories:
+        category_ids |= {category.id for category in Category.query.filter_by(parent_id=budget.category_id)}
+    users = SplitCalculator.load_users(['a@x.com', 'b@x.com', 'c@x.com'])
+
+    spent = 0.0
+    for expense in Expense.query.filter_by(user_id=budget.user_id).all():
+        if not start <= expense.date <= end:
+            continue
+        share = BudgetEvaluator.user_share(expense, SplitCalculator.compute(expense, users), budget.user_id)
+        if share is None:
+            continue
+        if not expense.has_category_splits and expense.category_id in category_ids:
+            spent += share
+        if expense.amount > 0:
+            spent += sum(split.amount * share / expense.amount
+                         for split in expense.category_splits if split.category_id in category_ids)
+    return spent
+
+
+def _count_statements(db, run):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+def test_batch_evaluation_matches_each_budget_alone(db):
+    _setup(db, random.Random(11))
+    budgets = Budget.query.all()
+    now = datetime.utcnow()
+    months = [(now.year, now.month)]
+    for _ in range(3):
+        first = datetime(*months[-1], 1) - timedelta(days=1)
+        months.append((first.year, first.month))
+
+    for period in [None] + months:
+        spent = BudgetEvaluator.evaluate('a@x.com', budgets, period)
+        assert set(spent) == {budget.id for budget in budgets}
+        for budget in budgets:
+            if period:
+                start = datetime(*period, 1)
+                end = datetime(*period, monthrange(*period)[1], 23, 59, 59)
+            else:
+                start, end = budget.get_current_period_dates()
+            assert abs(spent[budget.id] - _reference_spent(budget, start, end)) < 1e-6, (budget.period, period)
+
+
+def test_batch_evaluation_query_count_does_not_grow_with_budgets(db):
+    _setup(db, random.Random(12))
+    # Weekly budgets over a calendar month are computed from raw expenses
+    budgets = Budget.query.all()
+    for budget in budgets:
+        budget.period = 'weekly'
+    db.session.commit()
+    now = datetime.utcnow()
+    BudgetEvaluator.evaluate('a@x.com', budgets, (now.year, now.month))
+
+    counts = [
+        _count_statements(db, lambda: BudgetEvaluator.evaluate('a@x.com', subset, (now.year, now.month)))
+        for subset in (budgets[:2], budgets)
+    ]
+    assert counts[0] == counts[1]
+
+
+def _count_computations(monkeypatch):
+    calls = []
+    compute = BudgetEvaluator._compute
+
+    def counted(cls, user_id, budgets, windows):
+        calls.append([budget.id for budget in budgets])
+        return compute(user_id, budgets, windows)
+
+    monkeypatch.setattr(BudgetEvaluator, '_compute', classmethod(counted))
+    return calls
+
+
+def _memo_setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    food = Category(name='Food', user_id='a@x.com')
+    db.session.add(food)
+    db.session.flush()
+    budget = Budget(user_id='a@x.com', category_id=food.id, amount=100.0, period='monthly',
+                    start_date=datetime(2025, 1, 1))
+    db.session.add_all([budget, _food_expense(food.id, 30.0)])
+    db.session.commit()
+    return budget, food
+
+
+def _food_expense(category_id, amount):
+    return Expense(
+        description='Food', amount=amount, date=datetime.utcnow(), card_used='Visa', split_method='none',
+        paid_by='a@x.com', user_id='a@x.com', category_id=category_id, transaction_type='expense'
+    )
+
+
+def test_spend_is_computed_once_per_request(app, db, monkeypatch):
+    budget, food = _memo_setup(db)
+    calls = _count_computations(monkeypatch)
+
+    with app.test_request_context():
+        assert budget.get_spent() == 30.0
+        assert budget.get_remaining() == 70.0
+        assert budget.get_percentage() == 30.0
+        assert budget.get_status() == 'under'
+        assert len(calls) == 1
+
+        # A write bumps the data version, so the next read sees it
+        db.session.add(_food_expense(food.id, 60.0))
+        assert budget.get_spent() == 90.0
+        assert budget.get_status() == 'approaching'
+        assert len(calls) == 2
+
+        db.session.rollback()
+        assert budget.get_spent() == 30.0
+        assert len(calls) == 3
+
+    with app.test_request_context():
+        budget.get_spent()
+        assert len(calls) == 4
+
+    # Outside a request nothing is memoized
+    budget.get_spent()
+    budget.get_spent()
+    assert len(calls) == 6
+
+
+def test_trend_history_matches_each_period(db):
+    _setup(db, random.Random(16))
+    trends = BudgetService().get_trends_data('a@x.com', periods=8)
+
+    assert len(trends) == Budget.query.count()
+    for entry in trends:
+        budget = entry['budget']
+        history = entry['historical_data']
+        assert len(history) == 8
+        assert history[0]['start'] == budget.get_current_period_dates()[0].date().isoformat()
+
+        windows = [(datetime.fromisoformat(item['start']), datetime.fromisoformat(item['end'])) for item in history]
+        for (start, _), (_, previous_end) in zip(windows, windows[1:]):
+            assert previous_end + timedelta(days=1) == start
+        for item, (start, end) in zip(history, windows):
+            expected = _reference_spent(budget, start, end.replace(hour=23, minute=59, second=59))
+            assert abs(item['spent'] - expected) < 1e-6, (budget.period, item['start'])
+
+
+def test_trend_history_query_count_does_not_grow_with_periods(db):
+    _setup(db, random.Random(17))
+    service = BudgetService()
+    counts = [_count_statements(db, lambda: service.get_trends_data('a@x.com', periods=periods)) for periods in (2, 24)]
+    assert counts[0] == counts[1]
@@ -0,0 +1,106 @@
+"""Budget rollovers over several finished periods, committed per batch of users"""
+
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.models import User, Category, Expense, Budget
+from src.models.budget import period_bounds
+from src.services.budget.rollover_service import BudgetRolloverService
+
+NOW = datetime(2026, 10, 10, 12)
+USERS = [f'user{index}@x.com' for index in range(5)]
+
+
+def _setup(db, rng):
+    db.session.add_all([User(id=user_id, name=user_id) for user_id in USERS])
+    db.session.flush()
+    for user_id in USERS:
+        food = Category(name='Food', user_id=user_id)
+        db.session.add(food)
+        db.session.flush()
+        db.session.add_all([
+            Budget(user_id=user_id, category_id=food.id, amount=300.0, period='monthly', rollover=True,
+                   rollover_amount=rng.choice([0.0, 25.0]), start_date=datetime(2026, 6, 15)),
+            Budget(user_id=user_id, category_id=food.id, amount=80.0, period='weekly', rollover=True,
+                   start_date=datetime(2026, 8, 5)),
+            Budget(user_id=user_id, category_id=food.id, amount=80.0, period='weekly', rollover=False,
+                   start_date=datetime(2026, 8, 5))
+        ])
+        for _ in range(40):
+            db.session.add(Expense(
+                description='Food', amount=round(rng.uniform(5, 60), 2),
+                date=datetime(2026, 5, 20) + timedelta(hours=rng.randint(0, 24 * 140)), card_used='Visa',
+                split_method='none', paid_by=user_id, user_id=user_id, category_id=food.id,
+                transaction_type='expense'
+            ))
+    db.session.commit()
+
+
+def _expected(budget):
+    """(rollover_amount, start_date) after closing each finished period in turn"""
+    rollover = budget.rollover_amount
+    start, end = period_bounds(budget.period, budget.start_date)
+    while NOW > end:
+        spent = sum(
+            expense.amount for expense in Expense.query.filter_by(user_id=budget.user_id, category_id=budget.category_id)
+            if start <= expense.date <= end
+        )
+        rollover = max(0, budget.amount + rollover - spent)
+        start, end = period_bounds(budget.period, end + timedelta(seconds=1))
+    return rollover, start
+
+
+def test_rollover_closes_every_finished_period(db):
+    _setup(db, random.Random(15))
+    expected = {budget.id: _expected(budget) for budget in Budget.query.filter_by(rollover=True)}
+    untouched = {budget.id: (budget.rollover_amount, budget.start_date) for budget in Budget.query.filter_by(rollover=False)}
+
+    commits = []
+
+    def count(session):
+        commits.append(session)
+
+    event.listen(db.session, 'after_commit', count)
+    try:
+        result = BudgetRolloverService.process_all_rollovers(batch_size=2, now=NOW)
+    finally:
+        event.remove(db.session, 'after_commit', count)
+
+    assert result['processed'] == result['total'] == len(expected)
+    assert result['errors'] == 0
+    # One transaction per batch of two users
+    assert len(commits) == 3
+
+    db.session.expire_all()
+    for budget in Budget.query.all():
+        if budget.id in expected:
+            rollover, start = expected[budget.id]
+            assert abs(budget.rollover_amount - rollover) < 1e-6
+            assert budget.start_date == start == period_bounds(budget.period, NOW)[0]
+        else:
+            assert (budget.rollover_amount, budget.start_date) == untouched[budget.id]
+
+    # Nothing is due any more
+    assert BudgetRolloverService.process_all_rollovers(batch_size=2, now=NOW)['processed'] == 0
+
+
+def test_failed_batch_does_not_stop_the_others(db, monkeypatch):
+    _setup(db, random.Random(16))
+    process_user_batch = BudgetRolloverService.process_user_batch
+
+    def failing(user_ids, now=None):
+        if USERS[2] in user_ids:
+            raise RuntimeError('boom')
+        return process_user_batch(user_ids, now)
+
+    monkeypatch.setattr(BudgetRolloverService, 'process_user_batch', staticmethod(failing))
+    result = BudgetRolloverService.process_all_rollovers(batch_size=2, now=NOW)
+
+    # The batch of users 2 and 3 rolled back
+    assert result['errors'] == 1
+    assert result['processed'] == 6
+    db.session.expire_all()
+    rolled = {
+        budget.user_id for budget in Budget.query.filter(Budget.rollover == True, Budget.start_date >= datetime(2026, 10, 1))
+    }
+    assert rolled == set(USERS) - {USERS[2], USERS[3]}
@@ -0,0 +1,92 @@
+"""Budget spend counters kept in step by the flush hooks"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+from src.models import User, Category, Expense, Budget
+
+
+def _setup(db):
+    db.session.add_all([User(id='a@x.com', name='a'), User(id='b@x.com', name='b')])
+    db.session.flush()
+    food = Category(name='Food', user_id='a@x.com')
+    db.session.add(food)
+    db.session.flush()
+    groceries = Category(name='Groceries', user_id='a@x.com', parent_id=food.id)
+    db.session.add(groceries)
+    db.session.flush()
+    db.session.add(Budget(
+        user_id='a@x.com', category_id=food.id, amount=100.0, period='monthly',
+        include_subcategories=True, start_date=datetime(2026, 1, 1)
+    ))
+    db.session.commit()
+    return groceries
+
+
+def _expense(category_id, amount=20.0):
+    return Expense(
+        description='Groceries', amount=amount, date=datetime.now(), card_used='Visa', split_method='equal',
+        paid_by='a@x.com', user_id='a@x.com', split_with='b@x.com', category_id=category_id,
+        transaction_type='expense'
+    )
+
+
+@contextmanager
+def _statements(db):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+
+# Statements per single-expense write, including the participant, rollup,
+# data version and budget spend hooks. Spend is diffed from attribute
+# history, so each write reads the budgets once and never re-reads expenses.
+INSERT_STATEMENTS = 12
+UPDATE_STATEMENTS = 13
+DELETE_STATEMENTS = 11
+
+
+def test_statements_per_insert(db):
+    groceries = _setup(db)
+
+    with _statements(db) as statements:
+        db.session.add(_expense(groceries.id))
+        db.session.commit()
+
+    assert len(statements) == INSERT_STATEMENTS
+
+
+def test_statements_per_update(db):
+    groceries = _setup(db)
+    db.session.add(_expense(groceries.id))
+    db.session.commit()
+    expense = Expense.query.one()
+    expense.participants
+
+    with _statements(db) as statements:
+        expense.amount = 30.0
+        db.session.commit()
+
+    assert len(statements) == UPDATE_STATEMENTS
+
+
+def test_statements_per_delete(db):
+    groceries = _setup(db)
+    db.session.add(_expense(groceries.id))
+    db.session.commit()
+    expense = Expense.query.one()
+    expense.participants
+    expense.category_splits
+
+    with _statements(db) as statements:
+        db.session.delete(expense)
+        db.session.commit()
+
+    assert len(statements) == DELETE_STATEMENTS
@@ -0,0 +1,83 @@
+"""Bulk rule application jobs"""
+
+from datetime import datetime, timedelta
+from src.models import User, Category, Expense, TransactionRule, RuleApplyJob
+from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
+
+
+def _setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    coffee = Category(name='Coffee', user_id='a@x.com')
+    db.session.add(coffee)
+    db.session.flush()
+    db.session.add(TransactionRule(
+        user_id='a@x.com', name='Coffee', pattern='starbucks', auto_category_id=coffee.id, active=True
+    ))
+    for description in ('STARBUCKS #12', 'Rent', 'starbucks reserve'):
+        db.session.add(Expense(
+            description=description, amount=5.0, date=datetime(2026, 3, 1), card_used='Visa',
+            split_method='none', paid_by='a@x.com', user_id='a@x.com', transaction_type='expense'
+        ))
+    db.session.commit()
+    return coffee
+
+
+def test_start_job_only_queues(db):
+    _setup(db)
+
+    job = BulkRuleApplyService.start_job('a@x.com')
+
+    assert RuleApplyJob.query.get(job.id).status == 'pending'
+    assert Expense.query.filter(Expense.category_id.isnot(None)).count() == 0
+
+
+def test_pending_jobs_run_once(db):
+    coffee = _setup(db)
+    job_id = BulkRuleApplyService.start_job('a@x.com').id
+
+    assert BulkRuleApplyService.run_pending_jobs() == 1
+    assert BulkRuleApplyService.run_pending_jobs() == 0
+    assert BulkRuleApplyService.run_job(job_id) is None
+
+    job = RuleApplyJob.query.get(job_id)
+    assert (job.status, job.processed, job.updated) == ('completed', 3, 2)
+    assert sorted(e.description for e in Expense.query.filter_by(category_id=coffee.id)) == [
+        'STARBUCKS #12', 'starbucks reserve'
+    ]
+
+
+def test_interrupted_running_jobs_are_failed(db):
+    _setup(db)
+    now = datetime.utcnow()
+    stale = RuleApplyJob(user_id='a@x.com', status='running', started_at=now - RuleApplyJob.RUNNING_TIMEOUT * 2)
+    active = RuleApplyJob(user_id='a@x.com', status='running', started_at=now)
+    db.session.add_all([stale, active])
+    db.session.commit()
+
+    assert BulkRuleApplyService.run_pending_jobs() == 0
+
+    stale, active = RuleApplyJob.query.get(stale.id), RuleApplyJob.query.get(active.id)
+    assert (stale.status, stale.error) == ('failed', 'Interrupted before completion')
+    assert stale.finished_at is not None
+    assert active.status == 'running'
+
+
+def test_bulk_apply_endpoint_reports_job_progress(db, client, auth_headers):
+    _setup(db)
+    headers = auth_headers('a@x.com')
+
+    response = client.post('/api/v1/transaction-rules/bulk-apply', json={}, headers=headers)
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+    assert response.get_json()['job']['status'] == 'pending'
+
+    BulkRuleApplyService.run_pending_jobs()
+
+    response = client.get(f'/api/v1/transaction-rules/bulk-apply/{job_id}', headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['job']['status'], body['transactions_processed'], body['transactions_updated']) == ('completed', 3, 2)
+
+    other = client.get(f'/api/v1/transaction-rules/bulk-apply/{job_id}', headers=auth_headers('b@x.com'))
+    assert other.status_code == 404
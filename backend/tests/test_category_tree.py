@@ -0,0 +1,93 @@
+"""Cached category trees agree with walking the ORM relationships"""
+
+import random
+from sqlalchemy import event
+from src.models import User, Category
+from src.services.category.tree import get_category_tree, preload_subcategories
+
+
+def _setup(db, rng):
+    db.session.add_all([User(id='a@x.com', name='a'), User(id='b@x.com', name='b')])
+    db.session.flush()
+    categories = []
+    for index in range(60):
+        parent = rng.choice([None] * 5 + categories)
+        category = Category(name=f'Category {index}', user_id='a@x.com', parent_id=parent.id if parent else None)
+        db.session.add(category)
+        db.session.flush()
+        categories.append(category)
+    db.session.add(Category(name='Other tenant', user_id='b@x.com'))
+    db.session.commit()
+    return categories
+
+
+def _walk(category, depth=None):
+    if depth == 0:
+        return []
+    ids = []
+    for child in category.subcategories:
+        ids.append(child.id)
+        ids.extend(_walk(child, None if depth is None else depth - 1))
+    return ids
+
+
+def _count_statements(db, run):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+def test_tree_matches_the_relationships(db):
+    categories = _setup(db, random.Random(14))
+    tree = get_category_tree('a@x.com')
+
+    assert sorted(tree.nodes) == sorted(category.id for category in categories)
+    assert sorted(tree.roots()) == sorted(category.id for category in categories if category.parent_id is None)
+    for category in categories:
+        assert sorted(tree.children(category.id)) == sorted(child.id for child in category.subcategories)
+        assert sorted(tree.descendants(category.id)) == sorted(_walk(category))
+        assert sorted(tree.subtree_ids(category.id, depth=1)) == sorted([category.id] + _walk(category, 1))
+
+        ancestors = []
+        parent = category.parent
+        while parent is not None:
+            ancestors.append(parent.id)
+            parent = parent.parent
+        assert tree.ancestors(category.id) == ancestors
+
+
+def test_tree_is_cached_until_categories_change(db):
+    categories = _setup(db, random.Random(15))
+    tree = get_category_tree('a@x.com')
+
+    assert _count_statements(db, lambda: get_category_tree('a@x.com')) <= 1
+    assert get_category_tree('a@x.com') is tree
+
+    child = Category(name='New child', user_id='a@x.com', parent_id=categories[0].id)
+    db.session.add(child)
+    db.session.commit()
+
+    rebuilt = get_category_tree('a@x.com')
+    assert rebuilt is not tree
+    assert child.id in rebuilt.children(categories[0].id)
+
+
+def test_preloaded_subcategories_need_no_further_queries(db):
+    categories = _setup(db, random.Random(16))
+    db.session.expire_all()
+    roots = Category.query.filter_by(user_id='a@x.com', parent_id=None).all()
+
+    assert _count_statements(db, lambda: preload_subcategories(roots)) == 1
+    walked = []
+    assert _count_statements(db, lambda: walked.extend(_walk(root) for root in roots)) == 0
+    assert sorted(category_id for ids in walked for category_id in ids) == sorted(
+        category.id for category in categories if category.parent_id is not None
+    )
@@ -0,0 +1,215 @@
+"""Rollups and budget spend counters kept equal to a full rebuild"""
+
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from src.cli import register_commands
+from src.models import (
+    User, Category, Expense, Budget, CategorySplit, MonthlyUserRollup, BudgetPeriodSpend
+)
+from src.services.category_changes import write_category_changes
+
+USERS = ('a@x.com', 'b@x.com', 'c@x.com')
+
+
+def _setup(db):
+    db.session.add_all([User(id=user_id, name=user_id) for user_id in USERS])
+    db.session.flush()
+
+    categories = {}
+    for user_id in USERS:
+        food = Category(name='Food', user_id=user_id)
+        fun = Category(name='Fun', user_id=user_id)
+        db.session.add_all([food, fun])
+        db.session.flush()
+        groceries = Category(name='Groceries', user_id=user_id, parent_id=food.id)
+        db.session.add(groceries)
+        db.session.flush()
+        categories[user_id] = [food.id, groceries.id, fun.id]
+
+        db.session.add_all([
+            Budget(user_id=user_id, category_id=food.id, amount=200.0, period='monthly',
+                   include_subcategories=True, start_date=datetime(2026, 1, 1)),
+            Budget(user_id=user_id, category_id=fun.id, amount=50.0, period='weekly',
+                   start_date=datetime(2026, 1, 1))
+        ])
+    db.session.commit()
+    return categories
+
+
+def _randomize(rng, expense, categories, now):
+    user_id = rng.choice(USERS)
+    expense.user_id = user_id
+    expense.paid_by = rng.choice([user_id, rng.choice(USERS)])
+    expense.amount = round(rng.uniform(1, 100), 2)
+    expense.date = now - timedelta(days=rng.randint(0, 45))
+    expense.category_id = rng.choice(categories[user_id] + [None])
+    expense.split_method = rng.choice(['none', 'equal', 'percentage'])
+    expense.split_with = rng.choice([None, ','.join(rng.sample(USERS, rng.randint(1, 2)))])
+    expense.split_value = 40.0
+    expense.transaction_type = 'expense'
+    expense.card_used = 'Visa'
+    expense.description = 'Expense'
+
+
+def _stored_rollups():
+    return {
+        (user_id, month, transaction_type, category_id): (share, total, own, count)
+        for user_id, month, transaction_type, category_id, share, total, own, count in MonthlyUserRollup.query.with_entities(
+            MonthlyUserRollup.user_id, MonthlyUserRollup.month, MonthlyUserRollup.transaction_type,
+            MonthlyUserRollup.category_id, func.sum(MonthlyUserRollup.share_amount),
+            func.sum(MonthlyUserRollup.total_amount), func.sum(MonthlyUserRollup.own_amount),
+            func.sum(MonthlyUserRollup.transaction_count)
+        ).group_by(
+            MonthlyUserRollup.user_id, MonthlyUserRollup.month, MonthlyUserRollup.transaction_type,
+            MonthlyUserRollup.category_id
+        )
+        if count
+    }
+
+
+def _stored_spend():
+    return {
+        (budget_id, period_start): spent
+        for budget_id, period_start, spent in BudgetPeriodSpend.query.with_entities(
+            BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start, BudgetPeriodSpend.spent
+        )
+        if abs(spent) > 1e-6
+    }
+
+
+def _assert_rebuilt(db):
+    rollups = _stored_rollups()
+    expected = {tuple(key): tuple(entry) for key, entry in MonthlyUserRollup.build(Expense.query.all()).items()}
+    assert set(rollups) == set(expected)
+    for key, entry in expected.items():
+        assert rollups[key][3] == entry[3]
+        assert all(abs(stored - value) < 1e-6 for stored, value in zip(rollups[key][:3], entry[:3]))
+
+    spend = _stored_spend()
+    expected = {key: spent for key, spent in BudgetPeriodSpend.compute(db.session, USERS).items() if abs(spent) > 1e-6}
+    assert set(spend) == set(expected)
+    assert all(abs(spend[key] - spent) < 1e-6 for key, spent in expected.items())
+
+
+def test_orm_and_bulk_writes_match_a_rebuild(db, app):
+    categories = _setup(db)
+    rng = random.Random(13)
+    now = datetime.now()
+
+    for step in range(150):
+        expense_ids = [expense_id for expense_id, in db.session.query(Expense.id)]
+        action = rng.random()
+
+        if action < 0.4 or not expense_ids:
+            expense = Expense()
+            _randomize(rng, expense, categories, now)
+            db.session.add(expense)
+            if rng.random() < 0.2:
+                db.session.flush()
+                expense.has_category_splits = True
+                for category_id in rng.sample(categories[expense.user_id], 2):
+                    db.session.add(CategorySplit(
+                        expense_id=expense.id, category_id=category_id, amount=expense.amount / 2
+                    ))
+        elif action < 0.7:
+            expense = Expense.query.get(rng.choice(expense_ids))
+            field = rng.choice(['amount', 'date', 'category', 'split', 'all'])
+            if field == 'amount':
+                expense.amount = round(rng.uniform(1, 100), 2)
+            elif field == 'date':
+                expense.date = now - timedelta(days=rng.randint(0, 45))
+            elif field == 'category':
+                expense.category_id = rng.choice(categories[expense.user_id] + [None])
+            elif field == 'split':
+                expense.split_method = 'equal'
+                expense.split_with = rng.choice([None, 'a@x.com,b@x.com', 'c@x.com'])
+            else:
+                _randomize(rng, expense, categories, now)
+        elif action < 0.85:
+            db.session.delete(Expense.query.get(rng.choice(expense_ids)))
+        else:
+            user_id = rng.choice(USERS)
+            ids = [
+                expense_id for expense_id, in db.session.query(Expense.id).filter(
+                    Expense.user_id == user_id, Expense.has_category_splits.isnot(True)
+                )
+            ]
+            if ids:
+                changes = {}
+                for expense_id in rng.sample(ids, min(len(ids), 5)):
+                    changes.setdefault(rng.choice(categories[user_id]), []).append(expense_id)
+                write_category_changes(user_id, changes)
+
+        db.session.commit()
+        if step % 25 == 0:
+            _assert_rebuilt(db)
+
+    _assert_rebuilt(db)
+
+    if 'reconcile-budget-spend' not in app.cli.commands:
+        register_commands(app)
+    result = app.test_cli_runner().invoke(args=['reconcile-budget-spend'])
+    assert result.exit_code == 0, result.output
+    assert 'budget periods match raw data' in result.output
+
+
+def test_deleting_a_category_merges_its_rollups(db):
+    from src.services.category.service import CategoryService
+
+    categories = _setup(db)
+    other = Category(name='Other', user_id='a@x.com', is_system=True)
+    db.session.add(other)
+    db.session.flush()
+    for category_id in (categories['a@x.com'][0], categories['a@x.com'][1], other.id, None):
+        db.session.add(Expense(
+            description='Expense', amount=10.0, date=datetime(2026, 3, 5), card_used='Visa', split_method='none',
+            paid_by='a@x.com', user_id='a@x.com', category_id=category_id, transaction_type='expense'
+        ))
+    db.session.commit()
+
+    success, message = CategoryService().delete_category(categories['a@x.com'][0], 'a@x.com')
+
+    assert success, message
+    assert MonthlyUserRollup.query.filter_by(user_id='a@x.com', category_id=other.id).one().transaction_count == 3
+    _assert_rebuilt(db)
+
+
+def test_editing_and_deleting_category_splits(db):
+    import json
+    import warnings
+    from sqlalchemy.exc import SAWarning
+    from src.services.transaction.service import TransactionService
+
+    categories = _setup(db)
+    expense = Expense(
+        description='Expense', amount=30.0, date=datetime.now(), card_used='Visa', split_method='none',
+        paid_by='a@x.com', user_id='a@x.com', category_id=categories['a@x.com'][2], transaction_type='expense'
+    )
+    db.session.add(expense)
+    db.session.commit()
+
+    form = {'description': 'Expense', 'amount': '30', 'date': datetime.now().strftime('%Y-%m-%d'),
+            'split_method': 'none', 'paid_by': 'a@x.com'}
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', SAWarning)
+        for splits in ([(0, 10.0), (2, 20.0)], [(1, 30.0)]):
+            success, message = TransactionService().update_transaction(expense.id, 'a@x.com', dict(
+                form, enable_category_split='on', category_splits_data=json.dumps([
+                    {'category_id': categories['a@x.com'][index], 'amount': amount} for index, amount in splits
+                ])
+            ))
+            assert success, message
+            assert len(CategorySplit.query.filter_by(expense_id=expense.id).all()) == len(splits)
+            _assert_rebuilt(db)
+
+        success, message = TransactionService().update_transaction(
+            expense.id, 'a@x.com', dict(form, category_id=str(categories['a@x.com'][0]))
+        )
+        assert success, message
+        assert CategorySplit.query.count() == 0
+        _assert_rebuilt(db)
+
+        db.session.delete(Expense.query.get(expense.id))
+        db.session.commit()
+        _assert_rebuilt(db)
@@ -0,0 +1,209 @@
+"""Dashboard charts built from bounded aggregates"""
+
+from datetime import datetime, timedelta
+from src.models import User, Category, Account, Expense
+from src.services.analytics.service import AnalyticsService
+
+
+def _setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    food = Category(name='Food', user_id='a@x.com', color='#ff0000')
+    visa = Account(name='Visa', type='credit', user_id='a@x.com')
+    db.session.add_all([food, visa])
+    db.session.flush()
+
+    today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    # More rows than the dashboard's recent transaction list holds
+    for day in range(40):
+        db.session.add(Expense(
+            description=f'Expense {day}', amount=10.0 + day, date=today - timedelta(days=day), card_used='Visa',
+            split_method='equal', paid_by='a@x.com', user_id='a@x.com',
+            category_id=food.id if day % 2 else None, account_id=visa.id if day % 3 else None,
+            transaction_type='expense'
+        ))
+    db.session.commit()
+    return today
+
+
+def test_monthly_breakdown_matches_raw_totals(db):
+    _setup(db)
+    breakdown = AnalyticsService().get_dashboard_data('a@x.com', ['monthly_breakdown'])['monthly_breakdown']
+
+    assert [month['month'] for month in breakdown] == sorted((month['month'] for month in breakdown), reverse=True)
+    assert sum(month['count'] for month in breakdown) == 40
+    for month in breakdown:
+        expenses = [e for e in Expense.query.all() if e.date.strftime('%Y-%m') == month['month']]
+        assert month['count'] == len(expenses)
+        assert abs(month['total'] - sum(e.amount for e in expenses)) < 1e-6
+        assert abs(sum(c['total'] for c in month['categories']) - month['total']) < 1e-6
+        assert abs(sum(a['total'] for a in month['accounts']) - month['total']) < 1e-6
+        assert {c['name'] for c in month['categories']} <= {'Food', 'Uncategorized'}
+
+
+def test_daily_cashflow_covers_every_day(db):
+    today = _setup(db)
+    cashflow = AnalyticsService().get_cashflow_data('a@x.com', months=2, granularity='day')
+
+    by_day = {entry['period']: entry['expenses'] for entry in cashflow}
+    assert cashflow[-1]['period'] == today.strftime('%Y-%m-%d')
+    for day in range(30):
+        assert by_day[(today - timedelta(days=day)).strftime('%Y-%m-%d')] == 10.0 + day
+
+
+def test_split_rows_are_streamed_in_batches(db, monkeypatch):
+    from src.services.analytics.sql_aggregates import AnalyticsAggregates
+    from src.utils.split_calculator import SplitCalculator
+
+    _setup(db)
+    db.session.add(User(id='b@x.com', name='b'))
+    for day in range(7):
+        db.session.add(Expense(
+            description=f'Shared {day}', amount=30.0 + day, date=datetime.now() - timedelta(days=day),
+            card_used='Visa', split_method='equal', split_with='a@x.com', paid_by='b@x.com', user_id='b@x.com',
+            transaction_type='expense'
+        ))
+    db.session.commit()
+    monkeypatch.setattr(AnalyticsAggregates, 'BATCH_SIZE', 3)
+
+    users = SplitCalculator.load_users(['a@x.com', 'b@x.com'])
+    expected = {
+        expense.id: SplitCalculator.compute(expense, users)
+        for expense in Expense.query.all() if 'a@x.com' in (expense.user_id, expense.split_with)
+    }
+    aggregates = AnalyticsAggregates('a@x.com')
+
+    shares = sorted(share for _, _, share in aggregates.user_shares())
+    assert shares == sorted(SplitCalculator.user_share(splits, 'a@x.com') for splits in expected.values())
+
+    split_rows = list(aggregates.split_expenses())
+    assert sorted(row.id for row, _ in split_rows) == sorted(
+        expense.id for expense in Expense.query.filter(Expense.split_with.isnot(None))
+    )
+    assert all(splits == expected[row.id] for row, splits in split_rows)
+
+
+def test_stats_endpoint_uses_the_stats_schema(db, client, auth_headers):
+    from src.services.analytics.encoder import StatsEncoder
+
+    _setup(db)
+    db.session.add(User(id='other@x.com', name='Other tenant'))
+    db.session.commit()
+
+    response = client.get('/api/v1/analytics/stats', headers=auth_headers('a@x.com'))
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert set(data) <= set(StatsEncoder.FIELDS) | {'monthly_totals', 'monthly_labels', 'monthly_amounts', 'monthly_income'}
+    assert 'other@x.com' not in response.get_data(as_text=True)
+    assert len(data['monthly_income']) == len(data['monthly_labels'])
+    assert data['category_names'] == ['Food']
+    assert set(data['iou_data']) == {'owes_me', 'i_owe', 'net_balance'}
+
+
+def _reference_dashboard(user_id, now):
+    """Dashboard metrics folded one expense at a time, as before they were pushed into SQL"""
+    from src.utils.split_calculator import SplitCalculator
+
+    expenses = [e for e in Expense.query.all() if user_id in [e.user_id] + (e.split_with or '').split(',')]
+    users = SplitCalculator.load_users({e.paid_by for e in expenses} | {
+        participant for e in expenses for participant in (e.split_with or '').split(',')
+    })
+    data = {'monthly': {}, 'income': 0, 'transfers': 0, 'share': 0, 'month_share': 0, 'cards': set(),
+            'categories': {}, 'owes_me': {}, 'i_owe': {}}
+
+    for expense in expenses:
+        splits = SplitCalculator.compute(expense, users)
+        month = data['monthly'].setdefault(
+            expense.date.strftime('%Y-%m'), {'total': 0, 'by_card': {}, 'contributors': {}, 'by_account': {}}
+        )
+        if expense.transaction_type == 'income':
+            data['income'] += expense.amount
+        elif expense.transaction_type == 'transfer':
+            data['transfers'] += expense.amount
+        else:
+            month['total'] += expense.amount
+            month['by_card'][expense.card_used] = month['by_card'].get(expense.card_used, 0) + expense.amount
+            if expense.account:
+                name = expense.account.name
+                month['by_account'][name] = month['by_account'].get(name, 0) + expense.amount
+            portions = [(splits['payer']['email'], splits['payer']['amount'])] if splits['payer']['amount'] > 0 else []
+            for email, amount in portions + [(split['email'], split['amount']) for split in splits['splits']]:
+                month['contributors'][email] = month['contributors'].get(email, 0) + amount
+
+            if expense.date.year == now.year:
+                share = SplitCalculator.user_share(splits, user_id)
+                data['share'] += share
+                data['cards'].add(expense.card_used)
+                if expense.date.month == now.month:
+                    data['month_share'] += share
+                    parts = [(split.category, split.amount) for split in expense.category_splits] or [
+                        (expense.category, expense.amount)
+                    ]
+                    for category, amount in parts:
+                        if category:
+                            data['categories'][category.name] = data['categories'].get(category.name, 0) + amount
+
+        if splits['payer']['id'] == user_id:
+            for split in splits['splits']:
+                data['owes_me'][split['id']] = data['owes_me'].get(split['id'], 0) + split['amount']
+        else:
+            share = next((split['amount'] for split in splits['splits'] if split['id'] == user_id), None)
+            if share is not None:
+                data['i_owe'][splits['payer']['id']] = data['i_owe'].get(splits['payer']['id'], 0) + share
+    return data
+
+
+def _close(actual, expected):
+    if isinstance(expected, dict):
+        return set(actual) == set(expected) and all(_close(actual[key], value) for key, value in expected.items())
+    return abs(actual - expected) < 1e-6
+
+
+def test_grouped_totals_match_a_per_expense_pass(db):
+    import random
+    from src.models import CategorySplit
+
+    people = ['a@x.com', 'b@x.com', 'c@x.com']
+    db.session.add_all([User(id=user_id, name=user_id[0]) for user_id in people])
+    db.session.flush()
+    categories = [Category(name=name, user_id='a@x.com') for name in ('Food', 'Fun', 'Food')]
+    accounts = [Account(name=name, type='checking', user_id='a@x.com') for name in ('Checking', 'Card')]
+    db.session.add_all(categories + accounts)
+    db.session.flush()
+
+    rng = random.Random(4)
+    now = datetime.now()
+    for _ in range(200):
+        creator = rng.choice(people)
+        expense = Expense(
+            description='Expense', amount=round(rng.uniform(-20, 200), 2),
+            date=now - timedelta(days=rng.choice([0, 1, rng.randint(0, 40), rng.randint(0, 420)])),
+            card_used=rng.choice(['Visa', 'Amex', '']), paid_by=rng.choice([creator, creator, 'nobody@x.com']),
+            split_method=rng.choice(['none', 'equal', 'percentage', 'custom']), split_value=40.0,
+            split_with=rng.choice([None, '', ','.join(rng.sample([p for p in people if p != creator], rng.randint(1, 2)))]),
+            user_id=creator, category_id=rng.choice(categories + [None]) and rng.choice(categories).id,
+            account_id=rng.choice(accounts + [None]) and rng.choice(accounts).id,
+            transaction_type=rng.choice(['expense', 'expense', 'expense', 'income', 'transfer'])
+        )
+        db.session.add(expense)
+        if rng.random() < 0.15:
+            db.session.flush()
+            for category in rng.sample(categories, 2):
+                db.session.add(CategorySplit(expense_id=expense.id, category_id=category.id, amount=expense.amount / 2))
+    db.session.commit()
+
+    expected = _reference_dashboard('a@x.com', now)
+    data = AnalyticsService().get_dashboard_data('a@x.com', ['totals', 'monthly', 'top_categories', 'iou'])
+
+    assert _close(data['total_income'], expected['income'])
+    assert _close(data['total_transfers'], expected['transfers'])
+    assert _close(data['total_expenses'], expected['share'])
+    assert _close(data['current_month_total'], expected['month_share'])
+    assert set(data['unique_cards']) == expected['cards'] - {''}
+    assert set(data['monthly_totals']) == set(expected['monthly'])
+    for month_key, month in expected['monthly'].items():
+        assert _close(data['monthly_totals'][month_key], month), month_key
+    assert _close({category['name']: category['amount'] for category in data['top_categories']}, expected['categories'])
+    assert _close({key: entry['amount'] for key, entry in data['iou_data'].owes_me.items()}, expected['owes_me'])
+    assert _close({key: entry['amount'] for key, entry in data['iou_data'].i_owe.items()}, expected['i_owe'])
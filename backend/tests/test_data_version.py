@@ -0,0 +1,124 @@
+"""Data version bumps for ORM flushes and bulk statements"""
+
+from datetime import datetime
+from src.models import User, Category, Currency, Expense, Budget, get_data_version
+
+
+def _setup(db):
+    for user_id in ('a@x.com', 'b@x.com', 'z@x.com'):
+        db.session.add(User(id=user_id, name=user_id))
+    db.session.flush()
+    food = Category(name='Food', user_id='a@x.com')
+    other = Category(name='Other', user_id='a@x.com', is_system=True)
+    db.session.add_all([food, other])
+    db.session.flush()
+    db.session.add(Expense(
+        description='Lunch', amount=20.0, date=datetime(2026, 1, 5), card_used='Visa', split_method='equal',
+        paid_by='a@x.com', user_id='a@x.com', split_with='b@x.com', category_id=food.id,
+        transaction_type='expense'
+    ))
+    db.session.commit()
+    return food, other
+
+
+def test_flush_bumps_creator_and_participants(db):
+    _setup(db)
+    versions = {user_id: get_data_version(user_id) for user_id in ('a@x.com', 'b@x.com', 'z@x.com')}
+
+    expense = Expense.query.first()
+    expense.amount = 25.0
+    db.session.commit()
+
+    assert get_data_version('a@x.com') == versions['a@x.com'] + 1
+    assert get_data_version('b@x.com') == versions['b@x.com'] + 1
+    assert get_data_version('z@x.com') == versions['z@x.com']
+
+
+def test_scoped_bulk_write_bumps_only_named_users(db):
+    _setup(db)
+    versions = {user_id: get_data_version(user_id) for user_id in ('a@x.com', 'b@x.com', 'z@x.com')}
+
+    db.session.execute(
+        db.update(Expense).where(Expense.user_id == 'a@x.com').values(amount=30.0),
+        execution_options={'data_version_users': {'a@x.com'}}
+    )
+    db.session.commit()
+
+    assert get_data_version('a@x.com') == versions['a@x.com'] + 1
+    assert get_data_version('b@x.com') == versions['b@x.com']
+    assert get_data_version('z@x.com') == versions['z@x.com']
+
+
+def test_unscoped_bulk_write_bumps_nobody(db):
+    _setup(db)
+    versions = {user_id: get_data_version(user_id) for user_id in ('a@x.com', 'b@x.com', 'z@x.com')}
+
+    Budget.query.filter_by(user_id='a@x.com').delete()
+    db.session.commit()
+
+    assert {user_id: get_data_version(user_id) for user_id in versions} == versions
+
+
+def test_delete_category_leaves_unrelated_users_alone(db):
+    from src.services.category.service import CategoryService
+
+    food, other = _setup(db)
+    version = get_data_version('z@x.com')
+
+    success, message = CategoryService().delete_category(food.id, 'a@x.com')
+
+    assert success, message
+    assert Expense.query.first().category_id == other.id
+    assert get_data_version('z@x.com') == version
+
+
+def test_default_currency_change_bumps_user(db):
+    _setup(db)
+    db.session.add(Currency(code='EUR', name='Euro', symbol='€', rate_to_base=1.1))
+    db.session.commit()
+    versions = {user_id: get_data_version(user_id) for user_id in ('a@x.com', 'b@x.com')}
+
+    User.query.get('a@x.com').default_currency_code = 'EUR'
+    db.session.commit()
+
+    assert get_data_version('a@x.com') == versions['a@x.com'] + 1
+    assert get_data_version('b@x.com') == versions['b@x.com']
+
+
+def test_currency_change_bumps_every_user(db):
+    _setup(db)
+    db.session.add(Currency(code='EUR', name='Euro', symbol='€', rate_to_base=1.1))
+    db.session.commit()
+    versions = {user_id: get_data_version(user_id) for user_id in ('a@x.com', 'b@x.com', 'z@x.com')}
+
+    Currency.query.get('EUR').rate_to_base = 1.2
+    db.session.commit()
+
+    assert all(get_data_version(user_id) == version + 1 for user_id, version in versions.items())
+
+
+def test_results_from_rolled_back_writes_are_not_cached(db, app):
+    from src.utils.analytics_cache import analytics_cache
+
+    _setup(db)
+
+    def total():
+        return analytics_cache.get_or_compute(
+            'a@x.com', 'total', lambda: db.session.query(db.func.sum(Expense.amount)).scalar()
+        )
+
+    with app.test_request_context():
+        expense = Expense.query.first()
+        expense.amount = 99.0
+        db.session.flush()
+        assert total() == 99.0
+        db.session.rollback()
+
+    # The next commit reaches the same version number with other data
+    with app.test_request_context():
+        Expense.query.first().amount = 25.0
+        db.session.commit()
+        assert total() == 25.0
+        hits = analytics_cache.stats['hits']
+        assert total() == 25.0
+        assert analytics_cache.stats['hits'] == hits + 1
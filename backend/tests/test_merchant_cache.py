@@ -0,0 +1,64 @@
+"""Merchant decisions stored with the categorizing transaction"""
+
+import pytest
+from src.models import User, Category, CategoryMapping, MerchantCategoryCache
+from src.models.rules_version import request_rules_version
+from src.utils import helpers
+from src.utils.helpers import auto_categorize_transaction
+from src.utils.merchant import merchant_decision_cache
+
+
+def _setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    coffee = Category(name='Coffee', user_id='a@x.com')
+    db.session.add(coffee)
+    db.session.flush()
+    db.session.add(CategoryMapping(user_id='a@x.com', keyword='blue bottle', category_id=coffee.id, active=True))
+    db.session.commit()
+    return coffee
+
+
+def _remembered(merchant):
+    return merchant_decision_cache._memory.get(
+        'a@x.com', merchant_decision_cache.ENDPOINT, params={'merchant': merchant},
+        version=request_rules_version('a@x.com')
+    )
+
+
+def test_matches_are_stored_and_remembered(db):
+    coffee = _setup(db)
+
+    assert auto_categorize_transaction('SQ *BLUE BOTTLE #0412 OAKLAND CA', 'a@x.com') == coffee.id
+    db.session.rollback()
+
+    assert [(row.merchant, row.category_id) for row in MerchantCategoryCache.query] == [('blue bottle', coffee.id)]
+    assert _remembered('blue bottle')[0] == coffee.id
+    assert auto_categorize_transaction('BLUE BOTTLE 03/14', 'a@x.com') == coffee.id
+    assert MerchantCategoryCache.query.count() == 1
+
+
+def test_no_match_is_not_stored(db):
+    _setup(db)
+
+    assert auto_categorize_transaction('CORNER DELI #12', 'a@x.com') is None
+
+    assert not db.session.new
+    db.session.commit()
+    assert MerchantCategoryCache.query.count() == 0
+    assert _remembered('corner deli') is None
+
+
+def test_decisions_are_remembered_only_after_commit(db, monkeypatch):
+    _setup(db)
+
+    def failing_commit(mapping_id):
+        raise RuntimeError('commit failed')
+    monkeypatch.setattr(helpers, '_count_mapping_match', failing_commit)
+
+    with pytest.raises(RuntimeError):
+        auto_categorize_transaction('BLUE BOTTLE OAKLAND CA', 'a@x.com')
+    db.session.rollback()
+
+    assert MerchantCategoryCache.query.count() == 0
+    assert _remembered('blue bottle') is None
@@ -0,0 +1,78 @@
+"""The frozen split copies in backfill migrations agree with SplitCalculator"""
+
+import importlib.util
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from src.models.budget import period_bounds
+from src.services.budget.evaluator import BudgetEvaluator
+from src.utils.split_calculator import SplitCalculator
+
+VERSIONS = Path(__file__).resolve().parent.parent / 'migrations' / 'versions'
+
+# Backfill migrations carrying a copy of _split_amounts
+MIGRATIONS = [
+    'b7e2c9a41d3f_add_expense_participants_table', 'c41f8d2e6a90_add_monthly_user_rollups_table',
+    'e7a14c9b3d52_add_budget_period_spend_table'
+]
+
+USERS = {'a@x.com': 'a', 'b@x.com': 'b', 'c@x.com': 'c'}
+IDS = list(USERS) + ['gone@x.com']
+
+
+def _load(name):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _random_expense(rng, expense_id):
+    split_with = rng.choice([
+        None, '', ','.join(rng.sample(IDS, rng.randint(1, 3))), ' b@x.com, c@x.com', 'a@x.com,,b@x.com'
+    ])
+    values = {user_id: rng.choice([0, 25, 33.3, 50, '40']) for user_id in rng.sample(IDS, rng.randint(0, 4))}
+    split_details = rng.choice([
+        None, '', 'not json', {'type': 'percentage', 'values': values}, {'type': 'amount', 'values': values},
+        json.dumps({'type': 'custom', 'values': values}), json.dumps({'type': 'other', 'values': values})
+    ])
+    return SimpleNamespace(
+        id=expense_id, user_id=rng.choice(IDS), amount=round(rng.uniform(-50, 200), 2), original_amount=None, currency_code='USD',
+        paid_by=rng.choice(IDS), split_with=split_with, split_details=split_details,
+        split_method=rng.choice(['none', 'equal', 'percentage', 'custom', 'shares', None]),
+        split_value=rng.choice([None, 0, 30, 12.5])
+    )
+
+
+@pytest.mark.parametrize('name', MIGRATIONS)
+def test_frozen_split_amounts_match_split_calculator(name):
+    module = _load(name)
+    split_amounts = module._split_amounts
+    rng = random.Random(31)
+
+    for expense_id in range(3000):
+        expense = _random_expense(rng, expense_id)
+        splits = SplitCalculator.compute(expense, USERS)
+
+        payer_id, payer_amount, participants = split_amounts(expense, USERS)
+        assert payer_id == splits['payer']['id']
+        assert abs(payer_amount - splits['payer']['amount']) < 1e-9
+        assert [user_id for user_id, _ in participants] == [split['id'] for split in splits['splits']]
+        assert all(abs(amount - split['amount']) < 1e-9 for (_, amount), split in zip(participants, splits['splits']))
+
+        if hasattr(module, '_user_share'):
+            for user_id in IDS:
+                assert module._user_share(payer_id, payer_amount, participants, user_id) == \
+                    SplitCalculator.user_share(splits, user_id)
+
+        if hasattr(module, '_budget_share'):
+            assert module._budget_share(expense, USERS) == BudgetEvaluator.user_share(expense, splits, expense.user_id)
+
+    if hasattr(module, '_period_bounds'):
+        for _ in range(500):
+            moment = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 3 * 366 * 24 * 60))
+            for period in ('weekly', 'monthly', 'yearly', 'daily'):
+                assert module._period_bounds(period, moment) == period_bounds(period, moment)
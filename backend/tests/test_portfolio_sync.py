@@ -0,0 +1,66 @@
+"""Linked account balances synced on investment writes, never on dashboard reads"""
+
+from sqlalchemy import event
+from src.models import User, Account
+from src.models.investment import Portfolio, Investment
+from src.utils.helpers import sync_investments_with_accounts
+
+
+def _setup(db, import_source=None):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    account = Account(name='Brokerage', type='investment', user_id='a@x.com', balance=0.0, import_source=import_source)
+    db.session.add(account)
+    db.session.flush()
+    portfolio = Portfolio(name='Main', user_id='a@x.com', account_id=account.id)
+    db.session.add(portfolio)
+    db.session.flush()
+    investment = Investment(portfolio_id=portfolio.id, symbol='ABC', shares=10, purchase_price=5.0, current_price=8.0)
+    db.session.add(investment)
+    db.session.commit()
+    return account.id, investment.id
+
+
+def _balance(db, account_id):
+    return db.session.query(Account.balance).filter_by(id=account_id).scalar()
+
+
+def test_dashboard_read_writes_nothing(db, client, auth_headers):
+    account_id, _ = _setup(db)
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            writes.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/v1/analytics/dashboard', headers=auth_headers('a@x.com'))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    assert writes == []
+    assert _balance(db, account_id) == 0.0
+
+
+def test_holding_update_syncs_the_linked_account(db, client, auth_headers):
+    account_id, investment_id = _setup(db)
+
+    response = client.put(f'/api/v1/investments/holdings/{investment_id}', json={'shares': 12},
+                          headers=auth_headers('a@x.com'))
+
+    assert response.status_code == 200
+    assert _balance(db, account_id) == 96.0
+
+
+def test_sync_only_updates_changed_manual_accounts(db):
+    account_id, _ = _setup(db)
+    assert sync_investments_with_accounts('a@x.com') == 1
+    assert _balance(db, account_id) == 80.0
+    assert sync_investments_with_accounts() == 0
+
+    db.session.query(Account).filter_by(id=account_id).update({'import_source': 'simplefin', 'balance': 1.0})
+    db.session.commit()
+    assert sync_investments_with_accounts() == 0
+    assert _balance(db, account_id) == 1.0
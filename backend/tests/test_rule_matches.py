@@ -0,0 +1,64 @@
+"""Rule match counts written with the transaction that matched them"""
+
+from datetime import datetime
+from src.models import User, Category, Expense, TransactionRule
+from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
+from src.utils.rule_engine import apply_transaction_rules
+
+
+def _setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    coffee = Category(name='Coffee', user_id='a@x.com')
+    db.session.add(coffee)
+    db.session.flush()
+    rule = TransactionRule(
+        user_id='a@x.com', name='Coffee', pattern='starbucks', auto_category_id=coffee.id, active=True
+    )
+    db.session.add(rule)
+    db.session.commit()
+    return rule.id
+
+
+def _match_count(rule_id):
+    return TransactionRule.query.with_entities(TransactionRule.match_count).filter_by(id=rule_id).scalar()
+
+
+def test_committed_transaction_counts_in_stats(db, client, auth_headers):
+    rule_id = _setup(db)
+
+    transaction_data = apply_transaction_rules({'description': 'STARBUCKS #12', 'amount': 5.0}, 'a@x.com')
+    db.session.add(Expense(
+        description='STARBUCKS #12', amount=5.0, date=datetime(2026, 3, 1), card_used='Visa', split_method='none',
+        paid_by='a@x.com', user_id='a@x.com', category_id=transaction_data['category_id'], transaction_type='expense'
+    ))
+    db.session.commit()
+
+    stats = client.get('/api/v1/transaction-rules/stats', headers=auth_headers('a@x.com')).get_json()['stats']
+    assert stats['total_matches'] == 1
+    assert stats['most_used_rules'][0]['id'] == rule_id
+    assert stats['most_used_rules'][0]['last_matched'] is not None
+
+
+def test_rolled_back_transaction_is_not_counted(db):
+    rule_id = _setup(db)
+
+    transaction_data = apply_transaction_rules({'description': 'starbucks reserve', 'amount': 5.0}, 'a@x.com')
+    assert transaction_data['category_id'] is not None
+    db.session.rollback()
+
+    assert _match_count(rule_id) == 0
+
+
+def test_bulk_apply_counts_every_match(db):
+    rule_id = _setup(db)
+    for description in ('STARBUCKS #12', 'Rent', 'starbucks reserve', 'Starbucks'):
+        db.session.add(Expense(
+            description=description, amount=5.0, date=datetime(2026, 3, 1), card_used='Visa',
+            split_method='none', paid_by='a@x.com', user_id='a@x.com', transaction_type='expense'
+        ))
+    db.session.commit()
+
+    BulkRuleApplyService.run('a@x.com', chunk_size=2)
+
+    assert _match_count(rule_id) == 3
@@ -0,0 +1,187 @@
+"""Indexed rule and mapping matching agrees with the one-at-a-time reference"""
+
+import random
+import re
+from src.models import User, Category, CategoryMapping, TransactionRule
+from src.utils.compiled_rules import CompiledRuleSet, RuleIndex
+from src.utils.helpers import auto_categorize_transaction
+from src.utils.keyword_automaton import KeywordAutomaton
+
+PATTERNS = ['shell', 'SHELL', 'uber', 'o', 'gas', '^S', 'amazon', '[', r'\d+', 'mktp', 'trip']
+DESCRIPTIONS = ['Shell Gas 123', 'UBER trip', 'amazon mktp', 'Sal', 'x', 'SHELL OIL', 'Gas station']
+AMOUNTS = [0, 10, 100, 100.0, -100, -250.5, 499.99, '12', None, 'abc', float('nan')]
+TYPES = ['expense', 'income', 'transfer', '', None]
+
+
+def test_keyword_automaton_finds_first_occurrences():
+    rng = random.Random(19)
+    for _ in range(2000):
+        keywords = [''.join(rng.choice('ab ') for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 8))]
+        text = ''.join(rng.choice('ab ') for _ in range(rng.randint(0, 20)))
+
+        expected = {keyword: text.find(keyword) for keyword in keywords if keyword and keyword in text}
+        assert KeywordAutomaton(keywords).search(text) == expected
+
+
+def _random_rule(rng, rule_id):
+    return TransactionRule(
+        id=rule_id, user_id='a@x.com', name=f'Rule {rule_id}', pattern=rng.choice(PATTERNS),
+        pattern_field=rng.choice(['description', 'description', 'notes']), is_regex=rng.random() < 0.2,
+        case_sensitive=rng.random() < 0.3, amount_min=rng.choice([None, 0, 10, 100, round(rng.uniform(0, 500), 2)]),
+        amount_max=rng.choice([None, 100, 200, round(rng.uniform(0, 500), 2)]),
+        transaction_type_filter=rng.choice([None, None, 'expense', 'income']), auto_category_id=rng.choice([None, 1, 2]),
+        auto_transaction_type=rng.choice([None, None, None, 'income']), auto_notes=rng.choice([None, None, 'gas note']),
+        priority=rng.randint(0, 5), active=True
+    )
+
+
+def test_indexed_rules_match_like_transaction_rule():
+    rng = random.Random(23)
+    for _ in range(30):
+        rules = [_random_rule(rng, rule_id) for rule_id in range(1, rng.randint(2, 120))]
+        rules.sort(key=lambda rule: (-rule.priority, rule.id))
+        rule_set = CompiledRuleSet(rules)
+        index = RuleIndex(rule_set.rules)
+
+        for _ in range(100):
+            transaction = {
+                'description': rng.choice(DESCRIPTIONS), 'amount': rng.choice(AMOUNTS + [rng.uniform(-600, 600)]),
+                'transaction_type': rng.choice(TYPES), 'notes': rng.choice(['', 'gas', None])
+            }
+
+            eligible = index.eligible(transaction)
+            for position, rule in enumerate(rule_set.rules):
+                assert bool(eligible >> position & 1) == rule.passes_filters(transaction)
+
+            expected = [position for position, rule in enumerate(rules) if rule.matches(transaction)]
+            assert list(rule_set._matching(transaction)) == expected
+
+            first = rule_set.first_match(transaction)
+            assert (first.id if first else None) == (rules[expected[0]].id if expected else None)
+
+
+def _reference_category(description, user_id):
+    """The winning mapping as auto_categorize_transaction chose it before mappings were compiled"""
+    description = description.strip().lower()
+    mappings = CategoryMapping.query.filter_by(user_id=user_id, active=True).order_by(
+        CategoryMapping.priority.desc(), CategoryMapping.match_count.desc(), CategoryMapping.id
+    ).all()
+
+    matches = []
+    for mapping in mappings:
+        if mapping.is_regex:
+            try:
+                matched = bool(re.compile(mapping.keyword, re.IGNORECASE).search(description))
+            except re.error:
+                matched = mapping.keyword.lower() in description
+        else:
+            matched = mapping.keyword.lower() in description
+
+        if matched:
+            score = (mapping.priority * 100) + (mapping.match_count * 10) + len(mapping.keyword)
+            if not mapping.is_regex:
+                position = description.find(mapping.keyword.lower())
+                if position == 0:
+                    score += 50
+                elif position > 0:
+                    score += max(0, 30 - position)
+            matches.append((mapping, score))
+
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches[0][0] if matches else None
+
+
+def test_mapping_scores_match_the_reference(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    categories = [Category(name=name, user_id='a@x.com') for name in ('Food', 'Coffee', 'Travel', 'Fuel')]
+    db.session.add_all(categories)
+    db.session.flush()
+
+    rng = random.Random(50)
+    keywords = ['star', 'bucks', 'food', 'whole', 'market', 'rent', 'sal', '^am', '[bad', 'a.', 'o', 'STAR', 'foods mar']
+    for _ in range(40):
+        db.session.add(CategoryMapping(
+            user_id='a@x.com', keyword=rng.choice(keywords) + rng.choice(['', '', 'x']),
+            category_id=rng.choice(categories).id, is_regex=rng.random() < 0.25, priority=rng.randint(0, 2),
+            match_count=rng.randint(0, 3), active=rng.random() < 0.85
+        ))
+    db.session.commit()
+
+    descriptions = ['STARBUCKS #123', 'Whole Foods Market 0423', 'Rent', 'Salary', 'Amazon', '  zzz ',
+                    'am foods market', 'x', 'starbucks reserve 12/03']
+    for _ in range(300):
+        description = rng.choice(descriptions)
+        expected = _reference_category(description, 'a@x.com')
+        counts = dict(db.session.query(CategoryMapping.id, CategoryMapping.match_count))
+
+        assert auto_categorize_transaction(description, 'a@x.com') == (expected.category_id if expected else None)
+
+        if expected:
+            counts[expected.id] += 1
+        db.session.expire_all()
+        assert dict(db.session.query(CategoryMapping.id, CategoryMapping.match_count)) == counts
+
+        if rng.random() < 0.1:
+            mapping = rng.choice(CategoryMapping.query.filter_by(user_id='a@x.com').all())
+            mapping.active = not mapping.active
+            db.session.commit()
+
+
+def test_cached_rule_set_applies_like_the_rule_models(db):
+    from copy import deepcopy
+    from src.utils.rule_engine import apply_transaction_rules
+
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    db.session.add_all([Category(name='Fuel', user_id='a@x.com'), Category(name='Travel', user_id='a@x.com')])
+    db.session.flush()
+
+    rng = random.Random(29)
+    db.session.add_all([_random_rule(rng, rule_id) for rule_id in range(1, 60)])
+    db.session.commit()
+    rules = TransactionRule.query.filter_by(user_id='a@x.com', active=True).order_by(
+        TransactionRule.priority.desc(), TransactionRule.id
+    ).all()
+
+    for _ in range(300):
+        transaction = {
+            'description': rng.choice(DESCRIPTIONS), 'amount': rng.choice(AMOUNTS + [rng.uniform(-600, 600)]),
+            'transaction_type': rng.choice(TYPES), 'notes': rng.choice(['', 'gas', None])
+        }
+        expected = deepcopy(transaction)
+        for rule in rules:
+            if rule.matches(expected):
+                expected = rule.apply(expected)
+
+        assert apply_transaction_rules(deepcopy(transaction), 'a@x.com') == expected
+
+
+def test_rule_set_is_recompiled_only_when_rules_change(db):
+    from src.utils.compiled_rules import get_rule_set
+    from src.utils.rule_matches import write_rule_matches
+
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    rule = TransactionRule(user_id='a@x.com', name='Fuel', pattern='shell', auto_notes='fuel', active=True)
+    db.session.add(rule)
+    db.session.commit()
+
+    rule_set = get_rule_set('a@x.com')
+    assert get_rule_set('a@x.com') is rule_set
+
+    # Match counts are not part of the compiled rules
+    write_rule_matches([rule.id])
+    db.session.commit()
+    assert get_rule_set('a@x.com') is rule_set
+
+    rule.pattern = 'uber'
+    db.session.commit()
+    recompiled = get_rule_set('a@x.com')
+    assert recompiled is not rule_set
+    assert recompiled.first_match({'description': 'UBER trip'}).id == rule.id
+    assert recompiled.first_match({'description': 'Shell Gas'}) is None
+
+    rule.active = False
+    db.session.commit()
+    assert len(get_rule_set('a@x.com')) == 0
@@ -0,0 +1,61 @@
+"""Rule previews agree with applying the rule"""
+
+from datetime import datetime
+from src.models import User, Category, Expense, TransactionRule
+from src.services.transaction_rule.bulk_apply_service import BulkRuleApplyService
+
+RULE = {'pattern': 'star', 'amount_min': '4', 'amount_max': 50, 'transaction_type_filter': 'expense'}
+
+
+def _setup(db):
+    db.session.add(User(id='a@x.com', name='a'))
+    db.session.flush()
+    coffee = Category(name='Coffee', user_id='a@x.com')
+    food = Category(name='Food', user_id='a@x.com')
+    db.session.add_all([coffee, food])
+    db.session.flush()
+
+    rows = [
+        ('STARBUCKS #12', 5.0, 'expense', None), ('Starbucks', 3.0, 'expense', food.id),
+        ('starbucks reserve', 45.0, 'expense', food.id), ('Star Market', 60.0, 'expense', None),
+        ('STAR refund', -8.0, 'expense', coffee.id), ('Star payroll', 20.0, 'income', None), ('Rent', 20.0, 'expense', None)
+    ]
+    for description, amount, transaction_type, category_id in rows:
+        db.session.add(Expense(
+            description=description, amount=amount, date=datetime(2026, 3, 1), card_used='Visa', split_method='none',
+            paid_by='a@x.com', user_id='a@x.com', category_id=category_id, transaction_type=transaction_type
+        ))
+    db.session.commit()
+    return coffee
+
+
+def test_preview_counts_match_applying_the_rule(db, client, auth_headers):
+    coffee = _setup(db)
+
+    response = client.post('/api/v1/transaction-rules/preview', headers=auth_headers('a@x.com'),
+                           json=dict(RULE, auto_category_id=coffee.id, sample_size='2'))
+    assert response.status_code == 200
+    preview = response.get_json()['preview']
+    assert len(preview['samples']) == 2
+
+    db.session.add(TransactionRule(
+        user_id='a@x.com', name='Coffee', auto_category_id=coffee.id, active=True,
+        **dict(RULE, amount_min=float(RULE['amount_min']))
+    ))
+    db.session.commit()
+    result = BulkRuleApplyService.run('a@x.com')
+
+    assert (preview['matched'], preview['would_change']) == (3, 2)
+    assert result['updated'] == preview['would_change']
+    assert TransactionRule.query.one().match_count == preview['matched']
+    assert Expense.query.filter_by(category_id=coffee.id).count() == preview['matched']
+
+
+def test_preview_rejects_malformed_numbers(db, client, auth_headers):
+    _setup(db)
+
+    for field, value in (('amount_min', 'ten'), ('amount_max', [1]), ('sample_size', 'five')):
+        response = client.post('/api/v1/transaction-rules/preview', headers=auth_headers('a@x.com'),
+                               json=dict(RULE, **{field: value}))
+        assert response.status_code == 400
+        assert response.get_json()['error'] == f'{field} must be a number'
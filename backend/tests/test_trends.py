@@ -0,0 +1,84 @@
+"""Trend buckets follow calendar periods, including their first and last second"""
+
+import random
+from datetime import datetime, timedelta
+from src.models import User, Expense
+from src.services.analytics.trends import TrendEngine
+from src.utils.split_calculator import SplitCalculator
+
+NOW = datetime(2026, 5, 15, 9, 30)
+
+# Month and quarter boundaries around the six-month window ending May 2026
+EDGES = [datetime(2025, 11, 1), datetime(2025, 12, 1), datetime(2026, 1, 1), datetime(2026, 2, 1),
+         datetime(2026, 3, 1), datetime(2026, 4, 1), datetime(2026, 5, 1), datetime(2026, 6, 1)]
+
+
+def _setup(db):
+    db.session.add_all([User(id='a@x.com', name='a'), User(id='b@x.com', name='b')])
+    db.session.flush()
+
+    rng = random.Random(10)
+    for _ in range(300):
+        moment = rng.choice(EDGES) + rng.choice([
+            timedelta(0), timedelta(seconds=-1), timedelta(seconds=1), timedelta(days=rng.randint(-20, 20))
+        ])
+        user_id = rng.choice(['a@x.com', 'a@x.com', 'b@x.com'])
+        db.session.add(Expense(
+            description='Expense', amount=round(rng.uniform(1, 100), 2), date=moment, card_used='Visa',
+            split_method=rng.choice(['none', 'equal']), paid_by=user_id, user_id=user_id,
+            split_with='b@x.com' if user_id == 'a@x.com' else 'a@x.com',
+            transaction_type=rng.choice(['expense', 'income'])
+        ))
+    db.session.commit()
+
+
+def _reference(periods, rows):
+    buckets = [{} for _ in periods]
+    for moment, transaction_type, amount in rows:
+        for bucket, period in zip(buckets, periods):
+            if period['start'] <= moment < period['end']:
+                bucket[transaction_type] = bucket.get(transaction_type, 0) + amount
+    return buckets
+
+
+def _assert_close(actual, expected):
+    assert len(actual) == len(expected)
+    for bucket, reference in zip(actual, expected):
+        assert set(bucket) == set(reference)
+        assert all(abs(bucket[key] - value) < 1e-6 for key, value in reference.items())
+
+
+def test_periods_cover_calendar_months_and_quarters(db):
+    months = TrendEngine('a@x.com', 6, 'month', now=NOW).periods
+    assert [period['key'] for period in months] == ['2025-12', '2026-01', '2026-02', '2026-03', '2026-04', '2026-05']
+    assert [period['start'] for period in months] == EDGES[1:7]
+    assert [period['end'] for period in months] == EDGES[2:8]
+
+    quarters = TrendEngine('a@x.com', 6, 'quarter', now=NOW).periods
+    assert [period['key'] for period in quarters] == ['2025-Q4', '2026-Q1', '2026-Q2']
+    # The first quarter is clipped to the window, the last ends with the current month
+    assert [(period['start'], period['end']) for period in quarters] == [
+        (datetime(2025, 12, 1), datetime(2026, 1, 1)),
+        (datetime(2026, 1, 1), datetime(2026, 4, 1)),
+        (datetime(2026, 4, 1), datetime(2026, 6, 1))
+    ]
+
+    weeks = TrendEngine('a@x.com', 1, 'week', now=NOW).periods
+    assert weeks[0]['start'] == datetime(2026, 5, 1) and weeks[0]['key'] == '2026-W18'
+    assert weeks[-1]['end'] == datetime(2026, 5, 18)
+
+
+def test_edge_transactions_land_in_their_calendar_period(db):
+    _setup(db)
+    expenses = Expense.query.all()
+    users = SplitCalculator.load_users(['a@x.com', 'b@x.com'])
+    own = [(e.date, e.transaction_type, e.amount) for e in expenses if e.user_id == 'a@x.com']
+    shares = [
+        (e.date, e.transaction_type, SplitCalculator.user_share(SplitCalculator.compute(e, users), 'a@x.com'))
+        for e in expenses
+    ]
+
+    for granularity in TrendEngine.GRANULARITIES:
+        engine = TrendEngine('a@x.com', 6, granularity, now=NOW)
+        _assert_close(engine.own_totals(), _reference(engine.periods, own))
+        _assert_close(engine.share_totals(), _reference(engine.periods, shares))
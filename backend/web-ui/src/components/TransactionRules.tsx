@@ -86,14 +86,20 @@ export const TransactionRules: React.FC = () => {
     try {
       setApplyingRules(true);
       setError(null);
-      const result = await transactionRulesApi.bulkApply();
+      let result = await transactionRulesApi.bulkApply();
 
-      if (result.success) {
+      // The job runs in the background; poll until it finishes
+      while (result.job.status === 'pending' || result.job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        result = await transactionRulesApi.getBulkApplyJob(result.job.id);
+      }
+
+      if (result.job.status === 'completed') {
         setSuccessMessage(`Successfully applied rules to ${result.transactions_updated} of ${result.transactions_processed} transactions`);
         setTimeout(() => setSuccessMessage(null), 5000);
         loadData(); // Reload to get updated match counts
       } else {
-        setError(result.error || 'Failed to apply rules');
+        setError(result.job.error || result.error || 'Failed to apply rules');
       }
     } catch (err: any) {
       setError(err.response?.data?.error || 'Failed to apply rules');
@@ -32,6 +32,7 @@ export const Dashboard = () => {
   const [budgets, setBudgets] = useState<any[]>([]);
   const [monthlyAggregation, setMonthlyAggregation] = useState<any[]>([]);
   const [expandedMonths, setExpandedMonths] = useState<Set<string>>(new Set());
+  const [monthTransactions, setMonthTransactions] = useState<Record<string, any[]>>({});
 
   // Category colors
   const COLORS = [
@@ -47,12 +48,18 @@ export const Dashboard = () => {
     try {
       setLoading(true);
 
+      // Cash flow buckets: days for the week/month ranges, months for the year
+      const cashFlowRange = timeRange === 'year'
+        ? { months: 12, granularity: 'month' as const }
+        : { months: 2, granularity: 'day' as const };
+
       // Fetch dashboard data
-      const [dashboardData, accountsData, transactionsData, budgetsData] = await Promise.all([
+      const [dashboardData, accountsData, transactionsData, budgetsData, cashFlow] = await Promise.all([
         analyticsService.getDashboardData(),
         accountService.getAccounts(),
         transactionService.getTransactions({ limit: 5 }),
-        budgetService.getBudgets()
+        budgetService.getBudgets(),
+        analyticsService.getCashFlowData(cashFlowRange.months, cashFlowRange.granularity)
       ]);
 
       // Set metrics from actual API response
@@ -67,63 +74,27 @@ export const Dashboard = () => {
       const rate = income > 0 ? (savings / income * 100) : 0;
       setSavingsRate(Math.max(0, rate));
 
-      // Calculate income and expense breakdown based on time range
-      const now = new Date();
-      const dataByPeriod: any = {};
-
-      // Determine date cutoff based on time range
-      let cutoffDate = new Date();
-      let groupByMonth = true;
-
-      if (timeRange === 'week') {
-        cutoffDate.setDate(now.getDate() - 7);
-        groupByMonth = false;
-      } else if (timeRange === 'month') {
-        cutoffDate.setDate(now.getDate() - 30);
-        groupByMonth = false;
-      } else if (timeRange === 'year') {
-        cutoffDate.setFullYear(now.getFullYear() - 1);
-        groupByMonth = true;
-      }
-
-      (dashboardData.expenses || []).forEach((txn: any) => {
-        const txnDate = new Date(txn.date);
-        if (txnDate < cutoffDate) return; // Skip old transactions
-
-        let periodKey: string;
-        if (groupByMonth) {
-          periodKey = txn.date.substring(0, 7); // 'YYYY-MM'
-        } else {
-          periodKey = txn.date.substring(0, 10); // 'YYYY-MM-DD'
-        }
-
-        if (!dataByPeriod[periodKey]) {
-          dataByPeriod[periodKey] = { income: 0, expenses: 0 };
-        }
-
-        if (txn.transaction_type === 'income') {
-          dataByPeriod[periodKey].income += txn.amount;
-        } else if (txn.transaction_type === 'expense') {
-          dataByPeriod[periodKey].expenses += Math.abs(txn.amount);
-        }
-      });
-
-      // Format for display
-      const periods = Object.keys(dataByPeriod).sort();
-      const formattedCashFlow = periods.map((periodKey: string) => {
-        let label: string;
-        if (groupByMonth) {
-          label = new Date(periodKey + '-01').toLocaleDateString('en-US', { month: 'short', year: '2-digit' });
-        } else {
-          label = new Date(periodKey).toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
-        }
-
-        return {
-          month: label,
-          income: dataByPeriod[periodKey].income || 0,
-          expenses: dataByPeriod[periodKey].expenses || 0
-        };
-      });
+      // Daily buckets are trimmed to the last 7 or 30 days
+      const cutoffDate = new Date();
+      cutoffDate.setDate(cutoffDate.getDate() - (timeRange === 'week' ? 7 : 30));
+      const cutoffKey = cutoffDate.toISOString().substring(0, 10);
+
+      const formattedCashFlow = (cashFlow || [])
+        .filter((period: any) => timeRange === 'year' || period.period >= cutoffKey)
+        .map((period: any) => {
+          let label: string;
+          if (timeRange === 'year') {
+            label = new Date(period.period + '-01').toLocaleDateString('en-US', { month: 'short', year: '2-digit' });
+          } else {
+            label = new Date(period.period).toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+          }
+
+          return {
+            month: label,
+            income: period.income || 0,
+            expenses: period.expenses || 0
+          };
+        });
       setCashFlowData(formattedCashFlow);
 
       // Format category data
@@ -165,61 +136,8 @@ export const Dashboard = () => {
       }));
       setBudgets(formattedBudgets);
 
-      // Create monthly aggregation for expenses only
-      const monthlyData: any = {};
-      (dashboardData.expenses || []).forEach((txn: any) => {
-        if (txn.transaction_type !== 'expense') return; // Only include expenses
-
-        const monthKey = txn.date.substring(0, 7); // 'YYYY-MM'
-        if (!monthlyData[monthKey]) {
-          monthlyData[monthKey] = {
-            month: monthKey,
-            total: 0,
-            categories: {},
-            accounts: {},
-            transactions: []
-          };
-        }
-
-        const amount = Math.abs(txn.amount);
-        monthlyData[monthKey].total += amount;
-        monthlyData[monthKey].transactions.push(txn);
-
-        // Group by category
-        const categoryName = txn.category?.name || txn.category || 'Uncategorized';
-        const categoryColor = txn.category?.color || '#6b7280'; // Default gray color
-        if (!monthlyData[monthKey].categories[categoryName]) {
-          monthlyData[monthKey].categories[categoryName] = {
-            name: categoryName,
-            color: categoryColor,
-            total: 0,
-            transactions: []
-          };
-        }
-        monthlyData[monthKey].categories[categoryName].total += amount;
-        monthlyData[monthKey].categories[categoryName].transactions.push(txn);
-
-        // Group by account
-        const accountName = txn.account?.name || txn.account || 'Unknown';
-        const accountColor = txn.account?.color || '#6b7280'; // Default gray color
-        if (!monthlyData[monthKey].accounts[accountName]) {
-          monthlyData[monthKey].accounts[accountName] = {
-            name: accountName,
-            color: accountColor,
-            total: 0,
-            transactions: []
-          };
-        }
-        monthlyData[monthKey].accounts[accountName].total += amount;
-        monthlyData[monthKey].accounts[accountName].transactions.push(txn);
-      });
-
-      // Convert to array and sort by month (newest first)
-      const aggregatedMonths = Object.values(monthlyData)
-        .sort((a: any, b: any) => b.month.localeCompare(a.month))
-        .slice(0, 6); // Show last 6 months
-
-      setMonthlyAggregation(aggregatedMonths);
+      // Monthly expense breakdown, aggregated server-side over the last 6 months
+      setMonthlyAggregation((dashboardData as any).monthly_breakdown || []);
 
     } catch (error: any) {
       console.error('Failed to load dashboard data:', error);
@@ -255,7 +173,28 @@ export const Dashboard = () => {
     return null;
   };
 
+  const loadMonthTransactions = async (monthKey: string) => {
+    const [year, month] = monthKey.split('-').map(Number);
+    const lastDay = new Date(year, month, 0).getDate();
+    try {
+      const result = await transactionService.getTransactions({
+        start_date: `${monthKey}-01`,
+        end_date: `${monthKey}-${String(lastDay).padStart(2, '0')}T23:59:59`,
+        type: 'expense',
+        per_page: 100
+      });
+      setMonthTransactions(prev => ({ ...prev, [monthKey]: result.transactions || [] }));
+    } catch (error: any) {
+      console.error('Failed to load month transactions:', error);
+      showToast('Failed to load transactions', 'error');
+    }
+  };
+
   const toggleMonth = (monthKey: string) => {
+    // Individual transactions are fetched the first time a month is expanded
+    if (!expandedMonths.has(monthKey) && !monthTransactions[monthKey]) {
+      loadMonthTransactions(monthKey);
+    }
     setExpandedMonths(prev => {
       const newSet = new Set(prev);
       if (newSet.has(monthKey)) {
@@ -553,8 +492,9 @@ export const Dashboard = () => {
               <tbody>
                 {monthlyAggregation.map((month: any) => {
                   const isExpanded = expandedMonths.has(month.month);
-                  const categories = Object.values(month.categories);
-                  const accounts = Object.values(month.accounts);
+                  const categories = month.categories;
+                  const accounts = month.accounts;
+                  const transactions = monthTransactions[month.month] || [];
 
                   return (
                     <React.Fragment key={month.month}>
@@ -623,7 +563,7 @@ export const Dashboard = () => {
                             onMouseLeave={(e) => e.currentTarget.style.background = 'rgba(255, 255, 255, 0.1)'}
                           >
                             {isExpanded ? <ChevronUp size={14} /> : <ChevronDown size={14} />}
-                            {isExpanded ? 'Hide' : 'Show'} ({month.transactions.length})
+                            {isExpanded ? 'Hide' : 'Show'} ({month.count})
                           </button>
                         </td>
                       </tr>
@@ -632,7 +572,7 @@ export const Dashboard = () => {
                           <td colSpan={5} style={{ padding: '0', background: 'rgba(0, 0, 0, 0.3)' }}>
                             <div style={{ padding: '16px', borderTop: '1px solid rgba(255, 255, 255, 0.1)' }}>
                               <h5 style={{ fontSize: '13px', fontWeight: '600', color: '#94a3b8', marginBottom: '12px' }}>
-                                Individual Transactions ({month.transactions.length})
+                                Individual Transactions ({month.count})
                               </h5>
                               <div style={{ maxHeight: '300px', overflowY: 'auto' }}>
                                 <table style={{ width: '100%', borderCollapse: 'collapse' }}>
@@ -646,7 +586,7 @@ export const Dashboard = () => {
                                     </tr>
                                   </thead>
                                   <tbody>
-                                    {month.transactions.map((txn: any) => (
+                                    {transactions.map((txn: any) => (
                                       <tr key={txn.id} style={{ borderBottom: '1px solid rgba(255, 255, 255, 0.05)' }}>
                                         <td style={{ padding: '8px', color: '#94a3b8', fontSize: '12px' }}>
                                           {new Date(txn.date).toLocaleDateString('en-US', { month: 'short', day: 'numeric' })}
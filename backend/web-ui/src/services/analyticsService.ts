@@ -243,21 +243,30 @@ export const analyticsService = {
   /**
    * Get cash flow data (income, expenses, savings over time)
    */
-  async getCashFlowData(months: number = 6): Promise<Array<{
+  async getCashFlowData(
+    months: number = 6,
+    granularity: 'day' | 'week' | 'month' | 'quarter' = 'month'
+  ): Promise<Array<{
+    period: string;
     month: string;
     income: number;
     expenses: number;
     savings: number;
   }>> {
+    const params = new URLSearchParams();
+    params.append('months', months.toString());
+    params.append('granularity', granularity);
+
     const response = await api.get<{
       success: boolean;
       cashflow: Array<{
+        period: string;
         month: string;
         income: number;
         expenses: number;
         savings: number;
       }>;
-    }>('/api/v1/analytics/cashflow');
+    }>(`/api/v1/analytics/cashflow?${params.toString()}`);
     return response.data.cashflow;
   },
 
@@ -48,6 +48,24 @@ export interface CreateRuleData {
   active?: boolean;
 }
 
+export interface BulkApplyJob {
+  id: number;
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  total: number;
+  processed: number;
+  updated: number;
+  elapsed: number;
+  error: string | null;
+}
+
+export interface BulkApplyJobResponse {
+  success: boolean;
+  job: BulkApplyJob;
+  transactions_processed: number;
+  transactions_updated: number;
+  error?: string;
+}
+
 export const transactionRulesApi = {
   // Get all rules
   getAll: async (): Promise<TransactionRulesResponse> => {
@@ -88,14 +106,20 @@ export const transactionRulesApi = {
     return response.data;
   },
 
-  // Bulk apply rules to existing transactions
-  bulkApply: async (ruleIds?: number[]): Promise<{ success: boolean; transactions_processed: number; transactions_updated: number; error?: string }> => {
+  // Bulk apply rules to existing transactions (starts a background job)
+  bulkApply: async (ruleIds?: number[]): Promise<BulkApplyJobResponse> => {
     const response = await api.post('/api/v1/transaction-rules/bulk-apply', {
       rule_ids: ruleIds
     });
     return response.data;
   },
 
+  // Get progress of a bulk apply job
+  getBulkApplyJob: async (jobId: number): Promise<BulkApplyJobResponse> => {
+    const response = await api.get(`/api/v1/transaction-rules/bulk-apply/${jobId}`);
+    return response.data;
+  },
+
   // Get rule suggestions from transaction edit
   getSuggestion: async (transactionId: number, newCategoryId: number): Promise<{ success: boolean; suggestion?: any; message?: string }> => {
     const response = await api.post('/api/v1/transaction-rules/suggest', {